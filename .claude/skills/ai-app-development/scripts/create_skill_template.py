@@ -73,10 +73,20 @@ async def {name}({params}) -> {return_type}:
 '''
 
 
+def _render_params(params: list, doc_indent: str):
+    """单次遍历参数列表，同时生成参数签名和参数文档"""
+    param_parts = []
+    doc_parts = []
+    for p in params:
+        name = p['name']
+        param_parts.append(f"{name}: {p.get('type', 'str')}")
+        doc_parts.append(f"{doc_indent}{name}: {p.get('description', '')}")
+    return ", ".join(param_parts), "\n".join(doc_parts)
+
+
 def generate_function_skill(name: str, description: str, params: list, return_type: str = "dict"):
     """生成函数式 skill"""
-    param_str = ", ".join([f"{p['name']}: {p.get('type', 'str')}" for p in params])
-    arg_docs = "\n".join([f"        {p['name']}: {p.get('description', '')}" for p in params])
+    param_str, arg_docs = _render_params(params, " " * 8)
     
     return FUNCTION_TEMPLATE.format(
         name=name,
@@ -90,17 +100,14 @@ def generate_function_skill(name: str, description: str, params: list, return_ty
 
 def generate_class_skill(name: str, description: str, init_params: list, method_params: list, return_type: str = "dict"):
     """生成类式 skill"""
-    init_param_str = ", ".join([f"{p['name']}: {p.get('type', 'str')}" for p in init_params]) if init_params else ""
+    init_param_str, init_docs = _render_params(init_params, " " * 12)
     if init_param_str:
         init_param_str = ", " + init_param_str
     
-    method_param_str = ", ".join([f"{p['name']}: {p.get('type', 'str')}" for p in method_params]) if method_params else ""
+    method_param_str, method_arg_docs = _render_params(method_params, " " * 12)
     if method_param_str:
         method_param_str = ", " + method_param_str
     
-    init_docs = "\n".join([f"            {p['name']}: {p.get('description', '')}" for p in init_params])
-    method_arg_docs = "\n".join([f"            {p['name']}: {p.get('description', '')}" for p in method_params])
-    
     return CLASS_TEMPLATE.format(
         name=name,
         description=description,
@@ -116,8 +123,7 @@ def generate_class_skill(name: str, description: str, init_params: list, method_
 
 def generate_async_skill(name: str, description: str, params: list, return_type: str = "dict"):
     """生成异步 skill"""
-    param_str = ", ".join([f"{p['name']}: {p.get('type', 'str')}" for p in params])
-    arg_docs = "\n".join([f"        {p['name']}: {p.get('description', '')}" for p in params])
+    param_str, arg_docs = _render_params(params, " " * 8)
     
     return ASYNC_TEMPLATE.format(
         name=name,
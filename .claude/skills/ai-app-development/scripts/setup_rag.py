@@ -10,64 +10,234 @@
 """
 
 import argparse
+import asyncio
 import os
+import uuid
+from functools import lru_cache
+from multiprocessing import Pool
 from pathlib import Path
+from typing import List
+from langchain.docstore.document import Document
 from langchain.document_loaders import TextLoader, PyPDFLoader
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain.embeddings import OpenAIEmbeddings
 from langchain.vectorstores import Chroma
+from openai import RateLimitError
+from tenacity import retry, retry_if_exception_type, stop_after_attempt, wait_exponential_jitter
 
+try:
+    from tqdm import tqdm
+except ImportError:  # tqdm 可选，仅用于显示进度
+    def tqdm(iterable, **kwargs):
+        return iterable
 
-def load_documents(doc_path: str):
-    """加载文档"""
+try:
+    # Rust 实现的递归分块器，比纯 Python 的 RecursiveCharacterTextSplitter 快得多
+    from semantic_text_splitter import TextSplitter
+except ImportError:
+    TextSplitter = None
+
+try:
+    from aiolimiter import AsyncLimiter
+except ImportError:  # aiolimiter 可选，未安装时只依赖信号量限制并发
+    AsyncLimiter = None
+
+
+# 目录模式下会被加载的文件类型
+SUPPORTED_SUFFIXES = {'.pdf', '.txt', '.md'}
+
+# 每次嵌入请求的文本条数，以及同时在途的请求数（避免 429）
+EMBED_BATCH_SIZE = 512
+EMBED_CONCURRENCY = 5
+# 每分钟最多发出的嵌入请求数（按账号等级调整）
+EMBED_REQUESTS_PER_MINUTE = 3500
+# 流水线各阶段之间最多缓存的批次数
+QUEUE_DEPTH = 4
+
+# 按 token 分块时使用的编码（与 OpenAI 嵌入模型一致）
+TOKEN_ENCODING = "cl100k_base"
+
+
+def _load_one(path: str) -> List:
+    """加载单个文件（放在模块顶层，保证可以被进程池 pickle）"""
+    if path.endswith('.pdf'):
+        loader = PyPDFLoader(path)
+    else:
+        loader = TextLoader(path)
+    return loader.load()
+
+
+def load_documents(doc_path: str, workers: int = None):
+    """加载文档（目录模式下使用进程池并行解析）"""
     documents = []
     doc_path = Path(doc_path)
     
     if doc_path.is_file():
         # 单个文件
-        if doc_path.suffix == '.pdf':
-            loader = PyPDFLoader(str(doc_path))
-        else:
-            loader = TextLoader(str(doc_path))
-        documents.extend(loader.load())
+        documents.extend(_load_one(str(doc_path)))
     elif doc_path.is_dir():
-        # 目录
-        for file_path in doc_path.rglob('*'):
-            if file_path.suffix == '.pdf':
-                loader = PyPDFLoader(str(file_path))
-                documents.extend(loader.load())
-            elif file_path.suffix in ['.txt', '.md']:
-                loader = TextLoader(str(file_path))
-                documents.extend(loader.load())
+        # 目录：先一次性收集文件列表，再分发给进程池
+        files = [
+            str(file_path) for file_path in doc_path.rglob('*')
+            if file_path.is_file() and file_path.suffix in SUPPORTED_SUFFIXES
+        ]
+        if not files:
+            return documents
+        
+        processes = min(workers or os.cpu_count() or 1, len(files))
+        with Pool(processes=processes) as pool:
+            for docs in tqdm(pool.imap_unordered(_load_one, files), total=len(files), desc="加载文档"):
+                documents.extend(docs)
     
     return documents
 
 
-def create_rag_system(documents, output_dir: str, chunk_size: int = 1000, chunk_overlap: int = 200):
-    """创建 RAG 系统"""
-    print(f"加载了 {len(documents)} 个文档")
+@lru_cache(maxsize=1)
+def _get_encoder():
+    """tiktoken 编码器初始化开销大，整个进程只创建一次"""
+    import tiktoken
+    return tiktoken.get_encoding(TOKEN_ENCODING)
+
+
+def _count_tokens(text: str) -> int:
+    """统计 token 数（encode_ordinary 跳过特殊 token 扫描）"""
+    return len(_get_encoder().encode_ordinary(text))
+
+
+def _build_splitter(chunk_size: int, chunk_overlap: int, by_tokens: bool = False):
+    """构建分块函数 split(doc) -> List[Document]：优先使用 semantic-text-splitter，未安装时回退到 LangChain 分块器
+
+    by_tokens 为 True 时 chunk_size / chunk_overlap 按 token 计算，否则按字符计算。
+    分块器只构建一次，在所有文档间复用。
+    """
+    if TextSplitter is None:
+        text_splitter = RecursiveCharacterTextSplitter(
+            chunk_size=chunk_size,
+            chunk_overlap=chunk_overlap,
+            length_function=_count_tokens if by_tokens else len
+        )
+        return lambda doc: text_splitter.split_documents([doc])
     
-    # 分块
-    print("正在分块文档...")
-    text_splitter = RecursiveCharacterTextSplitter(
-        chunk_size=chunk_size,
-        chunk_overlap=chunk_overlap
-    )
-    chunks = text_splitter.split_documents(documents)
-    print(f"文档已分为 {len(chunks)} 个块")
+    if by_tokens:
+        splitter = TextSplitter.from_tiktoken_model("text-embedding-ada-002", chunk_size, overlap=chunk_overlap)
+    else:
+        splitter = TextSplitter(chunk_size, overlap=chunk_overlap)
+    return lambda doc: [
+        Document(page_content=text, metadata=doc.metadata)
+        for text in splitter.chunks(doc.page_content)
+    ]
+
+
+def _retry_after_seconds(error: RateLimitError):
+    """读取 429 响应中的 Retry-After 头（秒），没有则返回 None"""
+    response = getattr(error, "response", None)
+    value = response.headers.get("retry-after") if response is not None else None
+    try:
+        return float(value) if value else None
+    except ValueError:
+        return None
+
+
+@retry(
+    wait=wait_exponential_jitter(initial=1, max=32),
+    stop=stop_after_attempt(6),
+    retry=retry_if_exception_type(RateLimitError),
+    reraise=True
+)
+async def _embed_batch(embeddings, batch: List[str]) -> List[List[float]]:
+    """嵌入一批文本，遇到限流时先按 Retry-After 等待，再交给 tenacity 指数退避重试"""
+    try:
+        return await embeddings.aembed_documents(batch)
+    except RateLimitError as e:
+        retry_after = _retry_after_seconds(e)
+        if retry_after:
+            await asyncio.sleep(retry_after)
+        raise
+
+
+async def _ingest(documents: List[Document], vectorstore, embeddings, split,
+                  batch_size: int = EMBED_BATCH_SIZE, concurrency: int = EMBED_CONCURRENCY) -> int:
+    """流水线入库：分块 -> 嵌入 -> 写入 Chroma，各阶段之间用有界队列衔接
+
+    任一时刻内存中只保留队列深度内的若干批数据，而不是整个语料的全部块和向量。
+    返回写入的块数。
+    """
+    embed_queue: asyncio.Queue = asyncio.Queue(maxsize=QUEUE_DEPTH)
+    insert_queue: asyncio.Queue = asyncio.Queue(maxsize=QUEUE_DEPTH)
+    limiter = AsyncLimiter(EMBED_REQUESTS_PER_MINUTE, 60) if AsyncLimiter else None
+    inserted = 0
     
-    # 创建嵌入
-    print("正在创建向量嵌入...")
-    embeddings = OpenAIEmbeddings()
+    async def produce():
+        """逐个文档分块，凑满一批就放入嵌入队列"""
+        batch = []
+        documents.reverse()
+        while documents:
+            # 取出后即释放对原文档的引用
+            doc = documents.pop()
+            batch.extend(split(doc))
+            while len(batch) >= batch_size:
+                await embed_queue.put(batch[:batch_size])
+                batch = batch[batch_size:]
+        if batch:
+            await embed_queue.put(batch)
+        for _ in range(concurrency):
+            await embed_queue.put(None)
+    
+    async def embed():
+        """从嵌入队列取批次计算向量（concurrency 个协程同时在途）"""
+        while (batch := await embed_queue.get()) is not None:
+            texts = [chunk.page_content for chunk in batch]
+            if limiter:
+                async with limiter:
+                    vectors = await _embed_batch(embeddings, texts)
+            else:
+                vectors = await _embed_batch(embeddings, texts)
+            await insert_queue.put((texts, vectors, [chunk.metadata for chunk in batch]))
+    
+    async def embed_all():
+        await asyncio.gather(*(embed() for _ in range(concurrency)))
+        await insert_queue.put(None)
     
-    # 创建向量存储
-    print("正在创建向量数据库...")
-    vectorstore = Chroma.from_documents(
-        documents=chunks,
-        embedding=embeddings,
-        persist_directory=output_dir
+    async def insert():
+        """批量写入 Chroma（同步调用放到线程里，避免阻塞事件循环）"""
+        nonlocal inserted
+        while (item := await insert_queue.get()) is not None:
+            texts, vectors, metadatas = item
+            await asyncio.to_thread(
+                vectorstore._collection.upsert,
+                ids=[str(uuid.uuid4()) for _ in texts],
+                embeddings=vectors,
+                documents=texts,
+                metadatas=metadatas
+            )
+            inserted += len(texts)
+    
+    await asyncio.gather(produce(), embed_all(), insert())
+    return inserted
+
+
+def create_rag_system(documents, output_dir: str, chunk_size: int = 1000, chunk_overlap: int = 200,
+                      by_tokens: bool = False):
+    """创建 RAG 系统
+
+    注意：documents 会在入库过程中被逐个取出（列表最终为空），以尽早释放内存。
+    """
+    print(f"加载了 {len(documents)} 个文档")
+    
+    embeddings = OpenAIEmbeddings()
+    vectorstore = Chroma(
+        persist_directory=output_dir,
+        embedding_function=embeddings
     )
     
+    # 分块、嵌入、写入向量数据库以流水线方式并行进行
+    print("正在分块文档并创建向量数据库...")
+    split = _build_splitter(chunk_size, chunk_overlap, by_tokens)
+    count = asyncio.run(_ingest(documents, vectorstore, embeddings, split))
+    if hasattr(vectorstore, "persist"):
+        vectorstore.persist()
+    
+    print(f"文档已分为 {count} 个块")
     print(f"RAG 系统已创建在: {output_dir}")
     return vectorstore
 
@@ -78,6 +248,8 @@ def main():
     parser.add_argument("--output", required=True, help="输出目录")
     parser.add_argument("--chunk-size", type=int, default=1000, help="分块大小")
     parser.add_argument("--chunk-overlap", type=int, default=200, help="分块重叠大小")
+    parser.add_argument("--by-tokens", action="store_true", help="按 token 数（而不是字符数）计算分块大小")
+    parser.add_argument("--workers", type=int, default=None, help="加载文档的进程数（默认 CPU 核数）")
     
     args = parser.parse_args()
     
@@ -87,7 +259,7 @@ def main():
         return
     
     # 加载文档
-    documents = load_documents(args.documents)
+    documents = load_documents(args.documents, args.workers)
     if not documents:
         print("错误: 未找到文档")
         return
@@ -97,7 +269,8 @@ def main():
         documents,
         args.output,
         args.chunk_size,
-        args.chunk_overlap
+        args.chunk_overlap,
+        args.by_tokens
     )
 
 
@@ -1,8 +1,11 @@
 from fastapi import APIRouter, HTTPException, Depends, BackgroundTasks
-from fastapi.responses import StreamingResponse
-from typing import List, Dict, Any
+from fastapi.responses import Response, StreamingResponse
+from starlette.concurrency import iterate_in_threadpool
+from typing import Any, Dict, List
 from datetime import date, datetime
-import json
+from decimal import Decimal
+import asyncio
+import orjson
 from app.schemas.travel_schemas import (
     TravelPlanCreate,
     TravelPlanResponse,
@@ -13,6 +16,8 @@ from app.schemas.travel_schemas import (
     ItineraryGenerationResponse,
     AttractionResponse,
     RestaurantResponse,
+    TravelPlanFullResponse,
+    ITINERARY_DETAIL_LIST_ADAPTER,
 )
 from app.crud import travel_crud
 from app.tasks import (
@@ -20,14 +25,43 @@ from app.tasks import (
     fetch_attractions_task,
     fetch_restaurants_task,
 )
-from app.services.travel_service import TravelService
-from app.utils.api_clients import LocationAPIClient
+from app.services.travel_service import get_travel_service
+from app.utils.api_clients import get_location_client
+from app.utils.cache import (
+    GEOCODE_CACHE_TTL,
+    PLAN_CACHE_TTL,
+    SEARCH_CACHE_TTL,
+    async_cache_get,
+    async_cache_get_raw,
+    async_cache_set,
+    geocode_cache_key,
+    make_cache_key,
+)
 
 router = APIRouter(prefix="/travel", tags=["travel"])
 
-
 # ==================== 辅助函数 ====================
 
+def _json_default(obj: Any) -> Any:
+    """orjson 无法直接序列化的数据库类型（DECIMAL 预算、经纬度字段按 float 输出，与响应模型一致）"""
+    if isinstance(obj, Decimal):
+        return float(obj)
+    raise TypeError
+
+
+def _trusted_rows_response(rows) -> Response:
+    """
+    数据库行直接序列化为响应：查询列与响应模型字段一一对应、类型在写入时已校验，
+    不再逐行构造/校验模型（response_model 仅用于生成 API 文档）
+    """
+    return Response(orjson.dumps(rows, default=_json_default), media_type="application/json")
+
+
+def _adapter_json_response(adapter, raw: bytes) -> Response:
+    """JSON 字节直接交给 pydantic-core 解析校验（validate_json），不先解析成 Python dict 再校验"""
+    return Response(adapter.dump_json(adapter.validate_json(raw)), media_type="application/json")
+
+
 def get_current_user_id() -> int:
     """获取当前用户ID（简化版，实际应该从JWT token中获取）"""
     # TODO: 实现真实的用户认证
@@ -45,8 +79,14 @@ async def geocode(address: str, location: str = None):
     
     print(f"🌍 地理编码接口调用：address={decoded_address}, location={decoded_location}")
     
-    client = LocationAPIClient()
-    result = client.geocode(decoded_address, location=decoded_location)
+    # 地址 -> 经纬度是确定性的，优先读 Redis 缓存，避免重复调用高德
+    cache_key = geocode_cache_key(decoded_address, decoded_location)
+    cached = await async_cache_get(cache_key)
+    if cached:
+        return cached
+    
+    client = get_location_client()
+    result = await client.geocode_async(decoded_address, location=decoded_location)
     
     if not result or result.get("latitude") is None or result.get("longitude") is None:
         error_detail = f"无法解析该地址：{decoded_address}"
@@ -56,6 +96,7 @@ async def geocode(address: str, location: str = None):
         raise HTTPException(status_code=404, detail=error_detail)
     
     print(f"✅ 地理编码成功：{decoded_address} -> ({result.get('latitude')}, {result.get('longitude')})")
+    await async_cache_set(cache_key, result, GEOCODE_CACHE_TTL)
     return result
 
 
@@ -68,15 +109,15 @@ async def create_travel_plan(
 ):
     """创建旅行规划"""
     try:
-        plan_id = travel_crud.create_travel_plan(user_id, plan_data)
+        plan_id = await asyncio.to_thread(travel_crud.create_travel_plan, user_id, plan_data)
         if not plan_id:
             raise HTTPException(status_code=500, detail="创建旅行规划失败：数据库操作返回空ID")
         
-        plan = travel_crud.get_travel_plan(plan_id)
+        plan = await asyncio.to_thread(travel_crud.get_travel_plan, plan_id)
         if not plan:
             raise HTTPException(status_code=404, detail=f"旅行规划不存在：plan_id={plan_id}")
         
-        return TravelPlanResponse(**plan)
+        return TravelPlanResponse.model_validate(plan)
     except HTTPException:
         raise
     except Exception as e:
@@ -89,17 +130,36 @@ async def create_travel_plan(
 @router.get("/plans/{plan_id}", response_model=TravelPlanResponse)
 async def get_travel_plan(plan_id: int):
     """获取旅行规划详情"""
-    plan = travel_crud.get_travel_plan(plan_id)
+    # 先查缓存，命中时跳过数据库查询和 JSON 字段解析
+    cache_key = f"plan:{plan_id}"
+    cached = await async_cache_get_raw(cache_key)
+    if cached:
+        # 缓存中是校验后序列化好的 JSON，原样作为响应体
+        return Response(cached, media_type="application/json")
+    
+    plan = await asyncio.to_thread(travel_crud.get_travel_plan, plan_id)
     if not plan:
         raise HTTPException(status_code=404, detail="旅行规划不存在")
-    return TravelPlanResponse(**plan)
+    payload = TravelPlanResponse.model_validate(plan).model_dump_json().encode()
+    await async_cache_set(cache_key, payload, PLAN_CACHE_TTL)
+    return Response(payload, media_type="application/json")
+
+
+@router.get("/plans/{plan_id}/full", response_model=TravelPlanFullResponse)
+async def get_travel_plan_full(plan_id: int):
+    """获取旅行规划及其航班、住宿、路线详情（一次借出连接，依次查询四张表）"""
+    bundle = await asyncio.to_thread(travel_crud.get_travel_plan_bundle, plan_id)
+    if not bundle["plan"]:
+        raise HTTPException(status_code=404, detail="旅行规划不存在")
+    return TravelPlanFullResponse.model_validate(bundle)
 
 
 @router.get("/plans", response_model=List[TravelPlanResponse])
 async def get_user_travel_plans(user_id: int = Depends(get_current_user_id)):
     """获取用户的所有旅行规划"""
-    plans = travel_crud.get_user_travel_plans(user_id)
-    return [TravelPlanResponse(**plan) for plan in plans]
+    # JSON 字段以数据库原文拼接进响应，不经过 Python 解析和 pydantic 逐行校验
+    plans = await asyncio.to_thread(travel_crud.get_user_travel_plans, user_id, True)
+    return Response(orjson.dumps(plans, default=_json_default), media_type="application/json")
 
 
 # ==================== 路线生成接口 ====================
@@ -112,15 +172,15 @@ async def generate_itinerary(
 ):
     """生成旅行路线规划（异步任务）"""
     # 验证旅行规划是否存在
-    plan = travel_crud.get_travel_plan(plan_id)
+    plan = await asyncio.to_thread(travel_crud.get_plan_generation_context, plan_id)
     if not plan:
         raise HTTPException(status_code=404, detail="旅行规划不存在")
     
-    # 启动异步任务
+    # 启动异步任务（日期以序数整数传递，任务端 date.fromordinal 还原，省去字符串解析）
     task = generate_travel_itinerary_task.delay(
         travel_plan_id=plan_id,
-        start_date=request.start_date.isoformat(),
-        end_date=request.end_date.isoformat()
+        start_date=request.start_date.toordinal(),
+        end_date=request.end_date.toordinal()
     )
     
     return ItineraryGenerationResponse(
@@ -136,15 +196,11 @@ async def generate_itinerary_stream(plan_id: int, request: GenerateItineraryRequ
     生成旅行路线规划（SSE 流式返回）
     前端使用 fetch 读取 text/event-stream。
     """
-    plan = travel_crud.get_travel_plan(plan_id)
+    plan = await asyncio.to_thread(travel_crud.get_plan_generation_context, plan_id)
     if not plan:
         raise HTTPException(status_code=404, detail="旅行规划不存在")
-    
-    # 确保 plan 是字典类型
-    if not isinstance(plan, dict):
-        raise HTTPException(status_code=500, detail=f"旅行规划数据格式错误：期望字典，实际为 {type(plan)}")
 
-    travel_service = TravelService()
+    travel_service = get_travel_service()
 
     def event_iter():
         try:
@@ -166,7 +222,7 @@ async def generate_itinerary_stream(plan_id: int, request: GenerateItineraryRequ
             import traceback
             error_msg = f"生成路线时发生错误：{str(e)}\n{traceback.format_exc()}"
             print(f"❌ {error_msg}")
-            yield f"event: error\ndata: {json.dumps({'message': error_msg}, ensure_ascii=False)}\n\n"
+            yield b"event: error\ndata: " + orjson.dumps({"message": error_msg}) + b"\n\n"
 
     headers = {
         "Cache-Control": "no-cache",
@@ -174,16 +230,18 @@ async def generate_itinerary_stream(plan_id: int, request: GenerateItineraryRequ
         # Nginx 反向代理时避免缓冲导致前端一直 pending 看不到数据
         "X-Accel-Buffering": "no",
     }
-    return StreamingResponse(event_iter(), media_type="text/event-stream", headers=headers)
+    # 生成器内部是同步的 DeepSeek 流式调用和数据库写入，放到线程池中逐帧迭代，避免阻塞事件循环
+    return StreamingResponse(iterate_in_threadpool(event_iter()), media_type="text/event-stream", headers=headers)
 
 
 @router.get("/plans/{plan_id}/itinerary", response_model=List[ItineraryDetailResponse])
 async def get_itinerary_details(plan_id: int):
     """获取旅行规划的路线详情"""
-    details = travel_crud.get_itinerary_details(plan_id)
+    # 路线 JSON 字段以数据库原文拼进字节串，由 pydantic-core 一次完成解析和校验
+    details = await asyncio.to_thread(travel_crud.get_itinerary_details, plan_id, True)
     if not details:
         raise HTTPException(status_code=404, detail="路线详情不存在")
-    return [ItineraryDetailResponse(**detail) for detail in details]
+    return _adapter_json_response(ITINERARY_DETAIL_LIST_ADAPTER, orjson.dumps(details, default=_json_default))
 
 
 # ==================== 对话记录接口 ====================
@@ -195,7 +253,7 @@ async def create_conversation(
 ):
     """创建对话记录"""
     try:
-        conv_id = travel_crud.create_conversation(user_id, conversation_data)
+        conv_id = await asyncio.to_thread(travel_crud.create_conversation, user_id, conversation_data)
         if not conv_id:
             raise HTTPException(status_code=500, detail="创建对话记录失败")
         
@@ -215,8 +273,8 @@ async def create_conversation(
 @router.get("/plans/{plan_id}/conversations", response_model=List[ConversationResponse])
 async def get_plan_conversations(plan_id: int):
     """获取指定旅行规划的所有对话记录"""
-    conversations = travel_crud.get_conversations_by_plan(plan_id)
-    return [ConversationResponse(**conv) for conv in conversations]
+    conversations = await asyncio.to_thread(travel_crud.get_conversations_by_plan, plan_id)
+    return _trusted_rows_response(conversations)
 
 
 # ==================== 景点和餐厅接口 ====================
@@ -227,8 +285,18 @@ async def search_attractions(
     keyword: str = None
 ):
     """搜索景点"""
-    attractions = travel_crud.search_attractions(city=city, keyword=keyword)
-    return [AttractionResponse(**attr) for attr in attractions]
+    cache_key = make_cache_key("attr", city, keyword)
+    cached = await async_cache_get_raw(cache_key)
+    if cached:
+        # 缓存中是数据库行直接编码的 JSON（与未命中时的响应字节相同），原样输出
+        return Response(cached, media_type="application/json")
+    
+    attractions = await asyncio.to_thread(travel_crud.search_attractions, city=city, keyword=keyword)
+    response = _trusted_rows_response(attractions)
+    # 空结果可能是数据库异常导致的，不缓存
+    if attractions:
+        await async_cache_set(cache_key, response.body, SEARCH_CACHE_TTL)
+    return response
 
 
 @router.get("/restaurants", response_model=List[RestaurantResponse])
@@ -238,12 +306,13 @@ async def search_restaurants(
     keyword: str = None
 ):
     """搜索餐厅"""
-    restaurants = travel_crud.search_restaurants(
+    restaurants = await asyncio.to_thread(
+        travel_crud.search_restaurants,
         city=city,
         cuisine_type=cuisine_type,
         keyword=keyword
     )
-    return [RestaurantResponse(**rest) for rest in restaurants]
+    return _trusted_rows_response(restaurants)
 
 
 # ==================== 任务状态查询接口 ====================
@@ -251,37 +320,39 @@ async def search_restaurants(
 @router.get("/tasks/{task_id}/status")
 async def get_task_status(task_id: str):
     """查询异步任务状态"""
-    from celery.result import AsyncResult
     from app.tasks import celery_app
     
-    task_result = AsyncResult(task_id, app=celery_app)
+    # 一次读取任务元数据（status/result），避免 AsyncResult 每次访问属性都请求一次 Redis
+    meta = await asyncio.to_thread(celery_app.backend.get_task_meta, task_id)
+    state = meta.get("status")
+    info = meta.get("result")
     
-    if task_result.state == "PENDING":
+    if state == "PENDING":
         response = {
             "task_id": task_id,
             "status": "pending",
             "message": "任务等待中"
         }
-    elif task_result.state == "PROGRESS":
+    elif state == "PROGRESS":
         response = {
             "task_id": task_id,
             "status": "progress",
             "message": "任务执行中",
-            "progress": task_result.info.get("progress", 0)
+            "progress": (info or {}).get("progress", 0)
         }
-    elif task_result.state == "SUCCESS":
+    elif state == "SUCCESS":
         response = {
             "task_id": task_id,
             "status": "success",
             "message": "任务完成",
-            "result": task_result.result
+            "result": info
         }
     else:
         response = {
             "task_id": task_id,
             "status": "failure",
             "message": "任务失败",
-            "error": str(task_result.info)
+            "error": str(info)
         }
     
     return response
@@ -296,12 +367,12 @@ async def get_recommendations(
     food_preferences: str = None
 ):
     """获取推荐景点和餐厅"""
-    travel_service = TravelService()
+    travel_service = get_travel_service()
     
     interests_list = interests.split(",") if interests else []
     food_prefs_list = food_preferences.split(",") if food_preferences else []
     
-    recommendations = travel_service.get_recommendations(
+    recommendations = await travel_service.get_recommendations(
         destination=destination,
         interests=interests_list,
         food_preferences=food_prefs_list
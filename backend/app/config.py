@@ -1,37 +1,39 @@
-import os
+from functools import lru_cache
 from typing import Optional
-from pydantic_settings import BaseSettings
+from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
 class Settings(BaseSettings):
     # 数据库配置
-    DB_HOST: str = os.getenv("DB_HOST", "127.0.0.1")
-    DB_USER: str = os.getenv("DB_USER", "root")
-    DB_PASSWORD: str = os.getenv("DB_PASSWORD", "19961001")
-    DB_NAME: str = os.getenv("DB_NAME", "travel")
-    DB_PORT: int = int(os.getenv("DB_PORT", "3306"))
+    DB_HOST: str = "127.0.0.1"
+    DB_USER: str = "root"
+    DB_PASSWORD: str = "19961001"
+    DB_NAME: str = "travel"
+    DB_PORT: int = 3306
     DB_CHARSET: str = "utf8mb4"
+    # MySQL 与应用部署在同一台机器时可配置 Unix socket 路径，绕过 TCP 协议栈（配置后忽略 DB_HOST/DB_PORT）
+    DB_SOCKET: Optional[str] = None
     
     # Redis配置
-    REDIS_HOST: str = os.getenv("REDIS_HOST", "localhost")
-    REDIS_PORT: int = int(os.getenv("REDIS_PORT", "6379"))
-    REDIS_DB: int = int(os.getenv("REDIS_DB", "0"))
-    REDIS_PASSWORD: Optional[str] = os.getenv("REDIS_PASSWORD", None)
+    REDIS_HOST: str = "localhost"
+    REDIS_PORT: int = 6379
+    REDIS_DB: int = 0
+    REDIS_PASSWORD: Optional[str] = None
     
     # Celery配置
-    CELERY_BROKER_URL: str = os.getenv("CELERY_BROKER_URL", "redis://localhost:6379/0")
-    CELERY_RESULT_BACKEND: str = os.getenv("CELERY_RESULT_BACKEND", "redis://localhost:6379/0")
+    CELERY_BROKER_URL: str = "redis://localhost:6379/0"
+    CELERY_RESULT_BACKEND: str = "redis://localhost:6379/0"
     
     # API Keys（不要在代码中写默认值，统一通过环境变量注入）
-    DEEPSEEK_API_KEY: str = os.getenv("DEEPSEEK_API_KEY", "")
+    DEEPSEEK_API_KEY: str = ""
     # 高德地图 Web 服务 API Key（后端使用，用于地理编码和地点搜索）
-    AMAP_API_KEY: str = os.getenv("AMAP_API_KEY", "")
+    AMAP_API_KEY: str = ""
     # 高德地图安全密钥（可选，用于签名验证）
-    AMAP_SECURITY_KEY: str = os.getenv("AMAP_SECURITY_KEY", "")
+    AMAP_SECURITY_KEY: str = ""
     # 高德地图 Web JS API Key（前端使用，仅用于前端地图显示，后端不需要）
-    AMAP_WEB_JS_KEY: Optional[str] = os.getenv("AMAP_WEB_JS_KEY", None)
-    GOOGLE_PLACES_API_KEY: Optional[str] = os.getenv("GOOGLE_PLACES_API_KEY", None)
-    MAPBOX_TOKEN: Optional[str] = os.getenv("MAPBOX_TOKEN", None)  # Mapbox Token（用于国外地理编码）
+    AMAP_WEB_JS_KEY: Optional[str] = None
+    GOOGLE_PLACES_API_KEY: Optional[str] = None
+    MAPBOX_TOKEN: Optional[str] = None  # Mapbox Token（用于国外地理编码）
     
     # 应用配置
     API_V1_PREFIX: str = "/api/v1"
@@ -41,12 +43,17 @@ class Settings(BaseSettings):
     # CORS配置
     CORS_ORIGINS: list = ["http://localhost:3000", "http://localhost:5173", "http://localhost:5174"]
     
-    class Config:
-        env_file = ".env"
-        case_sensitive = True
+    # 环境变量 / .env 由 pydantic-settings 直接绑定到同名字段，上面只写默认值
+    model_config = SettingsConfigDict(env_file=".env", case_sensitive=True)
 
 
-settings = Settings()
+@lru_cache
+def get_settings() -> Settings:
+    """获取全局配置（只解析一次环境变量和 .env）"""
+    return Settings()
+
+
+settings = get_settings()
 
 # 关键密钥缺失时给出明确报错（避免“静默失败”）
 def _require(name: str, value: str):
@@ -2,32 +2,44 @@ from .travel_crud import (
     create_or_get_user,
     create_travel_plan,
     get_travel_plan,
+    get_plan_generation_context,
     get_user_travel_plans,
+    iter_user_travel_plans,
     create_conversation,
     get_conversations_by_plan,
     create_itinerary_detail,
+    create_itinerary_details_bulk,
     get_itinerary_details,
     create_attraction,
     search_attractions,
+    search_attractions_near,
     create_restaurant,
     search_restaurants,
+    search_restaurants_near,
     get_flights_by_plan,
     get_accommodations_by_plan,
+    get_travel_plan_bundle,
 )
 
 __all__ = [
     "create_or_get_user",
     "create_travel_plan",
     "get_travel_plan",
+    "get_plan_generation_context",
     "get_user_travel_plans",
+    "iter_user_travel_plans",
     "create_conversation",
     "get_conversations_by_plan",
     "create_itinerary_detail",
+    "create_itinerary_details_bulk",
     "get_itinerary_details",
     "create_attraction",
     "search_attractions",
+    "search_attractions_near",
     "create_restaurant",
     "search_restaurants",
+    "search_restaurants_near",
     "get_flights_by_plan",
     "get_accommodations_by_plan",
+    "get_travel_plan_bundle",
 ]
@@ -1,8 +1,17 @@
-import json
-from typing import List, Optional, Dict, Any
+import orjson
+import pymysql
+from pydantic import TypeAdapter
+from typing import Iterator, List, Optional, Dict, Any
+from concurrent.futures import ThreadPoolExecutor
+import logging
+import math
+from dataclasses import dataclass, fields as dataclass_fields
 from datetime import datetime
 from app.models.travel_models import get_db_connection
+from app.utils.api_clients import get_location_client
+from app.utils.cache import SEARCH_CACHE_TTL, SEARCH_LRU_SIZE, USER_ID_LRU_SIZE, LRUCache, normalize_address
 from app.schemas.travel_schemas import (
+    AddressSchema,
     TravelPlanCreate,
     ConversationCreate,
     TravelPlanResponse,
@@ -14,34 +23,207 @@ from app.schemas.travel_schemas import (
     AccommodationResponse,
 )
 
+logger = logging.getLogger(__name__)
+
+
+# ==================== JSON 字段序列化 ====================
+
+# 空列表的 JSON 表示（常量，空字段无需调用序列化器）
+_EMPTY_JSON_ARRAY = "[]"
+
+# 住宿地址列表序列化器（pydantic 单次生成 JSON，日期字段自动转为 ISO 字符串）
+_ADDRESSES_ADAPTER = TypeAdapter(List[AddressSchema])
+
+
+def _dumps(obj: Any) -> str:
+    """序列化 JSON 字段（orjson 直接输出 UTF-8，等价于 ensure_ascii=False）"""
+    return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode()
+
+
+# 各表的 JSON 字段及其为空/损坏时的默认值
+_PLAN_JSON_FIELDS = (
+    ("interests", list),
+    ("food_preferences", list),
+    ("xiaohongshu_notes", list),
+    ("addresses", list),
+)
+_ITINERARY_JSON_FIELDS = (
+    ("itinerary", dict),
+    ("recommended_spots", list),
+    ("recommended_restaurants", list),
+)
+
+
+def _load_json_value(field: str, value: Any, default):
+    """解析单个 JSON 字段值；空值、非 JSON 类型或损坏数据回退为默认值"""
+    if not value:
+        return default()
+    if isinstance(value, (str, bytes)):
+        try:
+            return orjson.loads(value)
+        except orjson.JSONDecodeError as e:
+            logger.warning("⚠️ 解析 %s 失败：%s", field, e)
+            return default()
+    return value if isinstance(value, (list, dict)) else default()
+
+
+def _parse_json_fields(row: Dict[str, Any], fields) -> Dict[str, Any]:
+    """就地解析一行中的 JSON 字段；空值、非 JSON 类型或损坏数据回退为默认值"""
+    for field, default in fields:
+        row[field] = _load_json_value(field, row.get(field), default)
+    return row
+
+
+# 空 JSON 字段对应的原样输出片段
+_EMPTY_JSON_FRAGMENTS = {list: orjson.Fragment(b"[]"), dict: orjson.Fragment(b"{}")}
+
+
+def _raw_json_value(value: Any, default):
+    """
+    把 JSON 字段包装为 orjson.Fragment：MySQL JSON 列返回的文本本身就是合法 JSON，
+    序列化响应时原样拼接，不在 Python 中解析成 list/dict
+    """
+    return orjson.Fragment(value) if value else _EMPTY_JSON_FRAGMENTS[default]
+
+
+def _raw_json_fields(row: Dict[str, Any], fields) -> Dict[str, Any]:
+    """就地把一行中的 JSON 字段包装为 orjson.Fragment（不解析）"""
+    for field, default in fields:
+        row[field] = _raw_json_value(row.get(field), default)
+    return row
+
+
+# ==================== 关键词检索 ====================
+
+# ngram 全文解析器的分词长度（MySQL 默认 ngram_token_size=2），更短的关键词无法走全文索引
+NGRAM_TOKEN_SIZE = 2
+
+
+_FULLTEXT_CONDITION = "MATCH(name, description) AGAINST (%s IN BOOLEAN MODE)"
+_LIKE_CONDITION = "(name LIKE %s OR description LIKE %s)"
+
+
+def _keyword_condition(keyword: str):
+    """
+    构造 name/description 关键词匹配条件，返回 (sql片段, 参数列表)
+    优先使用 FULLTEXT(ngram) 索引；关键词过短时回退到 LIKE
+    """
+    # 去掉布尔模式的运算符，每个词作为短语必须出现（与 LIKE 子串匹配语义一致）
+    words = "".join(" " if ch in '+-<>()~*"@' else ch for ch in keyword).split()
+    if words and all(len(word) >= NGRAM_TOKEN_SIZE for word in words):
+        against = " ".join(f'+"{word}"' for word in words)
+        return _FULLTEXT_CONDITION, [against]
+    return _LIKE_CONDITION, [f"%{keyword}%", f"%{keyword}%"]
+
+
+def _build_search_sqls(table: str, columns: str, equality_columns) -> Dict[tuple, str]:
+    """
+    模块加载时预先生成搜索 SQL 的所有组合，调用时按条件查表，不再逐次拼接字符串
+    （不用 "(%s IS NULL OR city = %s)" 式的单条 SQL：PyMySQL 在客户端拼接参数，服务端本就
+    不会复用执行计划，而每种组合只含实际用到的条件，更容易命中 idx_city / 全文索引）
+    键：(各等值列是否有值..., 关键词条件片段或 None)
+    """
+    sqls = {}
+    for mask in range(1 << len(equality_columns)):
+        flags = tuple(bool(mask & (1 << i)) for i in range(len(equality_columns)))
+        for keyword_condition in (None, _FULLTEXT_CONDITION, _LIKE_CONDITION):
+            conditions = [f"{column} = %s" for column, flag in zip(equality_columns, flags) if flag]
+            if keyword_condition:
+                conditions.append(keyword_condition)
+            where_clause = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+            sqls[flags + (keyword_condition,)] = f"SELECT {columns} FROM {table}{where_clause} ORDER BY id DESC LIMIT 50"
+    return sqls
+
+
+def _search(cursor, sqls: Dict[tuple, str], equality_values, keyword: Optional[str]):
+    """按条件组合选择预生成的 SQL 并执行搜索"""
+    keyword_condition, params = _keyword_condition(keyword) if keyword else (None, [])
+    key = tuple(bool(value) for value in equality_values) + (keyword_condition,)
+    cursor.execute(sqls[key], [value for value in equality_values if value] + params)
+    return cursor.fetchall()
+
+
+# 列表查询只投影响应模型需要的列（不取 created_at/updated_at 等接口不返回的字段）
+_ATTRACTION_LIST_COLUMNS = "id, name, address, description, image_url, latitude, longitude, city, country"
+_RESTAURANT_LIST_COLUMNS = _ATTRACTION_LIST_COLUMNS + ", cuisine_type, price_level"
+
+_ATTRACTION_SEARCH_SQLS = _build_search_sqls("attractions", _ATTRACTION_LIST_COLUMNS, ("city",))
+_RESTAURANT_SEARCH_SQLS = _build_search_sqls("restaurants", _RESTAURANT_LIST_COLUMNS, ("city", "cuisine_type"))
+
+# 餐厅搜索结果的进程内缓存：热门目的地的相同查询短时间内直接命中内存
+# 新增餐厅由 Celery worker 写入，无法清空 API 进程的缓存，结果最多滞后 SEARCH_CACHE_TTL 秒
+# （景点搜索已由接口层的 Redis 缓存覆盖，不再在此重复缓存）
+_restaurant_search_cache = LRUCache(SEARCH_LRU_SIZE, ttl=SEARCH_CACHE_TTL)
+
+
+# ==================== 附近检索 ====================
+
+# 每纬度对应的公里数（经度方向需乘以 cos(纬度)）
+_KM_PER_DEGREE = 111.32
+
+# 先用经纬度外接矩形走 idx_location 范围扫描缩小候选，再由 MySQL 计算球面距离精确过滤并排序
+_NEAR_SQL_TEMPLATE = """
+    SELECT {columns},
+           ST_Distance_Sphere(POINT(longitude, latitude), POINT(%s, %s)) / 1000 AS distance_km
+    FROM {table}
+    WHERE latitude BETWEEN %s AND %s AND longitude BETWEEN %s AND %s
+    HAVING distance_km <= %s
+    ORDER BY distance_km ASC
+    LIMIT 50
+"""
+
+
+def _bounding_box(latitude: float, longitude: float, radius_km: float):
+    """计算以 (latitude, longitude) 为中心、半径 radius_km 的经纬度外接矩形"""
+    lat_delta = radius_km / _KM_PER_DEGREE
+    # 高纬度地区经度跨度放大，cos 下限避免极点附近除零
+    lon_delta = radius_km / (_KM_PER_DEGREE * max(math.cos(math.radians(latitude)), 0.01))
+    return latitude - lat_delta, latitude + lat_delta, longitude - lon_delta, longitude + lon_delta
+
+
+def _search_near(cursor, sql: str, latitude: float, longitude: float, radius_km: float):
+    """执行附近检索，结果按距离由近到远排列"""
+    min_lat, max_lat, min_lon, max_lon = _bounding_box(latitude, longitude, radius_km)
+    cursor.execute(sql, (longitude, latitude, min_lat, max_lat, min_lon, max_lon, radius_km))
+    return cursor.fetchall()
+
+
+_ATTRACTION_NEAR_SQL = _NEAR_SQL_TEMPLATE.format(columns=_ATTRACTION_LIST_COLUMNS, table="attractions")
+_RESTAURANT_NEAR_SQL = _NEAR_SQL_TEMPLATE.format(columns=_RESTAURANT_LIST_COLUMNS, table="restaurants")
+
 
 # ==================== 用户相关 CRUD ====================
 
+# 用户名 -> 用户ID（用户名基本不变，命中时无需访问数据库；只缓存成功结果）
+_user_id_cache = LRUCache(USER_ID_LRU_SIZE)
+
+
 def create_or_get_user(username: str = "default_user", email: Optional[str] = None) -> int:
     """创建或获取用户ID"""
+    user_id = _user_id_cache.get(username)
+    if user_id is not None:
+        return user_id
+    
     connection = get_db_connection()
     if not connection:
         return None
     
     try:
         cursor = connection.cursor()
-        # 先查询用户是否存在
-        cursor.execute("SELECT id FROM users WHERE username = %s", (username,))
-        user = cursor.fetchone()
-        
-        if user:
-            return user['id']
-        
-        # 创建新用户
+        # 一条语句完成“存在则返回、不存在则创建”：用户名已存在时通过 LAST_INSERT_ID(id) 返回已有ID
         cursor.execute(
-            "INSERT INTO users (username, email) VALUES (%s, %s)",
+            "INSERT INTO users (username, email) VALUES (%s, %s) "
+            "ON DUPLICATE KEY UPDATE id = LAST_INSERT_ID(id)",
             (username, email)
         )
         connection.commit()
-        return cursor.lastrowid
+        user_id = cursor.lastrowid
+        if user_id:
+            _user_id_cache.set(username, user_id)
+        return user_id
     except Exception as e:
         connection.rollback()
-        print(f"❌ 创建/获取用户失败：{e}")
+        logger.error("❌ 创建/获取用户失败：%s", e)
         return None
     finally:
         cursor.close()
@@ -50,122 +232,143 @@ def create_or_get_user(username: str = "default_user", email: Optional[str] = No
 
 # ==================== 旅行规划 CRUD ====================
 
+# 住宿地址并发地理编码的最大线程数
+GEOCODE_MAX_WORKERS = 8
+
+# 创建旅行规划用到的 SQL（模块加载时构造一次，每次调用只传参数）
+_UPSERT_DEFAULT_USER_SQL = (
+    "INSERT INTO users (id, username, email) VALUES (%s, %s, %s) ON DUPLICATE KEY UPDATE id=id"
+)
+_INSERT_PLAN_SQL = """
+INSERT INTO travel_plans (
+    user_id, destination, budget_min, budget_max,
+    interests, food_preferences, travelers,
+    xiaohongshu_notes, addresses, flights_count, accommodations_count
+) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+"""
+_INSERT_FLIGHT_SQL = """
+INSERT INTO flights (
+    user_id, travel_plan_id, departure_airport,
+    arrival_airport, departure_time, return_time
+) VALUES (%s, %s, %s, %s, %s, %s)
+"""
+_INSERT_ACCOMMODATION_SQL = """
+INSERT INTO accommodations (
+    user_id, travel_plan_id, city, address, check_in_date, check_out_date, latitude, longitude
+) VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+"""
+
+
+def _geocode_accommodation(location_client, city_value: str, address_value: str):
+    """对住宿地址进行地理编码，返回 (latitude, longitude)，失败时为 (None, None)"""
+    latitude = None
+    longitude = None
+    if city_value and address_value:
+        full_address = f"{city_value} {address_value}"
+        try:
+            geo = location_client.geocode(full_address, location=city_value)
+            if geo and isinstance(geo, dict):
+                latitude = geo.get("latitude")
+                longitude = geo.get("longitude")
+                if latitude is not None and longitude is not None:
+                    logger.debug("✅ 住宿地理编码成功：%s -> (%s, %s)", full_address, latitude, longitude)
+                else:
+                    logger.warning("⚠️ 住宿地理编码返回空坐标：%s", full_address)
+            else:
+                logger.warning("⚠️ 住宿地理编码失败：%s", full_address)
+        except Exception as e:
+            logger.warning("⚠️ 住宿地理编码异常：%s - %s", full_address, e)
+    return latitude, longitude
+
+
+def _geocode_accommodations(addresses: List[AddressSchema]) -> List[tuple]:
+    """住宿地址地理编码，返回与输入顺序一致的 (latitude, longitude) 列表"""
+    if not addresses:
+        return []
+    location_client = get_location_client()
+    addr_values = [(addr.city, addr.address) for addr in addresses]
+    
+    # 同一住宿可能在多段行程中重复出现：按归一化后的 (城市, 地址) 去重，每个地址只解析一次
+    addr_keys = [(normalize_address(city_value), normalize_address(address_value)) for city_value, address_value in addr_values]
+    unique_addrs = dict(zip(addr_keys, addr_values))
+    
+    # 对去重后的住宿地址并发进行地理编码，总耗时约为最慢的一次请求而非逐个累加
+    with ThreadPoolExecutor(max_workers=min(GEOCODE_MAX_WORKERS, len(unique_addrs))) as executor:
+        resolved = dict(zip(unique_addrs, executor.map(
+            lambda value: _geocode_accommodation(location_client, *value),
+            unique_addrs.values()
+        )))
+    return [resolved[key] for key in addr_keys]
+
+
 def create_travel_plan(user_id: int, plan_data: TravelPlanCreate) -> Optional[int]:
     """创建旅行规划"""
+    # 地理编码是外部 HTTP 请求（可能数秒）：在借出连接、开启事务之前完成，
+    # 避免事务期间一直持有 users 行锁，使并发创建规划的请求互相等待
+    coordinates = _geocode_accommodations(plan_data.addresses)
+    
     connection = get_db_connection()
     if not connection:
-        print("❌ 数据库连接失败：get_db_connection() 返回 None")
+        logger.error("❌ 数据库连接失败：get_db_connection() 返回 None")
         return None
     
     cursor = None
     try:
         cursor = connection.cursor()
-        print(f"📝 开始创建旅行规划，user_id={user_id}, destination={plan_data.destination}")
+        logger.debug("📝 开始创建旅行规划，user_id=%s, destination=%s", user_id, plan_data.destination)
+        
+        # 用户、规划、航班、住宿在同一个事务中写入，最后只提交一次
+        connection.begin()
         
-        # 验证用户是否存在
-        cursor.execute("SELECT id FROM users WHERE id = %s", (user_id,))
-        user = cursor.fetchone()
-        if not user:
-            # 如果用户不存在，创建默认用户
-            print(f"⚠️ 用户 {user_id} 不存在，尝试创建默认用户")
-            cursor.execute("INSERT INTO users (id, username, email) VALUES (%s, %s, %s) ON DUPLICATE KEY UPDATE id=id", 
-                         (user_id, f"user_{user_id}", f"user_{user_id}@example.com"))
-            connection.commit()
-            print(f"✅ 已创建默认用户 {user_id}")
+        # 确保用户存在：不存在时创建默认用户，已存在时为空操作（省去先查询的往返）
+        cursor.execute(_UPSERT_DEFAULT_USER_SQL, (user_id, f"user_{user_id}", f"user_{user_id}@example.com"))
         
         # 处理目的地（取第一个）
         destination = plan_data.destination[0] if plan_data.destination else ""
         
-        # 插入旅行规划
-        insert_sql = """
-        INSERT INTO travel_plans (
-            user_id, destination, budget_min, budget_max,
-            interests, food_preferences, travelers,
-            xiaohongshu_notes, addresses
-        ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
-        """
-        
-        # 准备插入值，确保类型正确
+        # 住宿地址列表由 pydantic 一次序列化为 JSON（日期字段输出为 ISO 字符串）
         try:
-            addresses_json = json.dumps(
-                [addr.model_dump() if hasattr(addr, 'model_dump') else addr.dict() for addr in plan_data.addresses], 
-                ensure_ascii=False
-            ) if plan_data.addresses else json.dumps([], ensure_ascii=False)
+            addresses_json = (
+                _ADDRESSES_ADAPTER.dump_json(plan_data.addresses).decode()
+                if plan_data.addresses else _EMPTY_JSON_ARRAY
+            )
         except Exception as e:
-            print(f"⚠️ 序列化 addresses 失败：{e}")
-            addresses_json = json.dumps([], ensure_ascii=False)
+            logger.warning("⚠️ 序列化 addresses 失败：%s", e)
+            addresses_json = _EMPTY_JSON_ARRAY
         
+        # plan_data 已由 pydantic v2 校验，字段类型确定，直接读取属性即可，无需再逐个转换或 model_dump
+        budget = plan_data.budget
         values = (
-            int(user_id),  # 确保是整数
-            str(destination) if destination else "",  # 确保是字符串
-            float(plan_data.budget.min),  # 确保是浮点数
-            float(plan_data.budget.max),  # 确保是浮点数
-            json.dumps(plan_data.interests or [], ensure_ascii=False),
-            json.dumps(plan_data.food_preferences or [], ensure_ascii=False),
-            str(plan_data.travelers) if plan_data.travelers else "",
-            json.dumps(plan_data.xiaohongshu_notes or [], ensure_ascii=False),
-            addresses_json
+            user_id,
+            destination,
+            budget.min,
+            budget.max,
+            _dumps(plan_data.interests) if plan_data.interests else _EMPTY_JSON_ARRAY,
+            _dumps(plan_data.food_preferences) if plan_data.food_preferences else _EMPTY_JSON_ARRAY,
+            plan_data.travelers,
+            _dumps(plan_data.xiaohongshu_notes) if plan_data.xiaohongshu_notes else _EMPTY_JSON_ARRAY,
+            addresses_json,
+            # 子表行数随规划一起写入，读取时可跳过没有数据的子表查询
+            len(plan_data.flights),
+            len(plan_data.addresses)
         )
         
-        print(f"📋 准备插入的值：user_id={values[0]}, destination={values[1]}, budget={values[2]}-{values[3]}")
+        logger.debug("📋 准备插入的值：user_id=%s, destination=%s, budget=%s-%s", values[0], values[1], values[2], values[3])
         
         # 执行插入
-        affected_rows = cursor.execute(insert_sql, values)
-        print(f"📊 INSERT 执行完成，affected_rows={affected_rows}")
+        affected_rows = cursor.execute(_INSERT_PLAN_SQL, values)
+        logger.debug("📊 INSERT 执行完成，affected_rows=%s", affected_rows)
         
-        # 获取插入的 ID（多种方式尝试）
+        # 自增主键由 cursor.lastrowid 直接返回（INSERT 成功时可靠，无需额外查询）
         plan_id = cursor.lastrowid
-        print(f"📊 cursor.lastrowid={plan_id}")
+        if affected_rows != 1 or not plan_id:
+            raise ValueError(f"插入旅行规划失败：affected_rows={affected_rows}, lastrowid={plan_id}。请检查数据库表结构和外键约束。")
         
-        # 如果 lastrowid 无效，尝试使用 LAST_INSERT_ID()
-        if not plan_id or plan_id == 0:
-            cursor.execute("SELECT LAST_INSERT_ID() as id")
-            result = cursor.fetchone()
-            if result:
-                plan_id = result.get('id') if isinstance(result, dict) else (result[0] if isinstance(result, (list, tuple)) else None)
-                print(f"📊 使用 LAST_INSERT_ID() 获取 plan_id={plan_id}")
+        logger.debug("✅ 成功创建旅行规划，plan_id=%s", plan_id)
         
-        # 如果仍然没有 plan_id，尝试通过查询获取
-        if not plan_id or plan_id == 0:
-            cursor.execute("""
-                SELECT id FROM travel_plans 
-                WHERE user_id = %s AND destination = %s 
-                ORDER BY created_at DESC LIMIT 1
-            """, (user_id, destination))
-            result = cursor.fetchone()
-            if result:
-                plan_id = result.get('id') if isinstance(result, dict) else (result[0] if isinstance(result, (list, tuple)) else None)
-                print(f"📊 通过查询获取 plan_id={plan_id}")
-        
-        # 如果仍然没有 plan_id，说明插入失败
-        if not plan_id or plan_id == 0:
-            # 检查表是否存在
-            cursor.execute("SHOW TABLES LIKE 'travel_plans'")
-            table_exists = cursor.fetchone()
-            if not table_exists:
-                raise ValueError("数据库表 travel_plans 不存在，请先运行 python3 -m app.models.travel_models 创建表")
-            
-            # 检查是否有插入错误
-            cursor.execute("SHOW WARNINGS")
-            warnings = cursor.fetchall()
-            if warnings:
-                warning_msg = "; ".join([str(w) for w in warnings])
-                raise ValueError(f"插入旅行规划时出现警告：{warning_msg}")
-            
-            raise ValueError(f"插入旅行规划失败：无法获取 plan_id。lastrowid={cursor.lastrowid}, affected_rows={affected_rows}。请检查数据库表结构和外键约束。")
-        
-        print(f"✅ 成功创建旅行规划，plan_id={plan_id}")
-        
-        # 插入航班信息
-        for flight in plan_data.flights:
-            insert_flight_sql = """
-            INSERT INTO flights (
-                user_id, travel_plan_id, departure_airport,
-                arrival_airport, departure_time, return_time
-            ) VALUES (%s, %s, %s, %s, %s, %s)
-            """
-            cursor.execute(
-                insert_flight_sql,
+        # 插入航班信息（executemany 合并为一次多行 INSERT）
+        if plan_data.flights:
+            flight_rows = [
                 (
                     user_id,
                     plan_id,
@@ -174,73 +377,30 @@ def create_travel_plan(user_id: int, plan_data: TravelPlanCreate) -> Optional[in
                     flight.departure_time,
                     flight.return_time
                 )
-            )
+                for flight in plan_data.flights
+            ]
+            cursor.executemany(_INSERT_FLIGHT_SQL, flight_rows)
         
-        # 插入居住地址信息（并进行地理编码保存经纬度）
-        from app.utils.api_clients import LocationAPIClient
-        location_client = LocationAPIClient()
+        # 住宿行与航班一样通过 executemany 合并为一次多行 INSERT
+        addr_rows = [
+            (user_id, plan_id, addr.city, addr.address, addr.check_in_date, addr.check_out_date, latitude, longitude)
+            for addr, (latitude, longitude) in zip(plan_data.addresses, coordinates)
+        ]
         
-        for addr in plan_data.addresses:
-            # 处理 city 字段：可能是字符串或对象
-            city_value = addr.city
-            if isinstance(city_value, dict):
-                city_value = city_value.get('name', '')
-            elif not isinstance(city_value, str):
-                city_value = str(city_value) if city_value else ''
-            
-            address_value = addr.address or ''
-            
-            # 对住宿地址进行地理编码，获取经纬度
-            latitude = None
-            longitude = None
-            if city_value and address_value:
-                try:
-                    full_address = f"{city_value} {address_value}"
-                    geo = location_client.geocode(full_address, location=city_value)
-                    if geo and isinstance(geo, dict):
-                        latitude = geo.get("latitude")
-                        longitude = geo.get("longitude")
-                        if latitude is not None and longitude is not None:
-                            print(f"✅ 住宿地理编码成功：{full_address} -> ({latitude}, {longitude})")
-                        else:
-                            print(f"⚠️ 住宿地理编码返回空坐标：{full_address}")
-                    else:
-                        print(f"⚠️ 住宿地理编码失败：{full_address}")
-                except Exception as e:
-                    print(f"⚠️ 住宿地理编码异常：{full_address} - {str(e)}")
-            
-            insert_addr_sql = """
-            INSERT INTO accommodations (
-                user_id, travel_plan_id, city, address, check_in_date, check_out_date, latitude, longitude
-            ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-            """
-            cursor.execute(
-                insert_addr_sql,
-                (
-                    user_id, 
-                    plan_id, 
-                    city_value, 
-                    address_value,
-                    addr.check_in_date,
-                    addr.check_out_date,
-                    latitude,
-                    longitude
-                )
-            )
+        if addr_rows:
+            cursor.executemany(_INSERT_ACCOMMODATION_SQL, addr_rows)
         
         connection.commit()
-        print(f"✅ 旅行规划创建成功并已提交，plan_id={plan_id}")
+        logger.debug("✅ 旅行规划创建成功并已提交，plan_id=%s", plan_id)
         return plan_id
     except Exception as e:
         if connection:
             try:
                 connection.rollback()
-                print("🔄 已回滚事务")
+                logger.debug("🔄 已回滚事务")
             except Exception as rollback_error:
-                print(f"⚠️ 回滚失败：{rollback_error}")
-        import traceback
-        error_msg = f"❌ 创建旅行规划失败：{e}\n{traceback.format_exc()}"
-        print(error_msg)
+                logger.warning("⚠️ 回滚失败：%s", rollback_error)
+        logger.exception("❌ 创建旅行规划失败：%s", e)
         raise  # 重新抛出异常，让上层处理
     finally:
         if cursor:
@@ -263,109 +423,124 @@ def get_travel_plan(plan_id: int) -> Optional[Dict[str, Any]]:
     
     try:
         cursor = connection.cursor()
-        cursor.execute("SELECT * FROM travel_plans WHERE id = %s", (plan_id,))
-        plan = cursor.fetchone()
-        
-        if not plan:
-            return None
-        
-        # 确保 plan 是字典类型
-        if not isinstance(plan, dict):
-            print(f"⚠️ 警告：get_travel_plan 返回了非字典类型数据：{type(plan)}")
-            return None
-        
-        # 创建新的字典，避免修改原始数据
-        plan_dict = dict(plan)
-        
-        # 解析JSON字段，添加错误处理
-        try:
-            if plan_dict.get('interests'):
-                if isinstance(plan_dict['interests'], str):
-                    plan_dict['interests'] = json.loads(plan_dict['interests'])
-                elif not isinstance(plan_dict['interests'], list):
-                    plan_dict['interests'] = []
-            else:
-                plan_dict['interests'] = []
-        except Exception as e:
-            print(f"⚠️ 解析 interests 失败：{e}")
-            plan_dict['interests'] = []
-        
-        try:
-            if plan_dict.get('food_preferences'):
-                if isinstance(plan_dict['food_preferences'], str):
-                    plan_dict['food_preferences'] = json.loads(plan_dict['food_preferences'])
-                elif not isinstance(plan_dict['food_preferences'], list):
-                    plan_dict['food_preferences'] = []
-            else:
-                plan_dict['food_preferences'] = []
-        except Exception as e:
-            print(f"⚠️ 解析 food_preferences 失败：{e}")
-            plan_dict['food_preferences'] = []
-        
-        try:
-            if plan_dict.get('xiaohongshu_notes'):
-                if isinstance(plan_dict['xiaohongshu_notes'], str):
-                    plan_dict['xiaohongshu_notes'] = json.loads(plan_dict['xiaohongshu_notes'])
-                elif not isinstance(plan_dict['xiaohongshu_notes'], list):
-                    plan_dict['xiaohongshu_notes'] = []
-            else:
-                plan_dict['xiaohongshu_notes'] = []
-        except Exception as e:
-            print(f"⚠️ 解析 xiaohongshu_notes 失败：{e}")
-            plan_dict['xiaohongshu_notes'] = []
-        
-        try:
-            if plan_dict.get('addresses'):
-                if isinstance(plan_dict['addresses'], str):
-                    plan_dict['addresses'] = json.loads(plan_dict['addresses'])
-                elif not isinstance(plan_dict['addresses'], list):
-                    plan_dict['addresses'] = []
-            else:
-                plan_dict['addresses'] = []
-        except Exception as e:
-            print(f"⚠️ 解析 addresses 失败：{e}")
-            plan_dict['addresses'] = []
-        
-        return plan_dict
+        # 连接池固定使用 DictCursor，行本身就是新建的字典，直接就地解析JSON字段
+        return _fetch_plan(cursor, plan_id)
     except Exception as e:
-        print(f"❌ 获取旅行规划失败：{e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("❌ 获取旅行规划失败：%s", e)
         return None
     finally:
         cursor.close()
         connection.close()
 
 
-def get_user_travel_plans(user_id: int) -> List[Dict[str, Any]]:
-    """获取用户的所有旅行规划"""
+# 路线生成只需要的列（不读取 addresses 等大字段）
+_GENERATION_COLUMNS = (
+    "id, destination, budget_min, budget_max, travelers, "
+    "interests, food_preferences, xiaohongshu_notes"
+)
+_GENERATION_JSON_FIELDS = _PLAN_JSON_FIELDS[:3]
+
+
+def get_plan_generation_context(plan_id: int) -> Optional[Dict[str, Any]]:
+    """获取路线生成所需的旅行规划字段（只投影需要的列，也用于判断规划是否存在）"""
     connection = get_db_connection()
     if not connection:
-        return []
+        return None
     
     try:
         cursor = connection.cursor()
-        cursor.execute("SELECT * FROM travel_plans WHERE user_id = %s ORDER BY created_at DESC", (user_id,))
-        plans = cursor.fetchall()
-        
-        # 解析JSON字段
-        for plan in plans:
-            plan['interests'] = json.loads(plan['interests']) if plan['interests'] else []
-            plan['food_preferences'] = json.loads(plan['food_preferences']) if plan['food_preferences'] else []
-            plan['xiaohongshu_notes'] = json.loads(plan['xiaohongshu_notes']) if plan['xiaohongshu_notes'] else []
-            plan['addresses'] = json.loads(plan['addresses']) if plan['addresses'] else []
+        cursor.execute(f"SELECT {_GENERATION_COLUMNS} FROM travel_plans WHERE id = %s", (plan_id,))
+        plan = cursor.fetchone()
+        if not plan:
+            return None
         
-        return plans
+        return _parse_json_fields(plan, _GENERATION_JSON_FIELDS)
     except Exception as e:
-        print(f"❌ 获取用户旅行规划失败：{e}")
-        return []
+        logger.error("❌ 获取旅行规划失败：%s", e)
+        return None
     finally:
         cursor.close()
         connection.close()
 
 
+@dataclass(slots=True)
+class TravelPlanRow:
+    """规划列表的一行（字段顺序即 SELECT 列顺序，与 TravelPlanResponse 字段一一对应）"""
+    id: int
+    user_id: int
+    destination: str
+    budget_min: Any
+    budget_max: Any
+    interests: Any
+    food_preferences: Any
+    travelers: Optional[str]
+    xiaohongshu_notes: Any
+    addresses: Any
+    created_at: datetime
+    updated_at: datetime
+
+
+# 规划列表投影的列，以及 JSON 字段在行元组中的位置
+_PLAN_ROW_FIELDS = tuple(field.name for field in dataclass_fields(TravelPlanRow))
+_PLAN_LIST_COLUMNS = ", ".join(_PLAN_ROW_FIELDS)
+_PLAN_ROW_JSON_FIELDS = tuple(
+    (field, _PLAN_ROW_FIELDS.index(field), default) for field, default in _PLAN_JSON_FIELDS
+)
+
+
+def _build_plan_row(values: tuple, raw_json: bool) -> TravelPlanRow:
+    """按位置把元组游标返回的一行构造成 TravelPlanRow，并转换 JSON 字段"""
+    values = list(values)
+    for field, index, default in _PLAN_ROW_JSON_FIELDS:
+        values[index] = _raw_json_value(values[index], default) if raw_json else _load_json_value(field, values[index], default)
+    return TravelPlanRow(*values)
+
+
+def iter_user_travel_plans(user_id: int, raw_json: bool = False) -> Iterator[TravelPlanRow]:
+    """
+    逐行获取用户的所有旅行规划（生成器）
+    使用服务端元组游标，逐行读取并按位置构造 __slots__ 数据类（不为每行分配带列名键的 dict），
+    内存占用与规划数量无关；
+    raw_json=True 时 JSON 字段不解析，以 orjson.Fragment 原样返回（仅用于直接序列化为响应）；
+    游标和连接在生成器结束或关闭时释放
+    """
+    connection = get_db_connection()
+    if not connection:
+        return
+    
+    cursor = None
+    try:
+        cursor = connection.cursor(pymysql.cursors.SSCursor)
+        cursor.execute(
+            f"SELECT {_PLAN_LIST_COLUMNS} FROM travel_plans WHERE user_id = %s ORDER BY created_at DESC",
+            (user_id,)
+        )
+        for values in cursor:
+            yield _build_plan_row(values, raw_json)
+    finally:
+        if cursor:
+            cursor.close()
+        connection.close()
+
+
+def get_user_travel_plans(user_id: int, raw_json: bool = False) -> List[TravelPlanRow]:
+    """获取用户的所有旅行规划"""
+    try:
+        return list(iter_user_travel_plans(user_id, raw_json))
+    except Exception as e:
+        logger.error("❌ 获取用户旅行规划失败：%s", e)
+        return []
+
+
 # ==================== 对话记录 CRUD ====================
 
+_CONVERSATION_COLUMNS = "id, user_id, travel_plan_id, message, sender, timestamp"
+_INSERT_CONVERSATION_SQL = """
+INSERT INTO conversation_logs (user_id, travel_plan_id, message, sender)
+VALUES (%s, %s, %s, %s)
+"""
+
+
 def create_conversation(user_id: int, conversation_data: ConversationCreate) -> Optional[int]:
     """创建对话记录"""
     connection = get_db_connection()
@@ -374,19 +549,15 @@ def create_conversation(user_id: int, conversation_data: ConversationCreate) ->
     
     try:
         cursor = connection.cursor()
-        insert_sql = """
-        INSERT INTO conversation_logs (user_id, travel_plan_id, message, sender)
-        VALUES (%s, %s, %s, %s)
-        """
         cursor.execute(
-            insert_sql,
+            _INSERT_CONVERSATION_SQL,
             (user_id, conversation_data.travel_plan_id, conversation_data.message, conversation_data.sender)
         )
         connection.commit()
         return cursor.lastrowid
     except Exception as e:
         connection.rollback()
-        print(f"❌ 创建对话记录失败：{e}")
+        logger.error("❌ 创建对话记录失败：%s", e)
         return None
     finally:
         cursor.close()
@@ -394,28 +565,44 @@ def create_conversation(user_id: int, conversation_data: ConversationCreate) ->
 
 
 def get_conversations_by_plan(travel_plan_id: int) -> List[Dict[str, Any]]:
-    """获取指定旅行规划的所有对话记录"""
+    """获取指定旅行规划的所有对话记录（单个规划的对话量有限，一次取回后立即归还连接）"""
     connection = get_db_connection()
     if not connection:
         return []
     
+    cursor = None
     try:
         cursor = connection.cursor()
         cursor.execute(
-            "SELECT * FROM conversation_logs WHERE travel_plan_id = %s ORDER BY timestamp ASC",
+            f"SELECT {_CONVERSATION_COLUMNS} FROM conversation_logs WHERE travel_plan_id = %s ORDER BY timestamp ASC",
             (travel_plan_id,)
         )
         return cursor.fetchall()
     except Exception as e:
-        print(f"❌ 获取对话记录失败：{e}")
+        logger.error("❌ 获取对话记录失败：%s", e)
         return []
     finally:
-        cursor.close()
+        if cursor:
+            cursor.close()
         connection.close()
 
 
 # ==================== 路线规划详情 CRUD ====================
 
+_UPSERT_ITINERARY_DETAIL_SQL = """
+INSERT INTO itinerary_details (
+    travel_plan_id, day_number, itinerary,
+    recommended_spots, recommended_restaurants
+) VALUES (%s, %s, %s, %s, %s)
+ON DUPLICATE KEY UPDATE
+    itinerary = VALUES(itinerary),
+    recommended_spots = VALUES(recommended_spots),
+    recommended_restaurants = VALUES(recommended_restaurants),
+    updated_at = CURRENT_TIMESTAMP
+"""
+_INCREMENT_ITINERARIES_COUNT_SQL = "UPDATE travel_plans SET itineraries_count = itineraries_count + 1 WHERE id = %s"
+
+
 def create_itinerary_detail(
     travel_plan_id: int,
     day_number: int,
@@ -430,69 +617,126 @@ def create_itinerary_detail(
     
     try:
         cursor = connection.cursor()
-        insert_sql = """
-        INSERT INTO itinerary_details (
-            travel_plan_id, day_number, itinerary,
-            recommended_spots, recommended_restaurants
-        ) VALUES (%s, %s, %s, %s, %s)
-        ON DUPLICATE KEY UPDATE
-            itinerary = VALUES(itinerary),
-            recommended_spots = VALUES(recommended_spots),
-            recommended_restaurants = VALUES(recommended_restaurants),
-            updated_at = CURRENT_TIMESTAMP
-        """
-        cursor.execute(
-            insert_sql,
+        affected_rows = cursor.execute(
+            _UPSERT_ITINERARY_DETAIL_SQL,
             (
                 travel_plan_id,
                 day_number,
-                json.dumps(itinerary, ensure_ascii=False) if itinerary else None,
-                json.dumps(recommended_spots, ensure_ascii=False) if recommended_spots else None,
-                json.dumps(recommended_restaurants, ensure_ascii=False) if recommended_restaurants else None
+                _dumps(itinerary) if itinerary else None,
+                _dumps(recommended_spots) if recommended_spots else None,
+                _dumps(recommended_restaurants) if recommended_restaurants else None
             )
         )
+        # ON DUPLICATE KEY UPDATE：新插入时 affected_rows 为 1（更新已有行为 2），仅新增的一天计入规划的路线天数
+        if affected_rows == 1:
+            cursor.execute(_INCREMENT_ITINERARIES_COUNT_SQL, (travel_plan_id,))
         connection.commit()
         return cursor.lastrowid
     except Exception as e:
         connection.rollback()
-        print(f"❌ 创建路线规划详情失败：{e}")
+        logger.error("❌ 创建路线规划详情失败：%s", e)
         return None
     finally:
         cursor.close()
         connection.close()
 
 
-def get_itinerary_details(travel_plan_id: int) -> List[Dict[str, Any]]:
-    """获取旅行规划的所有路线详情"""
+_SELECT_ITINERARY_DAYS_SQL = "SELECT day_number FROM itinerary_details WHERE travel_plan_id = %s"
+_ADD_ITINERARIES_COUNT_SQL = "UPDATE travel_plans SET itineraries_count = itineraries_count + %s WHERE id = %s"
+
+
+def create_itinerary_details_bulk(travel_plan_id: int, details: List[Dict[str, Any]]) -> bool:
+    """
+    批量写入多天的路线详情（一个事务、一次多行 INSERT）
+    details 每项包含 day_number、itinerary、recommended_spots、recommended_restaurants
+    """
+    if not details:
+        return True
+    connection = get_db_connection()
+    if not connection:
+        return False
+    
+    cursor = None
+    try:
+        cursor = connection.cursor()
+        connection.begin()
+        # 多行 upsert 的 affected_rows 无法区分新增与更新，先查出已有的天数，仅新增的天计入规划的路线天数
+        cursor.execute(_SELECT_ITINERARY_DAYS_SQL, (travel_plan_id,))
+        existing_days = {row["day_number"] for row in cursor.fetchall()}
+        rows = [
+            (
+                travel_plan_id,
+                detail["day_number"],
+                _dumps(detail.get("itinerary")) if detail.get("itinerary") else None,
+                _dumps(detail.get("recommended_spots")) if detail.get("recommended_spots") else None,
+                _dumps(detail.get("recommended_restaurants")) if detail.get("recommended_restaurants") else None,
+            )
+            for detail in details
+        ]
+        cursor.executemany(_UPSERT_ITINERARY_DETAIL_SQL, rows)
+        new_days = len({detail["day_number"] for detail in details} - existing_days)
+        if new_days:
+            cursor.execute(_ADD_ITINERARIES_COUNT_SQL, (new_days, travel_plan_id))
+        connection.commit()
+        return True
+    except Exception as e:
+        connection.rollback()
+        logger.error("❌ 批量创建路线规划详情失败：%s", e)
+        return False
+    finally:
+        if cursor:
+            cursor.close()
+        connection.close()
+
+
+def get_itinerary_details(travel_plan_id: int, raw_json: bool = False) -> List[Dict[str, Any]]:
+    """
+    获取旅行规划的所有路线详情
+    raw_json=True 时 JSON 字段不解析，以 orjson.Fragment 原样返回（仅用于序列化后交给 pydantic 按 JSON 校验）
+    """
     connection = get_db_connection()
     if not connection:
         return []
     
+    cursor = None
     try:
+        # 先按主键读路线天数：规划不存在或还没有路线详情时不再打开服务端游标
         cursor = connection.cursor()
+        counts = _fetch_child_counts(cursor, travel_plan_id)
+        if not counts or counts["itineraries_count"] == 0:
+            return []
+        cursor.close()
+        
+        # 服务端游标：边读边解析JSON字段，避免整个结果集在客户端缓冲一份原始数据
+        cursor = connection.cursor(pymysql.cursors.SSDictCursor)
         cursor.execute(
             "SELECT * FROM itinerary_details WHERE travel_plan_id = %s ORDER BY day_number ASC",
             (travel_plan_id,)
         )
-        details = cursor.fetchall()
-        
-        # 解析JSON字段
-        for detail in details:
-            detail['itinerary'] = json.loads(detail['itinerary']) if detail['itinerary'] else {}
-            detail['recommended_spots'] = json.loads(detail['recommended_spots']) if detail['recommended_spots'] else []
-            detail['recommended_restaurants'] = json.loads(detail['recommended_restaurants']) if detail['recommended_restaurants'] else []
+        # 解析（或原样包装）JSON字段
+        convert = _raw_json_fields if raw_json else _parse_json_fields
+        details = [convert(detail, _ITINERARY_JSON_FIELDS) for detail in cursor]
         
         return details
     except Exception as e:
-        print(f"❌ 获取路线规划详情失败：{e}")
+        logger.error("❌ 获取路线规划详情失败：%s", e)
         return []
     finally:
-        cursor.close()
+        if cursor:
+            cursor.close()
         connection.close()
 
 
 # ==================== 景点 CRUD ====================
 
+_INSERT_ATTRACTION_SQL = """
+INSERT INTO attractions (
+    name, address, description, image_url,
+    latitude, longitude, city, country
+) VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+"""
+
+
 def create_attraction(
     name: str,
     address: Optional[str] = None,
@@ -510,21 +754,15 @@ def create_attraction(
     
     try:
         cursor = connection.cursor()
-        insert_sql = """
-        INSERT INTO attractions (
-            name, address, description, image_url,
-            latitude, longitude, city, country
-        ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-        """
         cursor.execute(
-            insert_sql,
+            _INSERT_ATTRACTION_SQL,
             (name, address, description, image_url, latitude, longitude, city, country)
         )
         connection.commit()
         return cursor.lastrowid
     except Exception as e:
         connection.rollback()
-        print(f"❌ 创建景点失败：{e}")
+        logger.error("❌ 创建景点失败：%s", e)
         return None
     finally:
         cursor.close()
@@ -539,22 +777,27 @@ def search_attractions(city: Optional[str] = None, keyword: Optional[str] = None
     
     try:
         cursor = connection.cursor()
-        if city:
-            cursor.execute(
-                "SELECT * FROM attractions WHERE city = %s ORDER BY id DESC LIMIT 50",
-                (city,)
-            )
-        elif keyword:
-            cursor.execute(
-                "SELECT * FROM attractions WHERE name LIKE %s OR description LIKE %s ORDER BY id DESC LIMIT 50",
-                (f"%{keyword}%", f"%{keyword}%")
-            )
-        else:
-            cursor.execute("SELECT * FROM attractions ORDER BY id DESC LIMIT 50")
-        
-        return cursor.fetchall()
+        # 城市走 idx_city 等值匹配，关键词走全文索引；两者同时给出时取交集
+        return _search(cursor, _ATTRACTION_SEARCH_SQLS, (city,), keyword)
+    except Exception as e:
+        logger.error("❌ 搜索景点失败：%s", e)
+        return []
+    finally:
+        cursor.close()
+        connection.close()
+
+
+def search_attractions_near(latitude: float, longitude: float, radius_km: float = 5.0) -> List[Dict[str, Any]]:
+    """搜索指定坐标附近的景点（按距离排序，结果带 distance_km）"""
+    connection = get_db_connection()
+    if not connection:
+        return []
+    
+    try:
+        cursor = connection.cursor()
+        return _search_near(cursor, _ATTRACTION_NEAR_SQL, latitude, longitude, radius_km)
     except Exception as e:
-        print(f"❌ 搜索景点失败：{e}")
+        logger.error("❌ 搜索附近景点失败：%s", e)
         return []
     finally:
         cursor.close()
@@ -563,6 +806,15 @@ def search_attractions(city: Optional[str] = None, keyword: Optional[str] = None
 
 # ==================== 餐厅 CRUD ====================
 
+_INSERT_RESTAURANT_SQL = """
+INSERT INTO restaurants (
+    name, address, description, image_url,
+    latitude, longitude, city, country,
+    cuisine_type, price_level
+) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+"""
+
+
 def create_restaurant(
     name: str,
     address: Optional[str] = None,
@@ -582,22 +834,15 @@ def create_restaurant(
     
     try:
         cursor = connection.cursor()
-        insert_sql = """
-        INSERT INTO restaurants (
-            name, address, description, image_url,
-            latitude, longitude, city, country,
-            cuisine_type, price_level
-        ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-        """
         cursor.execute(
-            insert_sql,
+            _INSERT_RESTAURANT_SQL,
             (name, address, description, image_url, latitude, longitude, city, country, cuisine_type, price_level)
         )
         connection.commit()
         return cursor.lastrowid
     except Exception as e:
         connection.rollback()
-        print(f"❌ 创建餐厅失败：{e}")
+        logger.error("❌ 创建餐厅失败：%s", e)
         return None
     finally:
         cursor.close()
@@ -610,111 +855,160 @@ def search_restaurants(
     keyword: Optional[str] = None
 ) -> List[Dict[str, Any]]:
     """搜索餐厅"""
+    cache_key = (city, cuisine_type, keyword)
+    cached = _restaurant_search_cache.get(cache_key)
+    if cached is not None:
+        return cached
+    
     connection = get_db_connection()
     if not connection:
         return []
     
     try:
         cursor = connection.cursor()
-        conditions = []
-        params = []
-        
-        if city:
-            conditions.append("city = %s")
-            params.append(city)
-        if cuisine_type:
-            conditions.append("cuisine_type = %s")
-            params.append(cuisine_type)
-        if keyword:
-            conditions.append("(name LIKE %s OR description LIKE %s)")
-            params.extend([f"%{keyword}%", f"%{keyword}%"])
-        
-        where_clause = " AND ".join(conditions) if conditions else "1=1"
-        sql = f"SELECT * FROM restaurants WHERE {where_clause} ORDER BY id DESC LIMIT 50"
-        
-        cursor.execute(sql, params)
-        return cursor.fetchall()
+        results = _search(cursor, _RESTAURANT_SEARCH_SQLS, (city, cuisine_type), keyword)
+        if results:
+            _restaurant_search_cache.set(cache_key, results)
+        return results
     except Exception as e:
-        print(f"❌ 搜索餐厅失败：{e}")
+        logger.error("❌ 搜索餐厅失败：%s", e)
         return []
     finally:
         cursor.close()
         connection.close()
 
 
-# ==================== 航班与住宿查询 ====================
-
-def get_flights_by_plan(travel_plan_id: int) -> List[Dict[str, Any]]:
-    """根据旅行规划ID获取航班信息"""
+def search_restaurants_near(latitude: float, longitude: float, radius_km: float = 5.0) -> List[Dict[str, Any]]:
+    """搜索指定坐标附近的餐厅（按距离排序，结果带 distance_km）"""
     connection = get_db_connection()
     if not connection:
         return []
-
+    
     try:
         cursor = connection.cursor()
-        cursor.execute(
-            "SELECT * FROM flights WHERE travel_plan_id = %s ORDER BY id ASC",
-            (travel_plan_id,),
-        )
-        results = cursor.fetchall()
-        # 确保返回的是字典列表，并处理日期时间格式
-        flights = []
-        for row in results:
-            if isinstance(row, dict):
-                # 确保日期时间字段是字符串格式（如果数据库返回的是 datetime 对象）
-                flight = dict(row)
-                if flight.get("departure_time") and hasattr(flight["departure_time"], "isoformat"):
-                    flight["departure_time"] = flight["departure_time"].isoformat()
-                if flight.get("return_time") and hasattr(flight["return_time"], "isoformat"):
-                    flight["return_time"] = flight["return_time"].isoformat()
-                flights.append(flight)
-            elif isinstance(row, (list, tuple)):
-                # 如果返回的是元组/列表，转换为字典（这种情况不应该发生，但作为容错处理）
-                print(f"⚠️ 警告：flights 返回了非字典类型数据：{type(row)}")
-        return flights
+        return _search_near(cursor, _RESTAURANT_NEAR_SQL, latitude, longitude, radius_km)
     except Exception as e:
-        print(f"❌ 获取航班信息失败：{e}")
-        import traceback
-        traceback.print_exc()
+        logger.error("❌ 搜索附近餐厅失败：%s", e)
         return []
     finally:
         cursor.close()
         connection.close()
 
 
-def get_accommodations_by_plan(travel_plan_id: int) -> List[Dict[str, Any]]:
-    """根据旅行规划ID获取住宿信息"""
+# ==================== 航班与住宿查询 ====================
+
+# 日期/时间列由 MySQL 直接格式化为 ISO 字符串，省去逐行 isoformat 转换（% 需转义为 %%）
+_ISO_DATETIME_FORMAT = "'%%Y-%%m-%%dT%%H:%%i:%%s'"
+_ISO_DATE_FORMAT = "'%%Y-%%m-%%d'"
+
+_FETCH_FLIGHTS_SQL = f"""
+    SELECT id, user_id, travel_plan_id, departure_airport, arrival_airport,
+           DATE_FORMAT(departure_time, {_ISO_DATETIME_FORMAT}) AS departure_time,
+           DATE_FORMAT(return_time, {_ISO_DATETIME_FORMAT}) AS return_time,
+           latitude, longitude, created_at, updated_at
+    FROM flights WHERE travel_plan_id = %s ORDER BY id ASC
+"""
+
+_FETCH_ACCOMMODATIONS_SQL = f"""
+    SELECT id, user_id, travel_plan_id, city, address,
+           DATE_FORMAT(check_in_date, {_ISO_DATE_FORMAT}) AS check_in_date,
+           DATE_FORMAT(check_out_date, {_ISO_DATE_FORMAT}) AS check_out_date,
+           latitude, longitude, created_at, updated_at
+    FROM accommodations WHERE travel_plan_id = %s ORDER BY id ASC
+"""
+
+
+_FETCH_CHILD_COUNTS_SQL = """
+    SELECT flights_count, accommodations_count, itineraries_count
+    FROM travel_plans WHERE id = %s
+"""
+
+
+def _fetch_child_counts(cursor, travel_plan_id: int) -> Optional[Dict[str, int]]:
+    """只读规划的子表行数字段（主键查询），规划不存在时返回 None"""
+    cursor.execute(_FETCH_CHILD_COUNTS_SQL, (travel_plan_id,))
+    return cursor.fetchone()
+
+
+def _fetch_plan(cursor, travel_plan_id: int) -> Optional[Dict[str, Any]]:
+    cursor.execute("SELECT * FROM travel_plans WHERE id = %s", (travel_plan_id,))
+    plan = cursor.fetchone()
+    return _parse_json_fields(plan, _PLAN_JSON_FIELDS) if plan else None
+
+
+def _fetch_flights(cursor, travel_plan_id: int) -> List[Dict[str, Any]]:
+    cursor.execute(_FETCH_FLIGHTS_SQL, (travel_plan_id,))
+    return cursor.fetchall()
+
+
+def _fetch_accommodations(cursor, travel_plan_id: int) -> List[Dict[str, Any]]:
+    cursor.execute(_FETCH_ACCOMMODATIONS_SQL, (travel_plan_id,))
+    return cursor.fetchall()
+
+
+def _fetch_itinerary_details(cursor, travel_plan_id: int) -> List[Dict[str, Any]]:
+    cursor.execute(
+        "SELECT * FROM itinerary_details WHERE travel_plan_id = %s ORDER BY day_number ASC",
+        (travel_plan_id,),
+    )
+    return [_parse_json_fields(row, _ITINERARY_JSON_FIELDS) for row in cursor.fetchall()]
+
+
+# 旅行规划聚合查询：各部分的查询函数及查询失败时的默认值
+_BUNDLE_FETCHERS = {
+    "plan": (_fetch_plan, lambda: None),
+    "flights": (_fetch_flights, list),
+    "accommodations": (_fetch_accommodations, list),
+    "itinerary_details": (_fetch_itinerary_details, list),
+}
+
+# 子表对应的 travel_plans 行数字段：行数为 0 的子表直接返回默认值
+_BUNDLE_COUNT_FIELDS = {
+    "flights": "flights_count",
+    "accommodations": "accommodations_count",
+    "itinerary_details": "itineraries_count",
+}
+
+
+def get_travel_plan_bundle(travel_plan_id: int, sections=tuple(_BUNDLE_FETCHERS)) -> Dict[str, Any]:
+    """
+    在同一个连接上依次查询旅行规划的多个部分（规划、航班、住宿、路线详情），
+    只借出一次连接；sections 指定需要的部分。
+    先查规划（不需要规划时只读行数字段）：规划不存在则不再查子表，子表行数为 0 时跳过对应查询
+    """
+    bundle = {section: _BUNDLE_FETCHERS[section][1]() for section in sections}
     connection = get_db_connection()
     if not connection:
-        return []
-
+        return bundle
+    
+    cursor = None
     try:
         cursor = connection.cursor()
-        cursor.execute(
-            "SELECT * FROM accommodations WHERE travel_plan_id = %s ORDER BY id ASC",
-            (travel_plan_id,),
-        )
-        results = cursor.fetchall()
-        # 确保返回的是字典列表，并处理日期格式
-        accommodations = []
-        for row in results:
-            if isinstance(row, dict):
-                # 确保日期字段是字符串格式（如果数据库返回的是 date 对象）
-                acc = dict(row)
-                if acc.get("check_in_date") and hasattr(acc["check_in_date"], "isoformat"):
-                    acc["check_in_date"] = acc["check_in_date"].isoformat()
-                if acc.get("check_out_date") and hasattr(acc["check_out_date"], "isoformat"):
-                    acc["check_out_date"] = acc["check_out_date"].isoformat()
-                accommodations.append(acc)
-            elif isinstance(row, (list, tuple)):
-                # 如果返回的是元组/列表，转换为字典（这种情况不应该发生，但作为容错处理）
-                print(f"⚠️ 警告：accommodations 返回了非字典类型数据：{type(row)}")
-        return accommodations
+        if "plan" in sections:
+            plan = bundle["plan"] = _fetch_plan(cursor, travel_plan_id)
+        else:
+            plan = _fetch_child_counts(cursor, travel_plan_id)
+        if plan is None:
+            return bundle
+        for section in sections:
+            if section == "plan" or plan[_BUNDLE_COUNT_FIELDS[section]] == 0:
+                continue
+            bundle[section] = _BUNDLE_FETCHERS[section][0](cursor, travel_plan_id)
+        return bundle
     except Exception as e:
-        print(f"❌ 获取住宿信息失败：{e}")
-        import traceback
-        traceback.print_exc()
-        return []
+        logger.exception("❌ 获取旅行规划聚合数据失败：%s", e)
+        return {section: _BUNDLE_FETCHERS[section][1]() for section in sections}
     finally:
-        cursor.close()
+        if cursor:
+            cursor.close()
         connection.close()
+
+
+def get_flights_by_plan(travel_plan_id: int) -> List[Dict[str, Any]]:
+    """根据旅行规划ID获取航班信息"""
+    return get_travel_plan_bundle(travel_plan_id, sections=("flights",))["flights"]
+
+
+def get_accommodations_by_plan(travel_plan_id: int) -> List[Dict[str, Any]]:
+    """根据旅行规划ID获取住宿信息"""
+    return get_travel_plan_bundle(travel_plan_id, sections=("accommodations",))["accommodations"]
@@ -1,8 +1,26 @@
+import asyncio
+import logging
+import logging.handlers
+import queue
+from concurrent.futures import ThreadPoolExecutor
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from app.config import settings
 from app.api import router
-from app.models import create_all_tables
+from app.models import DB_POOL_MAX_CONNECTIONS, get_db_pool, close_db_pool
+from app.services.tools_optimized import prebuild_tool_schemas
+from app.utils.api_clients import close_async_http_client
+
+# 配置日志：请求线程只把日志记录放入队列，由后台线程负责格式化和写出，避免在请求路径上争用 stdout 锁
+_log_queue = queue.SimpleQueue()
+_log_handler = logging.StreamHandler()
+_log_handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+_log_listener = logging.handlers.QueueListener(_log_queue, _log_handler, respect_handler_level=True)
+_app_logger = logging.getLogger("app")
+_app_logger.addHandler(logging.handlers.QueueHandler(_log_queue))
+_app_logger.setLevel(logging.INFO)
+_app_logger.propagate = False
 
 # 创建FastAPI应用
 app = FastAPI(
@@ -10,7 +28,9 @@ app = FastAPI(
     version=settings.VERSION,
     description="AI旅行路线规划后端API",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    # 使用 orjson 序列化响应（比标准库 json 快，原生支持 datetime/date）
+    default_response_class=ORJSONResponse,
 )
 
 # 配置CORS
@@ -30,14 +50,36 @@ app.include_router(router, prefix=settings.API_V1_PREFIX)
 async def startup_event():
     """应用启动时执行"""
     print("🚀 Travel Planner API 启动中...")
+    _log_listener.start()
     # 不再自动初始化数据库，避免重复执行。
     # 如需初始化请手动运行：python init_db.py
+    
+    # 同步 CRUD 通过 asyncio.to_thread 在默认线程池中执行；默认线程数为 min(32, CPU+4)，
+    # 放大到与连接池一致，使并发数据库请求数受连接池而不是线程数限制
+    asyncio.get_running_loop().set_default_executor(
+        ThreadPoolExecutor(max_workers=DB_POOL_MAX_CONNECTIONS, thread_name_prefix="db")
+    )
+    
+    # 预先建立数据库连接池，避免首个请求承担建连开销；失败时不影响启动，首次使用时再重试
+    try:
+        await asyncio.to_thread(get_db_pool)
+        print("✅ 数据库连接池已就绪")
+    except Exception as e:
+        print(f"⚠️ 数据库连接池预热失败：{e}")
+    
+    # 构建延迟构建的工具参数模型，避免首个 Agent 调用时才构建
+    prebuild_tool_schemas()
 
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """应用关闭时执行"""
     print("👋 Travel Planner API 关闭中...")
+    await close_async_http_client()
+    # 归还并断开连接池中的空闲连接，避免 MySQL 端残留半开连接
+    await asyncio.to_thread(close_db_pool)
+    # 输出队列中剩余的日志并停止后台线程
+    _log_listener.stop()
 
 
 @app.get("/")
@@ -1,3 +1,3 @@
-from .travel_models import get_db_connection, create_all_tables
+from .travel_models import DB_POOL_MAX_CONNECTIONS, get_db_pool, close_db_pool, get_db_connection, create_all_tables
 
-__all__ = ["get_db_connection", "create_all_tables"]
+__all__ = ["DB_POOL_MAX_CONNECTIONS", "get_db_pool", "close_db_pool", "get_db_connection", "create_all_tables"]
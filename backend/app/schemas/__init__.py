@@ -8,11 +8,23 @@ from .travel_schemas import (
     RestaurantResponse,
     FlightResponse,
     AccommodationResponse,
+    TravelPlanFullResponse,
     GenerateItineraryRequest,
     ItineraryGenerationResponse,
     BudgetSchema,
     AddressSchema,
     FlightSchema,
+    TravelersType,
+    TRAVELERS_LABELS,
+    CommuteSchema,
+    ItineraryItemSchema,
+    SpotItemSchema,
+    RestaurantItemSchema,
+    ItineraryItem,
+    DayScheduleSchema,
+    DaySchema,
+    PlanAddressResponse,
+    ITINERARY_DETAIL_LIST_ADAPTER,
 )
 
 __all__ = [
@@ -25,9 +37,21 @@ __all__ = [
     "RestaurantResponse",
     "FlightResponse",
     "AccommodationResponse",
+    "TravelPlanFullResponse",
     "GenerateItineraryRequest",
     "ItineraryGenerationResponse",
     "BudgetSchema",
     "AddressSchema",
     "FlightSchema",
+    "TravelersType",
+    "TRAVELERS_LABELS",
+    "CommuteSchema",
+    "ItineraryItemSchema",
+    "SpotItemSchema",
+    "RestaurantItemSchema",
+    "ItineraryItem",
+    "DayScheduleSchema",
+    "DaySchema",
+    "PlanAddressResponse",
+    "ITINERARY_DETAIL_LIST_ADAPTER",
 ]
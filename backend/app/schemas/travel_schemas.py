@@ -1,11 +1,24 @@
-from pydantic import BaseModel, Field
-from pydantic import ConfigDict
-from typing import List, Optional, Dict, Any
+from pydantic import BaseModel, Field, TypeAdapter
+from pydantic import BeforeValidator, ConfigDict, Discriminator, StrictStr, Tag, model_serializer
+from typing import Annotated, Any, Dict, List, Literal, Optional, Union
 from datetime import datetime, date
 
 
 # ==================== 基础 Schema ====================
 
+# 同行人员类型（与前端 Onboarding 的选项 id 一致），校验时即确定取值，下游无需再解析字符串
+TravelersType = Literal["solo", "couple", "family", "friends"]
+TRAVELERS_LABELS = {
+    "solo": "独自一人",
+    "couple": "情侣/夫妻",
+    "family": "亲子家庭",
+    "friends": "朋友结伴",
+}
+
+# 请求体由 JSON 解码而来，字符串列表必然是 list[str]：严格模式跳过逐项类型转换，非字符串元素直接报错
+StrictStrList = Annotated[List[StrictStr], Field(strict=True)]
+
+
 class BudgetSchema(BaseModel):
     min: float = Field(default=0, ge=0, description="预算下限")
     max: float = Field(default=10000, ge=0, description="预算上限")
@@ -23,8 +36,9 @@ class FlightSchema(BaseModel):
 
     departure_airport: str = Field(..., alias="departureAirport", description="出发机场")
     arrival_airport: str = Field(..., alias="arrivalAirport", description="到达机场")
-    departure_time: datetime = Field(..., alias="departureTime", description="出发时间")
-    return_time: Optional[datetime] = Field(None, alias="returnTime", description="返回时间")
+    # pydantic-core 原生接受 ISO 8601 字符串和 Unix 时间戳（秒），内部服务可直接传时间戳，无需自定义转换
+    departure_time: datetime = Field(..., alias="departureTime", description="出发时间（ISO 8601 或 Unix 时间戳秒）")
+    return_time: Optional[datetime] = Field(None, alias="returnTime", description="返回时间（ISO 8601 或 Unix 时间戳秒）")
 
 
 # ==================== 请求 Schema ====================
@@ -32,12 +46,12 @@ class FlightSchema(BaseModel):
 class TravelPlanCreate(BaseModel):
     model_config = ConfigDict(populate_by_name=True)
 
-    destination: List[str] = Field(..., description="目的地列表")
+    destination: StrictStrList = Field(..., description="目的地列表")
     budget: BudgetSchema = Field(..., description="预算范围")
-    interests: List[str] = Field(default=[], description="旅行偏好")
-    food_preferences: List[str] = Field(default=[], alias="foodPreferences", description="饮食偏好")
-    travelers: str = Field(..., description="出行人数及类型")
-    xiaohongshu_notes: List[str] = Field(default=[], alias="xiaohongshuNotes", description="小红书笔记链接")
+    interests: StrictStrList = Field(default=[], description="旅行偏好")
+    food_preferences: StrictStrList = Field(default=[], alias="foodPreferences", description="饮食偏好")
+    travelers: TravelersType = Field(..., description="同行人员类型：solo/couple/family/friends")
+    xiaohongshu_notes: StrictStrList = Field(default=[], alias="xiaohongshuNotes", description="小红书笔记链接")
     addresses: List[AddressSchema] = Field(default=[], description="居住地址信息")
     flights: List[FlightSchema] = Field(default=[], description="航班信息")
 
@@ -48,9 +62,117 @@ class ConversationCreate(BaseModel):
     sender: str = Field(..., pattern="^(user|system)$", description="发送者类型")
 
 
+# ==================== 路线内容 Schema ====================
+# 与 _build_itinerary_prompt 约定的每日 JSON 结构一致；内容由 LLM 生成并原样入库，格式并不可靠：
+# 字段均可缺省且取值不做类型约束（Any），保留未声明的字段（extra="allow"），
+# 序列化时只输出原数据中存在的字段，不补 null/[] 默认值
+
+def _as_item_list(value: Any) -> List[Dict[str, Any]]:
+    """活动列表归一化，与 travel_service 读取 schedule 的规则一致：
+    支持列表、{"items": [...]}、单个活动对象三种写法，丢弃非对象元素"""
+    if not value:
+        return []
+    if isinstance(value, dict) and isinstance(value.get("items"), list):
+        value = value["items"]
+    elif isinstance(value, dict):
+        return [value]
+    if isinstance(value, list):
+        return [item for item in value if isinstance(item, dict)]
+    return []
+
+
+class _LLMContentSchema(BaseModel):
+    """LLM 生成内容的基类"""
+    model_config = ConfigDict(extra="allow")
+
+    @model_serializer(mode="wrap")
+    def _drop_unset_fields(self, handler):
+        data = handler(self)
+        # model_fields_set 包含显式传入的声明字段和额外字段
+        return {key: value for key, value in data.items() if key in self.model_fields_set}
+
+
+class CommuteSchema(_LLMContentSchema):
+    mode: Any = None
+    duration_minutes: Any = None
+    transfers: Any = None
+    details: Any = None
+
+
+class ItineraryItemSchema(_LLMContentSchema):
+    """行程活动的公共字段"""
+    type: Any = None
+    name: Any = None
+    description: Any = None
+    play_time_minutes: Any = None
+    notes: Any = None
+    latitude: Any = None
+    longitude: Any = None
+    # 字典按通勤结构解析，其他写法（如一段文字描述）原样保留
+    commute_from_prev: Union[CommuteSchema, Any] = None
+
+
+class SpotItemSchema(ItineraryItemSchema):
+    recommended_time: Any = None
+
+
+class RestaurantItemSchema(ItineraryItemSchema):
+    cuisine: Any = None
+    price_range: Any = None
+
+
+def _itinerary_item_kind(value: Any) -> str:
+    """活动分支标签：与 travel_service 派生 spots/restaurants 的判断一致，缺少 type 时按菜系/价格推断"""
+    if isinstance(value, dict):
+        item_type = value.get("type") or (
+            "restaurant" if (value.get("cuisine") or value.get("cuisine_type") or value.get("price_range")) else "spot"
+        )
+        return "restaurant" if item_type == "restaurant" else "spot"
+    # 序列化时传入的是已解析的模型实例（type 可能缺省，按实际分支判断）
+    return "restaurant" if isinstance(value, RestaurantItemSchema) else "spot"
+
+
+# 按标签直接选择分支（tagged union），不必逐个尝试各个模型
+ItineraryItem = Annotated[
+    Union[
+        Annotated[SpotItemSchema, Tag("spot")],
+        Annotated[RestaurantItemSchema, Tag("restaurant")],
+    ],
+    Discriminator(_itinerary_item_kind),
+]
+ItineraryItemList = Annotated[List[ItineraryItem], BeforeValidator(_as_item_list)]
+
+
+class DayScheduleSchema(_LLMContentSchema):
+    morning: ItineraryItemList = []
+    afternoon: ItineraryItemList = []
+    evening: ItineraryItemList = []
+
+
+class DaySchema(_LLMContentSchema):
+    date: Any = None
+    theme: Any = None
+    # 非对象的 schedule 原样保留（travel_service 读取时按空处理）
+    schedule: Union[DayScheduleSchema, Any] = None
+    tips: Any = None
+    spots: ItineraryItemList = []
+    restaurants: ItineraryItemList = []
+
+
+class PlanAddressResponse(BaseModel):
+    model_config = ConfigDict(extra="allow")
+
+    city: Optional[str] = None
+    address: Optional[str] = None
+    check_in_date: Optional[date] = None
+    check_out_date: Optional[date] = None
+
+
 # ==================== 响应 Schema ====================
 
 class TravelPlanResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
     id: int
     user_id: int
     destination: str
@@ -60,15 +182,14 @@ class TravelPlanResponse(BaseModel):
     food_preferences: Optional[List[str]]
     travelers: Optional[str]
     xiaohongshu_notes: Optional[List[str]]
-    addresses: Optional[List[Dict[str, Any]]]
+    addresses: Optional[List[PlanAddressResponse]]
     created_at: datetime
     updated_at: datetime
 
-    class Config:
-        from_attributes = True
-
 
 class ConversationResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
     id: int
     user_id: int
     travel_plan_id: Optional[int]
@@ -76,25 +197,23 @@ class ConversationResponse(BaseModel):
     sender: str
     timestamp: datetime
 
-    class Config:
-        from_attributes = True
-
 
 class ItineraryDetailResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
     id: int
     travel_plan_id: int
     day_number: int
-    itinerary: Optional[Dict[str, Any]]
-    recommended_spots: Optional[List[Dict[str, Any]]]
-    recommended_restaurants: Optional[List[Dict[str, Any]]]
+    itinerary: Optional[DaySchema]
+    recommended_spots: Optional[ItineraryItemList]
+    recommended_restaurants: Optional[ItineraryItemList]
     created_at: datetime
     updated_at: datetime
 
-    class Config:
-        from_attributes = True
-
 
 class AttractionResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
     id: int
     name: str
     address: Optional[str]
@@ -105,11 +224,10 @@ class AttractionResponse(BaseModel):
     city: Optional[str]
     country: Optional[str]
 
-    class Config:
-        from_attributes = True
-
 
 class RestaurantResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
     id: int
     name: str
     address: Optional[str]
@@ -122,11 +240,10 @@ class RestaurantResponse(BaseModel):
     cuisine_type: Optional[str]
     price_level: Optional[str]
 
-    class Config:
-        from_attributes = True
-
 
 class FlightResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
     id: int
     user_id: int
     travel_plan_id: Optional[int]
@@ -137,11 +254,10 @@ class FlightResponse(BaseModel):
     latitude: Optional[float]
     longitude: Optional[float]
 
-    class Config:
-        from_attributes = True
-
 
 class AccommodationResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
     id: int
     user_id: int
     travel_plan_id: Optional[int]
@@ -150,8 +266,12 @@ class AccommodationResponse(BaseModel):
     latitude: Optional[float]
     longitude: Optional[float]
 
-    class Config:
-        from_attributes = True
+
+class TravelPlanFullResponse(BaseModel):
+    plan: TravelPlanResponse
+    flights: List[FlightResponse] = []
+    accommodations: List[AccommodationResponse] = []
+    itinerary_details: List[ItineraryDetailResponse] = []
 
 
 # ==================== AI 生成路线请求 Schema ====================
@@ -166,3 +286,9 @@ class ItineraryGenerationResponse(BaseModel):
     task_id: str = Field(..., description="任务ID")
     status: str = Field(..., description="任务状态")
     message: str = Field(..., description="响应消息")
+
+
+# ==================== 预构建的列表 TypeAdapter ====================
+# 导入时构建一次校验器/序列化器，接口直接复用，避免按请求重复构建
+
+ITINERARY_DETAIL_LIST_ADAPTER = TypeAdapter(List[ItineraryDetailResponse])
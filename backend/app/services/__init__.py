@@ -1,4 +1,4 @@
-from .travel_service import TravelService
-from .tools import geocode_tool
+from .travel_service import TravelService, get_travel_service
+from .tools import geocode_tool, geocode_batch_tool
 
-__all__ = ["TravelService", "geocode_tool"]
+__all__ = ["TravelService", "get_travel_service", "geocode_tool", "geocode_batch_tool"]
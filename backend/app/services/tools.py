@@ -1,9 +1,24 @@
-from typing import Optional, Dict, Any
-from langchain_core.tools import tool
-from app.utils.api_clients import LocationAPIClient, XiaohongshuClient
+import asyncio
+from typing import Optional, Dict, Any, List
+from langchain_core.tools import tool, StructuredTool
+from pydantic import BaseModel, ConfigDict, Field
+from app.utils.api_clients import get_location_client, get_note_cdata_cached, xiaohongshu_cache_key
+from app.utils.cache import GEOCODE_CACHE_TTL, cache_get, cache_set, geocode_cache_key
 
 
-@tool
+_EMPTY_GEOCODE_RESULT = {"latitude": None, "longitude": None, "formatted_address": None}
+
+
+class GeocodeInput(BaseModel):
+    """地理编码输入参数"""
+    # 工具参数 schema 仅在绑定到 LLM 或首次调用时才需要，延迟到首次使用时构建
+    model_config = ConfigDict(defer_build=True)
+
+    address: str = Field(description="需要解析的地址或地点名称")
+    location: Optional[str] = Field(default=None, description="可选，目的地城市名称")
+
+
+@tool(args_schema=GeocodeInput)
 def geocode_tool(address: str, location: Optional[str] = None) -> Dict[str, Any]:
     """
     根据地址查询经纬度（自动选择高德/Google）。
@@ -17,15 +32,81 @@ def geocode_tool(address: str, location: Optional[str] = None) -> Dict[str, Any]
     - longitude: 经度
     - formatted_address: 标准化地址（若有）
     """
-    client = LocationAPIClient()
-    result = client.geocode(address, location=location)
+    # 两级缓存：客户端内置进程内 LRU，其后是与 /geocode 接口共用的 Redis 缓存
+    cache_key = geocode_cache_key(address, location)
+    result = cache_get(cache_key)
+    if result:
+        return result
+    result = get_location_client().geocode(address, location=location)
     if not result:
-        return {"latitude": None, "longitude": None, "formatted_address": None}
+        return dict(_EMPTY_GEOCODE_RESULT)
+    cache_set(cache_key, result, GEOCODE_CACHE_TTL)
     return result
 
 
+class GeocodeBatchInput(BaseModel):
+    """批量地理编码输入参数"""
+    model_config = ConfigDict(defer_build=True)
+
+    addresses: List[str] = Field(description="需要解析的地址/地点名称列表")
+    location: Optional[str] = Field(default=None, description="可选，目的地城市（用于更准确解析）")
+
+
+def _align_results(addresses: List[str], unique: List[str], results) -> List[Dict[str, Any]]:
+    """把去重后的结果按输入顺序展开；失败或异常的地址返回空坐标"""
+    by_address = {
+        address: result if isinstance(result, dict) and result else _EMPTY_GEOCODE_RESULT
+        for address, result in zip(unique, results)
+    }
+    return [dict(by_address[address]) for address in addresses]
+
+
+async def _geocode_batch_async(addresses: List[str], location: Optional[str] = None) -> List[Dict[str, Any]]:
+    """并发解析多个地址：所有请求同时发出，总耗时约为最慢的一次请求"""
+    unique = list(dict.fromkeys(addresses))
+    client = get_location_client()
+    results = await asyncio.gather(
+        *(client.geocode_async(address, location=location) for address in unique),
+        return_exceptions=True,
+    )
+    return _align_results(addresses, unique, results)
+
+
+def _geocode_batch(addresses: List[str], location: Optional[str] = None) -> List[Dict[str, Any]]:
+    """同步调用路径（.invoke）：国内地址走高德批量接口，其余在线程池中并发解析"""
+    unique = list(dict.fromkeys(addresses))
+    if not unique:
+        return []
+    results = get_location_client().batch_geocode(unique, location=location)
+    return _align_results(addresses, unique, results)
+
+
+geocode_batch_tool = StructuredTool.from_function(
+    func=_geocode_batch,
+    coroutine=_geocode_batch_async,
+    name="geocode_batch_tool",
+    description=(
+        "批量根据地址查询经纬度（自动选择高德/Mapbox），一次解析多个景点/酒店地址。"
+        "返回与输入顺序一致的列表，每项包含 latitude、longitude、formatted_address。"
+    ),
+    args_schema=GeocodeBatchInput,
+)
+
+
+def _xhs_error_result(error: str) -> Dict[str, Any]:
+    """小红书工具的失败返回（字段与成功结果一致，便于 LLM 理解）"""
+    return {
+        "note_id": None,
+        "title": None,
+        "content": None,
+        "cdata": None,
+        "raw_content": None,
+        "error": error,
+    }
+
+
 @tool
-def get_xiaohongshu_cdata(note_url: str) -> Dict[str, Any]:
+def get_xiaohongshu_cdata(note_url: str, include_raw: bool = False) -> Dict[str, Any]:
     """
     获取小红书笔记的CDATA内容（作为知识库使用）。
     这个工具用于从小红书链接中提取详细的笔记信息，包括：
@@ -36,26 +117,23 @@ def get_xiaohongshu_cdata(note_url: str) -> Dict[str, Any]:
     
     输入:
     - note_url: 小红书笔记的完整URL（支持 xhslink.com 短链接或 xiaohongshu.com 完整链接）
+    - include_raw: 是否返回完整原始正文 raw_content（默认否，content 和 cdata 已足够生成路线）
     
     输出:
     - note_id: 笔记ID
     - title: 笔记标题
     - content: 笔记正文内容
     - cdata: 结构化的CDATA数据，包含推荐信息、标签等
-    - raw_content: 完整的原始内容
+    - raw_content: 完整的原始内容（仅 include_raw=True 时返回）
     
     注意：这个工具返回的数据将作为生成旅行路线的重要参考依据。
     """
-    client = XiaohongshuClient()
-    result = client.get_note_cdata(note_url)
+    # 链接格式不合法时直接返回，不查缓存也不调用客户端
+    if not xiaohongshu_cache_key(note_url):
+        return _xhs_error_result("无效的小红书链接")
+    # 与 FunctionExecutor 共用同一份进程内 LRU + Redis 缓存
+    result = get_note_cdata_cached(note_url, include_raw=include_raw)
     if not result:
-        return {
-            "note_id": None,
-            "title": None,
-            "content": None,
-            "cdata": None,
-            "raw_content": None,
-            "error": "无法获取小红书笔记CDATA"
-        }
+        return _xhs_error_result("无法获取小红书笔记CDATA")
     return result
 
@@ -3,35 +3,43 @@
 使用标准的 function calling schema 和统一的执行器
 """
 
+from functools import cache
 from typing import Optional, Dict, Any
+import orjson
 from langchain_core.tools import tool, StructuredTool
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from app.utils.function_executor import get_executor, FunctionExecutionError, FunctionValidationError
 from app.utils.function_schemas import ALL_FUNCTIONS
+# 地理编码工具只在 tools.py 中定义一份（带进程内 + Redis 两级缓存），这里直接复用
+from app.services.tools import GeocodeBatchInput, GeocodeInput, geocode_tool
 
 
-# ==================== Pydantic 模型定义（用于类型验证）====================
+# 执行器在导入时创建一次，各工具共用（避免每次调用都重新获取）
+_EXECUTOR = get_executor()
 
-class GeocodeInput(BaseModel):
-    """地理编码输入参数"""
-    address: str = Field(description="需要解析的地址或地点名称")
-    location: Optional[str] = Field(default=None, description="可选，目的地城市名称")
 
+# ==================== Pydantic 模型定义（用于类型验证）====================
 
 class SearchAttractionsInput(BaseModel):
     """搜索景点输入参数"""
+    model_config = ConfigDict(defer_build=True)
+
     city: str = Field(description="城市名称")
     keyword: Optional[str] = Field(default=None, description="可选，搜索关键词")
 
 
 class SearchRestaurantsInput(BaseModel):
     """搜索餐厅输入参数"""
+    model_config = ConfigDict(defer_build=True)
+
     city: str = Field(description="城市名称")
     cuisine_type: Optional[str] = Field(default=None, description="可选，菜系类型")
 
 
 class SearchPlacesInput(BaseModel):
     """搜索地点输入参数"""
+    model_config = ConfigDict(defer_build=True)
+
     keywords: str = Field(description="搜索关键词")
     city: Optional[str] = Field(default=None, description="可选，城市名称")
     types: Optional[str] = Field(default=None, description="可选，地点类型代码")
@@ -39,48 +47,14 @@ class SearchPlacesInput(BaseModel):
 
 class GetXiaohongshuCdataInput(BaseModel):
     """获取小红书CDATA输入参数"""
+    model_config = ConfigDict(defer_build=True)
+
     note_url: str = Field(description="小红书笔记的URL")
 
 
 # ==================== 工具函数定义 ====================
 
-@tool
-def geocode_tool(address: str, location: Optional[str] = None) -> Dict[str, Any]:
-    """
-    根据地址查询经纬度（自动选择高德/Mapbox）。
-    
-    这个工具用于将地址或地点名称转换为经纬度坐标，支持国内和国外地点。
-    国内地点使用高德地图，国外地点使用Mapbox。
-    
-    Args:
-        address: 需要解析的地址/地点名称
-        location: 可选，目的地城市（用于更准确解析）
-    
-    Returns:
-        包含 latitude, longitude, formatted_address 的字典
-    """
-    executor = get_executor()
-    try:
-        result = executor.execute("geocode", {
-            "address": address,
-            "location": location
-        })
-        return result.get("data", {}) if result.get("success") else {
-            "latitude": None,
-            "longitude": None,
-            "formatted_address": None,
-            "error": result.get("error", "地理编码失败")
-        }
-    except (FunctionExecutionError, FunctionValidationError) as e:
-        return {
-            "latitude": None,
-            "longitude": None,
-            "formatted_address": None,
-            "error": str(e)
-        }
-
-
-@tool
+@tool(args_schema=SearchAttractionsInput)
 def search_attractions_tool(city: str, keyword: Optional[str] = None) -> Dict[str, Any]:
     """
     搜索指定城市的景点信息。
@@ -94,26 +68,21 @@ def search_attractions_tool(city: str, keyword: Optional[str] = None) -> Dict[st
     Returns:
         包含景点列表的字典，每个景点包含 name, address, latitude, longitude 等字段
     """
-    executor = get_executor()
     try:
-        result = executor.execute("search_attractions", {
+        results = _EXECUTOR.execute("search_attractions", {
             "city": city,
             "keyword": keyword
         })
-        return result if result.get("success") else {
-            "data": [],
-            "count": 0,
-            "error": result.get("error", "搜索景点失败")
-        }
     except (FunctionExecutionError, FunctionValidationError) as e:
         return {
             "data": [],
             "count": 0,
             "error": str(e)
         }
+    return {"success": True, "data": results, "count": len(results)}
 
 
-@tool
+@tool(args_schema=SearchRestaurantsInput)
 def search_restaurants_tool(city: str, cuisine_type: Optional[str] = None) -> Dict[str, Any]:
     """
     搜索指定城市的餐厅信息。
@@ -127,26 +96,21 @@ def search_restaurants_tool(city: str, cuisine_type: Optional[str] = None) -> Di
     Returns:
         包含餐厅列表的字典，每个餐厅包含 name, address, latitude, longitude 等字段
     """
-    executor = get_executor()
     try:
-        result = executor.execute("search_restaurants", {
+        results = _EXECUTOR.execute("search_restaurants", {
             "city": city,
             "cuisine_type": cuisine_type
         })
-        return result if result.get("success") else {
-            "data": [],
-            "count": 0,
-            "error": result.get("error", "搜索餐厅失败")
-        }
     except (FunctionExecutionError, FunctionValidationError) as e:
         return {
             "data": [],
             "count": 0,
             "error": str(e)
         }
+    return {"success": True, "data": results, "count": len(results)}
 
 
-@tool
+@tool(args_schema=GetXiaohongshuCdataInput)
 def get_xiaohongshu_cdata_tool(note_url: str) -> Dict[str, Any]:
     """
     获取小红书笔记的CDATA内容（作为知识库使用）。
@@ -165,18 +129,10 @@ def get_xiaohongshu_cdata_tool(note_url: str) -> Dict[str, Any]:
     Returns:
         包含 note_id, title, content, cdata 等字段的字典
     """
-    executor = get_executor()
     try:
-        result = executor.execute("get_xiaohongshu_cdata", {
+        return _EXECUTOR.execute("get_xiaohongshu_cdata", {
             "note_url": note_url
         })
-        return result.get("data", {}) if result.get("success") else {
-            "note_id": None,
-            "title": None,
-            "content": None,
-            "cdata": None,
-            "error": result.get("error", "无法获取小红书笔记CDATA")
-        }
     except (FunctionExecutionError, FunctionValidationError) as e:
         return {
             "note_id": None,
@@ -197,12 +153,37 @@ ALL_TOOLS = [
 ]
 
 
+# ==================== 启动时预构建参数模型 ====================
+
+# 工具参数模型均为 defer_build=True（导入时不构建），由应用启动时统一构建
+_TOOL_INPUT_MODELS = (
+    GeocodeInput,
+    GeocodeBatchInput,
+    SearchAttractionsInput,
+    SearchRestaurantsInput,
+    SearchPlacesInput,
+    GetXiaohongshuCdataInput,
+)
+
+
+def prebuild_tool_schemas() -> None:
+    """一次构建所有工具参数模型的校验器，首个 Agent 工具调用不再承担 schema 构建开销"""
+    for model in _TOOL_INPUT_MODELS:
+        model.model_rebuild()
+
+
 # ==================== 导出 OpenAI Function Calling Schema ====================
 
-def get_openai_function_schemas() -> list:
+@cache
+def get_openai_function_schemas() -> tuple:
     """
     获取所有函数的 OpenAI Function Calling Schema
-    用于直接传递给 OpenAI API
+    用于直接传递给 OpenAI API（进程内只构建一次，返回不可变的元组）
     """
-    from app.utils.function_schemas import ALL_FUNCTIONS
-    return ALL_FUNCTIONS
+    return tuple(ALL_FUNCTIONS)
+
+
+@cache
+def get_openai_function_schemas_json() -> bytes:
+    """获取序列化好的 Function Calling Schema（JSON 字节，拼接请求体时无需重复序列化）"""
+    return orjson.dumps(get_openai_function_schemas())
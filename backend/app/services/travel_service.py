@@ -3,15 +3,87 @@ from datetime import date
 from langchain_openai import ChatOpenAI
 from langchain_core.messages import HumanMessage
 from app.config import settings
-from app.utils.api_clients import LocationAPIClient, XiaohongshuClient
+from app.utils.api_clients import get_location_client, get_xiaohongshu_client
 from app.crud import travel_crud
+from app.schemas.travel_schemas import TRAVELERS_LABELS
 from app.services.tools import get_xiaohongshu_cdata
+from app.utils.cache import ITINERARY_CACHE_TTL, cache_get, cache_set, make_cache_key
+import asyncio
 import json
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import orjson
 import time
 from datetime import datetime
 from decimal import Decimal
 
 
+# 命中路线缓存时按固定长度切片回放为 token 事件，前端仍看到逐步输出
+ITINERARY_REPLAY_CHUNK = 40
+
+# LLM token 合并输出：累计字符数或距上次输出的时间（秒）达到其一即发送一帧
+TOKEN_FLUSH_CHARS = 64
+TOKEN_FLUSH_INTERVAL = 0.032
+
+ITINERARY_PERSIST_ERROR = "路线详情保存失败"
+
+# 并发获取小红书笔记的最大线程数（避免同时请求过多被限流）
+XHS_FETCH_MAX_WORKERS = 8
+
+# SSE 帧的固定部分预先编码；token 每个 LLM 片段一帧，是流式输出的热点路径
+_SSE_FRAME_END = b"\n\n"
+_SSE_PREFIXES = {
+    event: b"event: " + event.encode() + b"\ndata: "
+    for event in ("token", "progress", "heartbeat", "day", "result", "error", "started")
+}
+_SSE_TOKEN_PREFIX = _SSE_PREFIXES["token"]
+
+
+def _sse_token(delta: str) -> bytes:
+    """构造 token 事件帧（数据只有一个字符串字段，无需 default 回调）"""
+    return _SSE_TOKEN_PREFIX + orjson.dumps({"delta": delta}) + _SSE_FRAME_END
+
+
+# 解析 LLM 输出时复用的解码器（无状态，可在线程间共享）
+_JSON_DECODER = json.JSONDecoder()
+
+
+def _balanced_object_end(text: str, start: int) -> int:
+    """从 text[start] 的 { 开始单趟扫描（跳过字符串内的括号和转义），返回匹配的 } 之后的下标；括号不闭合时返回 -1"""
+    depth = 0
+    in_string = False
+    escaped = False
+    for i in range(start, len(text)):
+        ch = text[i]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch == "{":
+            depth += 1
+        elif ch == "}":
+            depth -= 1
+            if depth == 0:
+                return i + 1
+    return -1
+
+
+def _strip_code_fences(text: str) -> str:
+    """移除 ```json ... ``` / ``` ... ``` 等代码块包裹（入参已 strip，直接按前后缀切片，无需正则）"""
+    if text.startswith("```"):
+        text = text[3:]
+        if text[:4].lower() == "json":
+            text = text[4:]
+        text = text.lstrip()
+    if text.endswith("```"):
+        text = text[:-3].rstrip()
+    return text
+
+
 class TravelService:
     """旅行规划服务"""
     
@@ -34,8 +106,8 @@ class TravelService:
                 self.llm_tools = None
         except Exception:
             self.llm_tools = None
-        self.location_client = LocationAPIClient()
-        self.xiaohongshu_client = XiaohongshuClient()
+        self.location_client = get_location_client()
+        self.xiaohongshu_client = get_xiaohongshu_client()
     
     def generate_itinerary(
         self,
@@ -58,8 +130,7 @@ class TravelService:
         # 获取小红书笔记内容
         xhs_content = ""
         if xiaohongshu_notes:
-            for note_url in xiaohongshu_notes:
-                note_content = self.xiaohongshu_client.get_note_content(note_url)
+            for note_content in self._fetch_note_contents(xiaohongshu_notes):
                 if note_content:
                     xhs_content += f"\n笔记：{note_content.get('title', '')}\n{note_content.get('content', '')}\n"
         
@@ -76,42 +147,52 @@ class TravelService:
             xhs_content=xhs_content
         )
         
-        # 调用LLM生成路线
+        # 调用LLM生成路线（相同提示词命中缓存时跳过 LLM）
         try:
-            messages = [HumanMessage(content=prompt)]
-            response = self.llm.invoke(messages)
-            itinerary_text = response.content
+            cache_key = self._itinerary_cache_key(prompt)
+            itinerary_text = cache_get(cache_key)
+            cache_hit = itinerary_text is not None
+            if not cache_hit:
+                messages = [HumanMessage(content=prompt)]
+                response = self.llm.invoke(messages)
+                itinerary_text = response.content
             
             # 解析LLM返回的路线（JSON格式）
             itinerary_data = self._parse_itinerary_response(itinerary_text, days)
+            if not cache_hit and self._has_activities(itinerary_data):
+                cache_set(cache_key, itinerary_text, ITINERARY_CACHE_TTL)
             
             # 获取推荐的景点和餐厅
             attractions = self.location_client.search_attractions(destination)
             restaurants = self.location_client.search_restaurants(destination)
             
-            # 保存路线详情到数据库
+            # 保存路线详情到数据库（所有天数一次批量写入）
             itinerary_details = []
+            detail_rows = []
             for day_num in range(1, days + 1):
                 day_itinerary = itinerary_data.get(f"day_{day_num}", {})
                 day_spots = day_itinerary.get("spots", [])
                 day_restaurants = day_itinerary.get("restaurants", [])
                 
-                # 创建路线详情
-                detail_id = travel_crud.create_itinerary_detail(
-                    travel_plan_id=travel_plan_id,
-                    day_number=day_num,
-                    itinerary=day_itinerary,
-                    recommended_spots=day_spots[:5],  # 限制数量
-                    recommended_restaurants=day_restaurants[:3]
-                )
-                
-                if detail_id:
-                    itinerary_details.append({
-                        "day_number": day_num,
-                        "itinerary": day_itinerary,
-                        "spots": day_spots[:5],
-                        "restaurants": day_restaurants[:3]
-                    })
+                detail_rows.append({
+                    "day_number": day_num,
+                    "itinerary": day_itinerary,
+                    "recommended_spots": day_spots[:5],  # 限制数量
+                    "recommended_restaurants": day_restaurants[:3]
+                })
+                itinerary_details.append({
+                    "day_number": day_num,
+                    "itinerary": day_itinerary,
+                    "spots": day_spots[:5],
+                    "restaurants": day_restaurants[:3]
+                })
+            
+            # 路线详情未能保存时整体视为失败（与流式接口一致），不返回未保存的路线详情
+            if not travel_crud.create_itinerary_details_bulk(travel_plan_id, detail_rows):
+                return {
+                    "success": False,
+                    "error": ITINERARY_PERSIST_ERROR
+                }
             
             return {
                 "success": True,
@@ -143,49 +224,30 @@ class TravelService:
         xiaohongshu_notes: Optional[List[str]] = None,
     ):
         """
-        流式生成路线：以 SSE 事件的形式逐步输出（token/progress/result/error）。
+        流式生成路线：以 SSE 事件的形式逐步输出（token/progress/result/error），每帧为 UTF-8 字节。
         注意：前端使用 fetch + ReadableStream 读取。
         """
 
-        def _json_safe(obj: Any):
-            """递归把 datetime/date/Decimal/Pydantic模型 等不可序列化对象转为可 JSON 的类型。"""
-            if obj is None:
-                return None
-            if isinstance(obj, (datetime, date)):
-                return obj.isoformat()
+        def _sse_default(obj: Any):
+            """orjson 无法直接序列化的对象（datetime/date 由 orjson 原生处理）：Decimal 转 float，Pydantic 模型转 dict，其他对象转为字符串"""
             if isinstance(obj, Decimal):
                 return float(obj)
+            # 处理Pydantic模型类（ModelMetaclass）/ 其他类对象 - 不应该序列化类本身
+            if isinstance(obj, type):
+                return None
             # 处理Pydantic模型实例
             if hasattr(obj, 'model_dump'):
-                # Pydantic v2
-                return _json_safe(obj.model_dump())
-            if hasattr(obj, 'dict'):
-                # Pydantic v1
-                return _json_safe(obj.dict())
-            # 处理Pydantic模型类（ModelMetaclass）- 不应该序列化类本身
-            if type(obj).__name__ == 'ModelMetaclass' or (hasattr(obj, '__module__') and 'pydantic' in str(type(obj))):
-                return None  # 或者返回一个标识字符串
-            # 处理类型/类对象
-            if isinstance(type(obj), type) and obj.__class__.__name__ in ['ModelMetaclass', 'type']:
-                return None
-            if isinstance(obj, dict):
-                return {k: _json_safe(v) for k, v in obj.items()}
-            if isinstance(obj, (list, tuple)):
-                return [_json_safe(v) for v in obj]
-            # 对于其他不可序列化的类型，尝试转换为字符串
-            try:
-                json.dumps(obj)
-                return obj
-            except (TypeError, ValueError):
-                # 如果无法序列化，返回字符串表示或None
-                return str(obj) if obj is not None else None
+                return obj.model_dump()
+            return str(obj)
 
-        def sse(event: str, data_obj: Any) -> str:
-            safe = _json_safe(data_obj)
-            return f"event: {event}\ndata: {json.dumps(safe, ensure_ascii=False)}\n\n"
+        def sse(event: str, data_obj: Any) -> bytes:
+            # orjson 一次完成序列化（输出 UTF-8，等价于 ensure_ascii=False），直接拼接为字节帧，ASGI 层无需再编码
+            data = orjson.dumps(data_obj, default=_sse_default, option=orjson.OPT_NON_STR_KEYS)
+            prefix = _SSE_PREFIXES.get(event) or b"event: " + event.encode() + b"\ndata: "
+            return prefix + data + _SSE_FRAME_END
 
         # 先发一个 comment（兼容某些代理/浏览器更快 flush）
-        yield ":\n\n"
+        yield b":\n\n"
         # 再发 started
         yield sse("started", {"travel_plan_id": travel_plan_id, "destination": destination})
         # 心跳，避免某些环境长时间无数据导致前端看起来“卡死”（以及代理超时）
@@ -287,23 +349,54 @@ class TravelService:
 
         # LLM token 流（如果当前 langchain 版本不支持 stream，会退化为一次性生成）
         text_buf = ""
+        # 景点/餐厅搜索和航班住宿查询不依赖 LLM 输出：先提交到线程池，与 token 生成并行执行
+        fetch_executor = ThreadPoolExecutor(max_workers=3, thread_name_prefix="itinerary-fetch")
         try:
+            fetch_futures = {
+                fetch_executor.submit(self.location_client.search_attractions, destination): "attractions",
+                fetch_executor.submit(self.location_client.search_restaurants, destination): "restaurants",
+                fetch_executor.submit(
+                    travel_crud.get_travel_plan_bundle, travel_plan_id, sections=("flights", "accommodations")
+                ): "bundle",
+            }
             messages = [HumanMessage(content=prompt)]
+            cache_key = self._itinerary_cache_key(prompt)
+            cached_text = cache_get(cache_key)
 
-            if hasattr(self.llm, "stream"):
-                yield sse("progress", {"stage": "llm_stream_start"})
+            if cached_text is not None:
+                # 命中缓存：按固定长度切片回放，保持与 LLM 流式输出一致的事件序列
+                yield sse("progress", {"stage": "llm_cache_hit", "cache": "HIT"})
+                text_buf = cached_text
+                for i in range(0, len(text_buf), ITINERARY_REPLAY_CHUNK):
+                    yield _sse_token(text_buf[i:i + ITINERARY_REPLAY_CHUNK])
+                yield sse("progress", {"stage": "llm_stream_end", "cache": "HIT"})
+            elif hasattr(self.llm, "stream"):
+                yield sse("progress", {"stage": "llm_stream_start", "cache": "MISS"})
+                # 逐 token 合并：攒够一定字符数或距上次输出超过间隔时才发一帧，减少小包和前端解析次数
+                pending = []
+                pending_len = 0
+                last_flush = time.monotonic()
                 for chunk in self.llm.stream(messages):
                     token = getattr(chunk, "content", None)
                     if not token:
                         continue
                     text_buf += token
-                    yield sse("token", {"delta": token})
+                    pending.append(token)
+                    pending_len += len(token)
+                    now = time.monotonic()
+                    if pending_len >= TOKEN_FLUSH_CHARS or now - last_flush >= TOKEN_FLUSH_INTERVAL:
+                        yield _sse_token("".join(pending))
+                        pending.clear()
+                        pending_len = 0
+                        last_flush = now
+                if pending:
+                    yield _sse_token("".join(pending))
                 yield sse("progress", {"stage": "llm_stream_end"})
             else:
-                yield sse("progress", {"stage": "llm_invoke"})
+                yield sse("progress", {"stage": "llm_invoke", "cache": "MISS"})
                 resp = self.llm.invoke(messages)
                 text_buf = resp.content or ""
-                yield sse("token", {"delta": text_buf})
+                yield _sse_token(text_buf)
 
             yield sse("progress", {"stage": "parse_json"})
             print(f"📝 开始解析 LLM 返回的 JSON，文本长度：{len(text_buf)}")
@@ -313,6 +406,9 @@ class TravelService:
             if not isinstance(itinerary_data, dict):
                 print(f"⚠️ 警告：解析结果不是字典类型：{type(itinerary_data)}")
                 itinerary_data = {}
+            # 只缓存解析出具体活动的完整结果，截断或格式错误的输出不写入缓存
+            if cached_text is None and self._has_activities(itinerary_data):
+                cache_set(cache_key, text_buf, ITINERARY_CACHE_TTL)
             
             print(f"📊 解析结果：共 {len(itinerary_data)} 天的数据")
             if len(itinerary_data) == 0:
@@ -338,47 +434,49 @@ class TravelService:
                 print(f"  {day_key} 完整数据结构：keys={list(day_data.keys())}")
 
             yield sse("progress", {"stage": "fetch_recommendations"})
-            print(f"🔍 开始搜索景点和餐厅：destination={destination}")
-            attractions = self.location_client.search_attractions(destination)
-            restaurants = self.location_client.search_restaurants(destination)
+            # 通常在 LLM 输出结束前已完成；按完成顺序通知前端，地图数据可以提前渲染
+            fetched = {}
+            for future in as_completed(fetch_futures):
+                name = fetch_futures[future]
+                fetched[name] = future.result()
+                yield sse("progress", {"stage": f"{name}_ready"})
+            attractions = fetched["attractions"]
+            restaurants = fetched["restaurants"]
             print(f"📊 搜索结果：attractions={len(attractions) if attractions else 0}, restaurants={len(restaurants) if restaurants else 0}")
 
             # 如果没有经纬度，尝试用地理编码补齐（高德/Google 取决于国内外判断与 key）
+            # 缺坐标的条目汇总后批量解析（高德每 10 个地址一次请求），不再逐条串行请求
             def _ensure_lat_lng(items: List[Dict[str, Any]], name_key: str = "name") -> List[Dict[str, Any]]:
-                enriched = []
-                for item in items:
-                    # 确保 item 是字典类型
-                    if not isinstance(item, dict):
-                        enriched.append(item)
-                        continue
-                    
-                    lat = item.get("latitude")
-                    lng = item.get("longitude")
-                    if (lat is None or lng is None) and item.get(name_key):
-                        geo = self.location_client.geocode(f"{destination} {item.get(name_key)}", location=destination)
-                        # 确保 geo 是字典类型
-                        if geo and isinstance(geo, dict) and geo.get("latitude") is not None and geo.get("longitude") is not None:
-                            item["latitude"] = geo["latitude"]
-                            item["longitude"] = geo["longitude"]
-                    enriched.append(item)
-                return enriched
+                missing = [
+                    item for item in items
+                    if isinstance(item, dict)
+                    and (item.get("latitude") is None or item.get("longitude") is None)
+                    and item.get(name_key)
+                ]
+                if not missing:
+                    return items
+                geos = self.location_client.batch_geocode(
+                    [f"{destination} {item.get(name_key)}" for item in missing], location=destination
+                )
+                for item, geo in zip(missing, geos):
+                    # 确保 geo 是字典类型
+                    if geo and isinstance(geo, dict) and geo.get("latitude") is not None and geo.get("longitude") is not None:
+                        item["latitude"] = geo["latitude"]
+                        item["longitude"] = geo["longitude"]
+                return items
 
             attractions = _ensure_lat_lng(attractions, "name")
             restaurants = _ensure_lat_lng(restaurants, "name")
 
             # 额外获取航班与住宿（如果有经纬度则可用于地图）
-            flights = travel_crud.get_flights_by_plan(travel_plan_id)
-            accommodations = travel_crud.get_accommodations_by_plan(travel_plan_id)
-            
-            # 确保 accommodations 是字典列表，过滤掉非字典类型的数据
-            if accommodations:
-                accommodations = [acc for acc in accommodations if isinstance(acc, dict)]
+            # 航班与住宿在同一个数据库连接上查询（已与 LLM 流并行完成）
+            bundle = fetched["bundle"]
+            flights = bundle["flights"]
+            accommodations = bundle["accommodations"]
             
             # 为住宿和航班添加经纬度（如果缺失）
             def _geocode_accommodation(acc):
                 """为住宿地址添加经纬度 - 优先使用数据库中的经纬度"""
-                if not isinstance(acc, dict):
-                    return acc
                 # 优先使用数据库中已有的经纬度（确保是数字类型）
                 lat = acc.get("latitude")
                 lng = acc.get("longitude")
@@ -409,19 +507,12 @@ class TravelService:
                             print(f"✅ 地理编码结果：{address} -> ({geo_lat}, {geo_lng})")
                 return acc
             
-            accommodations = [_geocode_accommodation(acc) for acc in accommodations if isinstance(acc, dict)]
-            
-            # 确保 flights 是字典列表，过滤掉非字典类型的数据
-            if flights:
-                flights = [f for f in flights if isinstance(f, dict)]
+            accommodations = [_geocode_accommodation(acc) for acc in accommodations]
             
             # 为航班机场添加经纬度（如果缺失）
             # 注意：单程航班只有 departure_airport 和 arrival_airport，需要分别获取经纬度
             def _geocode_flight(flight):
                 """为航班机场添加经纬度（分别处理出发机场和到达机场）"""
-                if not isinstance(flight, dict):
-                    return flight
-                
                 # 处理出发机场
                 dep_airport = flight.get("departure_airport", "")
                 if dep_airport:
@@ -450,7 +541,7 @@ class TravelService:
                 
                 return flight
             
-            flights = [_geocode_flight(f) for f in flights if isinstance(f, dict)]
+            flights = [_geocode_flight(f) for f in flights]
             
             # 计算每天的起始点和终止点
             def _get_day_start_end_points(day_num: int, current_date: date) -> Dict[str, Optional[Dict[str, Any]]]:
@@ -759,6 +850,7 @@ class TravelService:
 
             yield sse("progress", {"stage": "persist"})
             itinerary_details = []
+            detail_rows = []
             
             # 计算每天的日期
             from datetime import timedelta
@@ -831,12 +923,14 @@ class TravelService:
                     print(f"⚠️ 第{day_num}天：起始点或终止点缺失，使用兜底逻辑")
                     # 兜底逻辑已在 _get_day_start_end_points 内部实现
 
-                travel_crud.create_itinerary_detail(
-                    travel_plan_id=travel_plan_id,
-                    day_number=day_num,
-                    itinerary=day_itinerary,
-                    recommended_spots=day_spots[:5],
-                    recommended_restaurants=day_restaurants[:3],
+                # 先在内存中收集，循环结束后一次批量写入
+                detail_rows.append(
+                    {
+                        "day_number": day_num,
+                        "itinerary": day_itinerary,
+                        "recommended_spots": day_spots[:5],
+                        "recommended_restaurants": day_restaurants[:3],
+                    }
                 )
 
                 itinerary_details.append(
@@ -1183,6 +1277,11 @@ class TravelService:
                     "end_point": day_points["end"]
                 })
 
+            # 路线详情未能保存时不推送 success 结果（前端收到 error 即结束生成），与非流式接口一致
+            if not travel_crud.create_itinerary_details_bulk(travel_plan_id, detail_rows):
+                yield sse("error", {"message": ITINERARY_PERSIST_ERROR})
+                return
+
             result = {
                 "success": True,
                 "travel_plan_id": travel_plan_id,
@@ -1197,6 +1296,9 @@ class TravelService:
 
         except Exception as e:
             yield sse("error", {"message": str(e)})
+        finally:
+            # 客户端提前断开时不等待仍在进行的查询
+            fetch_executor.shutdown(wait=False, cancel_futures=True)
     
     def _build_itinerary_prompt(
         self,
@@ -1231,7 +1333,7 @@ class TravelService:
             xhs_cdata_section += "以下是完整的CDATA数据结构（包含所有详细信息）：\n"
             for idx, cdata in enumerate(xhs_cdata_list, 1):
                 xhs_cdata_section += f"\n--- 笔记 {idx} 完整CDATA数据 ---\n"
-                xhs_cdata_section += json.dumps(cdata, ensure_ascii=False, indent=2) + "\n"
+                xhs_cdata_section += orjson.dumps(cdata, option=orjson.OPT_INDENT_2).decode() + "\n"
             xhs_cdata_section += "\n⚠️ 请务必仔细分析上述CDATA数据，特别是content字段中的完整内容，\n"
             xhs_cdata_section += "提取其中的景点、餐厅、住宿、时间安排、注意事项等关键信息，并应用到路线规划中。\n\n"
         
@@ -1240,7 +1342,7 @@ class TravelService:
 目的地：{destination}
 出发日期：{start_date}
 旅行天数：{days}天
-出行人员：{travelers}
+出行人员：{TRAVELERS_LABELS.get(travelers, travelers)}
 旅行偏好：{interests_str}
 饮食偏好：{food_str}
 预算范围：{budget_min} - {budget_max} 元
@@ -1310,50 +1412,68 @@ class TravelService:
 
         return prompt
     
+    def _fetch_note_contents(self, note_urls: List[str]) -> List[Optional[Dict[str, Any]]]:
+        """并发获取多条小红书笔记（各条之间无依赖），结果与输入顺序一致；单条失败时为 None"""
+        def fetch_one(note_url: str):
+            try:
+                return self.xiaohongshu_client.get_note_content(note_url)
+            except Exception as e:
+                print(f"⚠️ 获取小红书笔记失败：{note_url} - {e}")
+                return None
+
+        if len(note_urls) <= 1:
+            return [fetch_one(note_url) for note_url in note_urls]
+        with ThreadPoolExecutor(max_workers=min(XHS_FETCH_MAX_WORKERS, len(note_urls))) as executor:
+            return list(executor.map(fetch_one, note_urls))
+
+    def _itinerary_cache_key(self, prompt: str) -> str:
+        """路线缓存键：提示词已包含目的地、日期、偏好、预算和小红书内容，相同提示词即相同请求"""
+        return make_cache_key("itinerary", getattr(self.llm, "model_name", ""), prompt)
+
+    @staticmethod
+    def _has_activities(itinerary_data: Dict[str, Any]) -> bool:
+        """解析结果中是否至少有一个具体活动（解析失败时的默认结构全部为空）"""
+        for day_data in itinerary_data.values():
+            schedule = day_data.get("schedule") if isinstance(day_data, dict) else None
+            if isinstance(schedule, dict) and any(schedule.get(period) for period in ("morning", "afternoon", "evening")):
+                return True
+        return False
+
     def _parse_itinerary_response(self, response_text: str, days: int) -> Dict[str, Any]:
         """解析LLM返回的路线文本"""
-        import json
-        import re
-
-        def _strip_code_fences(text: str) -> str:
-            """移除 ```json ... ``` / ``` ... ``` 等代码块包裹。"""
-            if not text:
-                return text
-            # 去掉常见 ```json / ``` 包裹
-            text = re.sub(r"^\s*```(?:json)?\s*", "", text, flags=re.IGNORECASE)
-            text = re.sub(r"\s*```\s*$", "", text)
-            return text.strip()
-
         raw = (response_text or "").strip()
         raw = _strip_code_fences(raw)
 
-        # 1) 先尝试整段直接 json.loads（有些模型会严格返回 JSON）
+        # 1) 先尝试整段直接解析（有些模型会严格返回 JSON；orjson 解析长文本比标准库快数倍）
         try:
-            obj = json.loads(raw)
+            obj = orjson.loads(raw)
             if isinstance(obj, dict):
                 return obj
         except Exception:
             pass
 
         # 2) 使用 JSONDecoder.raw_decode 从任意位置提取“第一段合法 JSON 对象”
-        #    能容忍前后夹杂文本、以及 JSON 后还有多余字符
-        decoder = json.JSONDecoder()
+        #    能容忍前后夹杂文本、以及 JSON 后还有多余字符；
+        #    直接传起始下标（不切片复制），解码失败时跳过整段括号区域，而不是在其中每个 { 处重试
         start = raw.find("{")
         while start != -1:
             try:
-                obj, end = decoder.raw_decode(raw[start:])
+                obj, _ = _JSON_DECODER.raw_decode(raw, start)
                 if isinstance(obj, dict):
                     return obj
-            except Exception:
+            except ValueError:
                 pass
-            start = raw.find("{", start + 1)
+            end = _balanced_object_end(raw, start)
+            if end == -1:
+                break
+            start = raw.find("{", end)
 
         # 3) 兜底：尝试用最外层大括号截取（尽量修复模型在 JSON 前后夹杂的情况）
         try:
             first = raw.find("{")
             last = raw.rfind("}")
             if first != -1 and last != -1 and last > first:
-                obj = json.loads(raw[first:last + 1])
+                obj = orjson.loads(raw[first:last + 1])
                 if isinstance(obj, dict):
                     return obj
         except Exception as e:
@@ -1374,15 +1494,17 @@ class TravelService:
         
         return default_itinerary
     
-    def get_recommendations(
+    async def get_recommendations(
         self,
         destination: str,
         interests: List[str],
         food_preferences: List[str]
     ) -> Dict[str, List[Dict[str, Any]]]:
-        """获取推荐景点和餐厅"""
-        attractions = self.location_client.search_attractions(destination)
-        restaurants = self.location_client.search_restaurants(destination)
+        """获取推荐景点和餐厅（景点与餐厅并发查询）"""
+        attractions, restaurants = await asyncio.gather(
+            asyncio.to_thread(self.location_client.search_attractions, destination),
+            asyncio.to_thread(self.location_client.search_restaurants, destination),
+        )
         
         # 根据偏好过滤
         filtered_attractions = self._filter_by_interests(attractions, interests)
@@ -1435,3 +1557,15 @@ class TravelService:
                     break
         
         return filtered if filtered else restaurants
+
+
+# ==================== 全局服务实例 ====================
+
+_travel_service = None
+
+def get_travel_service() -> TravelService:
+    """获取全局旅行规划服务实例（单例模式，避免每个请求重复创建 LLM 客户端）"""
+    global _travel_service
+    if _travel_service is None:
+        _travel_service = TravelService()
+    return _travel_service
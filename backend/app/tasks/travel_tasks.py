@@ -1,6 +1,6 @@
 from celery import Celery
 from datetime import date
-from typing import Dict, Any
+from typing import Dict, Any, Union
 from app.config import settings
 from app.services.travel_service import TravelService
 from app.crud import travel_crud
@@ -22,30 +22,40 @@ celery_app.conf.update(
     task_track_started=True,
     task_time_limit=300,  # 5分钟超时
     task_soft_time_limit=240,  # 4分钟软超时
+    # 结果后端连接保活：前端轮询任务状态时复用 TCP 连接
+    redis_socket_keepalive=True,
+    redis_backend_health_check_interval=30,
 )
 
 
+def _to_date(value: Union[int, str]) -> date:
+    """把任务参数中的日期还原为 date（序数整数，或升级前已入队的 ISO 字符串）"""
+    if isinstance(value, int):
+        return date.fromordinal(value)
+    return date.fromisoformat(value)
+
+
 @celery_app.task(name="generate_travel_itinerary", bind=True)
 def generate_travel_itinerary_task(
     self,
     travel_plan_id: int,
-    start_date: str,
-    end_date: str
+    start_date: Union[int, str],
+    end_date: Union[int, str]
 ) -> Dict[str, Any]:
     """
     异步生成旅行路线规划任务
     
     Args:
         travel_plan_id: 旅行规划ID
-        start_date: 出发日期 (YYYY-MM-DD)
-        end_date: 结束日期 (YYYY-MM-DD)
+        start_date: 出发日期（date.toordinal() 序数；兼容旧消息中的 YYYY-MM-DD）
+        end_date: 结束日期（同上）
     
     Returns:
         生成结果字典
     """
     try:
         # 获取旅行规划信息
-        plan = travel_crud.get_travel_plan(travel_plan_id)
+        plan = travel_crud.get_plan_generation_context(travel_plan_id)
         if not plan:
             return {
                 "success": False,
@@ -53,8 +63,8 @@ def generate_travel_itinerary_task(
             }
         
         # 解析日期
-        start = date.fromisoformat(start_date)
-        end = date.fromisoformat(end_date)
+        start = _to_date(start_date)
+        end = _to_date(end_date)
         
         # 初始化服务
         travel_service = TravelService()
@@ -101,9 +111,9 @@ def fetch_attractions_task(
         景点列表
     """
     try:
-        from app.utils.api_clients import LocationAPIClient
+        from app.utils.api_clients import get_location_client
         
-        client = LocationAPIClient()
+        client = get_location_client()
         attractions = client.search_attractions(destination, keyword)
         
         # 保存到数据库
@@ -151,9 +161,9 @@ def fetch_restaurants_task(
         餐厅列表
     """
     try:
-        from app.utils.api_clients import LocationAPIClient
+        from app.utils.api_clients import get_location_client
         
-        client = LocationAPIClient()
+        client = get_location_client()
         restaurants = client.search_restaurants(destination, cuisine_type)
         
         # 保存到数据库
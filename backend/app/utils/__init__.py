@@ -3,6 +3,11 @@ from .api_clients import (
     GooglePlacesClient,
     XiaohongshuClient,
     LocationAPIClient,
+    get_location_client,
+    get_xiaohongshu_client,
+    get_http_session,
+    get_async_http_client,
+    close_async_http_client,
     is_domestic_location,
 )
 
@@ -11,5 +16,10 @@ __all__ = [
     "GooglePlacesClient",
     "XiaohongshuClient",
     "LocationAPIClient",
+    "get_location_client",
+    "get_xiaohongshu_client",
+    "get_http_session",
+    "get_async_http_client",
+    "close_async_http_client",
     "is_domestic_location",
 ]
@@ -1,10 +1,73 @@
 import requests
+from requests.adapters import HTTPAdapter
+import httpx
 import hashlib
 import hmac
+import importlib.util
+import re
 import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict, Optional, Any
 from urllib.parse import quote
 from app.config import settings
+from app.utils.cache import (
+    GEOCODE_LRU_SIZE,
+    PLACE_SEARCH_CACHE_TTL,
+    PLACE_SEARCH_LRU_SIZE,
+    PLACE_SEARCH_LRU_TTL,
+    XHS_CACHE_TTL,
+    XHS_LRU_SIZE,
+    LRUCache,
+    cache_get,
+    cache_set,
+    make_cache_key,
+    normalize_address,
+)
+
+
+# ==================== 共享 HTTP 客户端 ====================
+
+_http_session = None
+
+def get_http_session() -> requests.Session:
+    """获取全局同步 HTTP 会话（单例模式，保持长连接，避免每次请求重新握手 TCP/TLS）"""
+    global _http_session
+    if _http_session is None:
+        _http_session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=10, pool_maxsize=20)
+        _http_session.mount("https://", adapter)
+        _http_session.mount("http://", adapter)
+    return _http_session
+
+
+_async_http_client = None
+
+# HTTP/2 需要 h2 包（httpx[http2]）；未安装时退回 HTTP/1.1 长连接
+_HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+# 高德批量地理编码单次最多 10 个地址
+AMAP_BATCH_GEOCODE_SIZE = 10
+# 批量地理编码逐个请求时（国外地址或高德未命中）的最大并发线程数
+GEOCODE_BATCH_MAX_WORKERS = 8
+
+def get_async_http_client() -> httpx.AsyncClient:
+    """获取全局异步 HTTP 客户端（单例模式，所有请求共用一个连接池；支持时启用 HTTP/2，同一主机的并发请求复用一条连接）"""
+    global _async_http_client
+    if _async_http_client is None:
+        _async_http_client = httpx.AsyncClient(
+            http2=_HTTP2_AVAILABLE,
+            timeout=10,
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=50),
+        )
+    return _async_http_client
+
+
+async def close_async_http_client():
+    """关闭全局异步 HTTP 客户端（应用关闭时调用）"""
+    global _async_http_client
+    if _async_http_client is not None:
+        await _async_http_client.aclose()
+        _async_http_client = None
 
 
 # ==================== 高德地图 API 客户端 ====================
@@ -31,66 +94,110 @@ class AmapClient:
         sign = hashlib.md5(query_string.encode('utf-8')).hexdigest()
         return sign
     
-    def geocode(self, address: str) -> Optional[Dict[str, Any]]:
-        """地理编码：将地址转换为经纬度"""
+    def _geocode_request(self, address: str, batch: bool = False):
+        """构造地理编码请求的 url 和参数（batch=True 时 address 为 | 分隔的多个地址）"""
         url = f"{self.base_url}/geocode/geo"
         params = {
             "key": self.api_key,
             "address": address,
             "output": "json"
         }
+        if batch:
+            params["batch"] = "true"
         
         # 如果配置了安全密钥，使用签名；否则不使用签名（适用于 Web 服务 API Key）
         if self.security_key:
             params["sig"] = self._sign_request(params)
         # 如果没有安全密钥，直接使用 key（某些类型的 API Key 不需要签名）
+        return url, params
+    
+    def _parse_geocode(self, address: str, data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """解析地理编码响应"""
+        # 打印响应状态，便于调试
+        status = data.get("status")
+        info = data.get("info", "")
+        count = data.get("count", 0)
+        print(f"📍 高德API响应：status={status}, info={info}, count={count}")
+        
+        if status == "1" and data.get("geocodes"):
+            geocodes = data.get("geocodes", [])
+            if len(geocodes) > 0:
+                result = self._geocode_entry(geocodes[0])
+                if result:
+                    print(f"✅ 高德地理编码成功：{address} -> ({result['latitude']}, {result['longitude']})")
+                    return result
+            else:
+                print(f"⚠️ 高德返回的 geocodes 数组为空")
+        else:
+            # 高德 API 返回了错误状态
+            error_msg = f"高德API返回错误：status={status}, info={info}"
+            if status == "0":
+                error_msg += f", 可能原因：API Key 无效、签名错误、或地址无法解析"
+            print(f"❌ {error_msg}")
+        
+        return None
+    
+    @staticmethod
+    def _geocode_entry(geocode: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """把 geocodes 中的一项转换为统一结果，没有有效经纬度时返回 None"""
+        location_str = geocode.get("location") or ""
+        # 批量请求中未解析出的地址，location 为空字符串或空列表
+        if not isinstance(location_str, str) or not location_str:
+            print(f"⚠️ 高德返回的 geocode 中没有 location 字段")
+            return None
+        location = location_str.split(",")
+        if len(location) < 2:
+            return None
+        try:
+            longitude = float(location[0])
+            latitude = float(location[1])
+        except (ValueError, IndexError) as e:
+            print(f"❌ 解析高德返回的经纬度失败：location={location_str}, error={e}")
+            return None
+        return {
+            "latitude": latitude,
+            "longitude": longitude,
+            "formatted_address": geocode.get("formatted_address"),
+            "province": geocode.get("province"),
+            "city": geocode.get("city"),
+            "district": geocode.get("district")
+        }
+    
+    def batch_geocode(self, addresses: List[str]) -> List[Optional[Dict[str, Any]]]:
+        """批量地理编码：每 10 个地址合并为一次请求，结果与输入顺序一致，未解析出的地址为 None"""
+        results: List[Optional[Dict[str, Any]]] = []
+        for start in range(0, len(addresses), AMAP_BATCH_GEOCODE_SIZE):
+            chunk = addresses[start:start + AMAP_BATCH_GEOCODE_SIZE]
+            # | 是批量请求的地址分隔符，地址本身含有时替换为空格
+            url, params = self._geocode_request("|".join(a.replace("|", " ") for a in chunk), batch=True)
+            geocodes = []
+            try:
+                print(f"📍 高德批量地理编码请求：{len(chunk)} 个地址")
+                response = get_http_session().get(url, params=params, timeout=10)
+                response.raise_for_status()
+                data = response.json()
+                if data.get("status") == "1":
+                    geocodes = data.get("geocodes") or []
+                else:
+                    print(f"❌ 高德API返回错误：status={data.get('status')}, info={data.get('info', '')}")
+            except requests.exceptions.RequestException as e:
+                print(f"❌ 高德批量地理编码网络请求失败：{e}")
+            except Exception as e:
+                print(f"❌ 高德批量地理编码失败：{e}")
+            # 返回条数不足时（请求失败等），缺少的地址记为未解析
+            geocodes = list(geocodes[:len(chunk)]) + [{}] * (len(chunk) - len(geocodes))
+            results.extend(self._geocode_entry(geocode) if geocode else None for geocode in geocodes)
+        return results
+    
+    def geocode(self, address: str) -> Optional[Dict[str, Any]]:
+        """地理编码：将地址转换为经纬度"""
+        url, params = self._geocode_request(address)
         
         try:
             print(f"📍 高德地理编码请求：address={address}")
-            response = requests.get(url, params=params, timeout=10)
+            response = get_http_session().get(url, params=params, timeout=10)
             response.raise_for_status()
-            data = response.json()
-            
-            # 打印响应状态，便于调试
-            status = data.get("status")
-            info = data.get("info", "")
-            count = data.get("count", 0)
-            print(f"📍 高德API响应：status={status}, info={info}, count={count}")
-            
-            if status == "1" and data.get("geocodes"):
-                geocodes = data.get("geocodes", [])
-                if len(geocodes) > 0:
-                    geocode = geocodes[0]
-                    location_str = geocode.get("location", "")
-                    if location_str:
-                        location = location_str.split(",")
-                        if len(location) >= 2:
-                            try:
-                                longitude = float(location[0])
-                                latitude = float(location[1])
-                                result = {
-                                    "latitude": latitude,
-                                    "longitude": longitude,
-                                    "formatted_address": geocode.get("formatted_address"),
-                                    "province": geocode.get("province"),
-                                    "city": geocode.get("city"),
-                                    "district": geocode.get("district")
-                                }
-                                print(f"✅ 高德地理编码成功：{address} -> ({latitude}, {longitude})")
-                                return result
-                            except (ValueError, IndexError) as e:
-                                print(f"❌ 解析高德返回的经纬度失败：location={location_str}, error={e}")
-                    else:
-                        print(f"⚠️ 高德返回的 geocode 中没有 location 字段")
-                else:
-                    print(f"⚠️ 高德返回的 geocodes 数组为空")
-            else:
-                # 高德 API 返回了错误状态
-                error_msg = f"高德API返回错误：status={status}, info={info}"
-                if status == "0":
-                    error_msg += f", 可能原因：API Key 无效、签名错误、或地址无法解析"
-                print(f"❌ {error_msg}")
-                
+            return self._parse_geocode(address, response.json())
         except requests.exceptions.RequestException as e:
             print(f"❌ 高德地理编码网络请求失败：{e}")
         except Exception as e:
@@ -100,6 +207,24 @@ class AmapClient:
         
         return None
     
+    async def geocode_async(self, address: str) -> Optional[Dict[str, Any]]:
+        """地理编码（异步版本，不阻塞事件循环）"""
+        url, params = self._geocode_request(address)
+        
+        try:
+            print(f"📍 高德地理编码请求：address={address}")
+            response = await get_async_http_client().get(url, params=params)
+            response.raise_for_status()
+            return self._parse_geocode(address, response.json())
+        except httpx.HTTPError as e:
+            print(f"❌ 高德地理编码网络请求失败：{e}")
+        except Exception as e:
+            print(f"❌ 高德地理编码失败：{e}")
+            import traceback
+            traceback.print_exc()
+        
+        return None
+    
     def search_places(
         self,
         keywords: str,
@@ -129,7 +254,7 @@ class AmapClient:
         
         try:
             print(f"🔍 高德搜索地点：keywords={keywords}, city={city}, types={types}")
-            response = requests.get(url, params=params, timeout=10)
+            response = get_http_session().get(url, params=params, timeout=10)
             response.raise_for_status()
             data = response.json()
             
@@ -187,16 +312,11 @@ class MapboxGeocodingClient:
         """检查Mapbox API是否可用"""
         return self.access_token is not None and self.access_token.strip() != ""
     
-    def geocode(self, address: str) -> Optional[Dict[str, Any]]:
-        """地理编码：将地址转换为经纬度"""
-        if not self.is_available():
-            print("⚠️ Mapbox Token 未配置，无法使用地理编码")
-            return None
-        
+    def _geocode_request(self, address: str):
+        """构造地理编码请求，返回 (url, params, is_domestic)"""
         # Mapbox Geocoding API: forward geocoding
         # 对于中文地址，添加国家/地区限定以提高准确性
         # 如果地址包含明确的国内城市关键词，添加 country=CN 限定
-        from app.utils.api_clients import is_domestic_location
         is_domestic = is_domestic_location(address)
         country_code = "CN" if is_domestic else None
         
@@ -228,52 +348,83 @@ class MapboxGeocodingClient:
         if country_code:
             params["country"] = country_code
         
-        try:
-            print(f"📍 Mapbox地理编码请求：address={address}, query_address={query_address}, country={country_code}")
-            response = requests.get(url, params=params, timeout=10)
-            response.raise_for_status()
-            data = response.json()
+        print(f"📍 Mapbox地理编码请求：address={address}, query_address={query_address}, country={country_code}")
+        return url, params, is_domestic
+    
+    def _parse_geocode(self, address: str, data: Dict[str, Any], is_domestic: bool) -> Optional[Dict[str, Any]]:
+        """解析地理编码响应"""
+        if data.get("features") and len(data["features"]) > 0:
+            # 对于国内地址，优先选择中国的结果
+            features = data.get("features", [])
+            selected_feature = None
             
-            if data.get("features") and len(data["features"]) > 0:
-                # 对于国内地址，优先选择中国的结果
-                features = data.get("features", [])
-                selected_feature = None
-                
-                if is_domestic:
-                    # 查找包含 "China" 或 "CN" 的结果
-                    for feature in features:
-                        context = feature.get("context", [])
-                        place_name = feature.get("place_name", "").lower()
-                        # 检查是否是中国
-                        is_china = any(
-                            ctx.get("id", "").startswith("country") and "cn" in ctx.get("short_code", "").lower()
-                            for ctx in context
-                        ) or "china" in place_name or "中国" in place_name
-                        
-                        if is_china:
-                            selected_feature = feature
-                            break
+            if is_domestic:
+                # 查找包含 "China" 或 "CN" 的结果
+                for feature in features:
+                    context = feature.get("context", [])
+                    place_name = feature.get("place_name", "").lower()
+                    # 检查是否是中国
+                    is_china = any(
+                        ctx.get("id", "").startswith("country") and "cn" in ctx.get("short_code", "").lower()
+                        for ctx in context
+                    ) or "china" in place_name or "中国" in place_name
                     
-                    # 如果没找到明确的中国结果，使用第一个
-                    if not selected_feature and features:
-                        selected_feature = features[0]
-                        print(f"⚠️ Mapbox未找到明确的中国结果，使用第一个结果")
-                else:
-                    selected_feature = features[0]
+                    if is_china:
+                        selected_feature = feature
+                        break
                 
-                if selected_feature:
-                    coordinates = selected_feature.get("geometry", {}).get("coordinates", [])
-                    if len(coordinates) >= 2:
-                        result = {
-                            "latitude": float(coordinates[1]),
-                            "longitude": float(coordinates[0]),
-                            "formatted_address": selected_feature.get("place_name"),
-                            "place_id": selected_feature.get("id")
-                        }
-                        print(f"✅ Mapbox地理编码成功：{address} -> ({result['latitude']}, {result['longitude']}) - {result['formatted_address']}")
-                        return result
+                # 如果没找到明确的中国结果，使用第一个
+                if not selected_feature and features:
+                    selected_feature = features[0]
+                    print(f"⚠️ Mapbox未找到明确的中国结果，使用第一个结果")
             else:
-                print(f"⚠️ Mapbox未找到匹配结果：{address}")
+                selected_feature = features[0]
+            
+            if selected_feature:
+                coordinates = selected_feature.get("geometry", {}).get("coordinates", [])
+                if len(coordinates) >= 2:
+                    result = {
+                        "latitude": float(coordinates[1]),
+                        "longitude": float(coordinates[0]),
+                        "formatted_address": selected_feature.get("place_name"),
+                        "place_id": selected_feature.get("id")
+                    }
+                    print(f"✅ Mapbox地理编码成功：{address} -> ({result['latitude']}, {result['longitude']}) - {result['formatted_address']}")
+                    return result
+        else:
+            print(f"⚠️ Mapbox未找到匹配结果：{address}")
+        
+        return None
+    
+    def geocode(self, address: str) -> Optional[Dict[str, Any]]:
+        """地理编码：将地址转换为经纬度"""
+        if not self.is_available():
+            print("⚠️ Mapbox Token 未配置，无法使用地理编码")
+            return None
+        
+        try:
+            url, params, is_domestic = self._geocode_request(address)
+            response = get_http_session().get(url, params=params, timeout=10)
+            response.raise_for_status()
+            return self._parse_geocode(address, response.json(), is_domestic)
+        except Exception as e:
+            print(f"❌ Mapbox地理编码失败：{e}")
+            import traceback
+            traceback.print_exc()
+        
+        return None
+    
+    async def geocode_async(self, address: str) -> Optional[Dict[str, Any]]:
+        """地理编码（异步版本，不阻塞事件循环）"""
+        if not self.is_available():
+            print("⚠️ Mapbox Token 未配置，无法使用地理编码")
+            return None
+        
+        try:
+            url, params, is_domestic = self._geocode_request(address)
+            response = await get_async_http_client().get(url, params=params)
+            response.raise_for_status()
+            return self._parse_geocode(address, response.json(), is_domestic)
         except Exception as e:
             print(f"❌ Mapbox地理编码失败：{e}")
             import traceback
@@ -295,32 +446,54 @@ class GooglePlacesClient:
         """检查Google Places API是否可用"""
         return self.api_key is not None and self.api_key.strip() != ""
     
-    def geocode(self, address: str) -> Optional[Dict[str, Any]]:
-        """地理编码（使用正确的Google Geocoding API URL）"""
-        if not self.is_available():
-            return None
-        
+    def _geocode_request(self, address: str):
+        """构造地理编码请求的 url 和参数"""
         # 使用正确的 Google Geocoding API URL（不是 /place/geocode）
         url = f"{self.base_url}/geocode/json"
         params = {
             "address": address,
             "key": self.api_key
         }
+        return url, params
+    
+    def _parse_geocode(self, data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """解析地理编码响应"""
+        if data.get("status") == "OK" and data.get("results"):
+            result = data["results"][0]
+            location = result["geometry"]["location"]
+            return {
+                "latitude": location.get("lat"),
+                "longitude": location.get("lng"),
+                "formatted_address": result.get("formatted_address"),
+                "place_id": result.get("place_id")
+            }
+        return None
+    
+    def geocode(self, address: str) -> Optional[Dict[str, Any]]:
+        """地理编码（使用正确的Google Geocoding API URL）"""
+        if not self.is_available():
+            return None
         
+        url, params = self._geocode_request(address)
         try:
-            response = requests.get(url, params=params, timeout=10)
+            response = get_http_session().get(url, params=params, timeout=10)
             response.raise_for_status()
-            data = response.json()
-            
-            if data.get("status") == "OK" and data.get("results"):
-                result = data["results"][0]
-                location = result["geometry"]["location"]
-                return {
-                    "latitude": location.get("lat"),
-                    "longitude": location.get("lng"),
-                    "formatted_address": result.get("formatted_address"),
-                    "place_id": result.get("place_id")
-                }
+            return self._parse_geocode(response.json())
+        except Exception as e:
+            print(f"❌ Google地理编码失败：{e}")
+        
+        return None
+    
+    async def geocode_async(self, address: str) -> Optional[Dict[str, Any]]:
+        """地理编码（异步版本，不阻塞事件循环）"""
+        if not self.is_available():
+            return None
+        
+        url, params = self._geocode_request(address)
+        try:
+            response = await get_async_http_client().get(url, params=params)
+            response.raise_for_status()
+            return self._parse_geocode(response.json())
         except Exception as e:
             print(f"❌ Google地理编码失败：{e}")
         
@@ -349,7 +522,7 @@ class GooglePlacesClient:
             params["type"] = type
         
         try:
-            response = requests.get(url, params=params, timeout=10)
+            response = get_http_session().get(url, params=params, timeout=10)
             response.raise_for_status()
             data = response.json()
             
@@ -385,32 +558,29 @@ class GooglePlacesClient:
 
 # ==================== 小红书 API 客户端 ====================
 
+# 小红书链接：短链接 http://xhslink.com/o/xxxxx，或完整链接 https://www.xiaohongshu.com/explore/xxxxx
+# （允许链接前后夹带分享文案，查询参数不计入笔记ID）
+_XHS_URL_RE = re.compile(
+    r"https?://(?:"
+    r"xhslink\.com/(?:[A-Za-z]/)?(?P<short_id>[A-Za-z0-9]+)"
+    r"|(?:www\.)?xiaohongshu\.com/(?:explore|discovery/item)/(?P<note_id>[0-9A-Za-z]+)"
+    r")"
+)
+
+
 class XiaohongshuClient:
     """小红书API客户端（用于获取笔记内容）"""
     
     def __init__(self):
         self.base_url = "https://edith.xiaohongshu.com"
     
-    def extract_note_id(self, url: str) -> Optional[str]:
-        """从小红书链接中提取笔记ID"""
-        # 小红书链接格式：http://xhslink.com/o/xxxxx
-        # 或者：https://www.xiaohongshu.com/explore/xxxxx
-        try:
-            if "xhslink.com" in url:
-                # 需要解析短链接，这里简化处理
-                parts = url.split("/")
-                if len(parts) > 0:
-                    return parts[-1]
-            elif "xiaohongshu.com" in url:
-                parts = url.split("/")
-                if "explore" in parts:
-                    idx = parts.index("explore")
-                    if idx + 1 < len(parts):
-                        return parts[idx + 1]
-        except Exception as e:
-            print(f"❌ 提取小红书笔记ID失败：{e}")
-        
-        return None
+    @staticmethod
+    def extract_note_id(url: str) -> Optional[str]:
+        """从小红书链接中提取笔记ID，链接格式不合法时返回 None（不发起任何请求）"""
+        match = _XHS_URL_RE.search(url or "")
+        if not match:
+            return None
+        return match.group("note_id") or match.group("short_id")
     
     def get_note_content(self, note_url: str) -> Optional[Dict[str, Any]]:
         """获取小红书笔记内容（需要实际的小红书API，这里返回模拟数据）"""
@@ -430,7 +600,7 @@ class XiaohongshuClient:
             "tags": []
         }
     
-    def get_note_cdata(self, note_url: str) -> Optional[Dict[str, Any]]:
+    def get_note_cdata(self, note_url: str, include_raw: bool = False) -> Optional[Dict[str, Any]]:
         """
         获取小红书笔记的CDATA内容（作为知识库使用）
         CDATA包含笔记的详细结构化数据，包括：
@@ -439,6 +609,7 @@ class XiaohongshuClient:
         - 标签、话题
         - 地理位置信息
         - 推荐理由等
+        raw_content（完整原始正文，体积最大）默认不返回，include_raw=True 时才保留
         """
         try:
             note_id = self.extract_note_id(note_url)
@@ -481,6 +652,9 @@ class XiaohongshuClient:
                 "raw_content": "完整的笔记正文内容，包含所有详细信息..."
             }
             
+            if not include_raw:
+                cdata.pop("raw_content", None)
+            
             print(f"✅ 获取小红书笔记CDATA成功：note_id={note_id}")
             return cdata
             
@@ -491,6 +665,39 @@ class XiaohongshuClient:
             return None
 
 
+def xiaohongshu_cache_key(note_url: str) -> Optional[str]:
+    """小红书笔记缓存键：按笔记ID而非原始链接，链接上的分享参数不同也能命中；无法提取ID时返回 None"""
+    note_id = XiaohongshuClient.extract_note_id(note_url or "")
+    return f"xhs:{note_id}" if note_id else None
+
+
+# 小红书笔记 CDATA 进程内缓存（按笔记ID，短链接和完整链接指向同一笔记时共用）
+_xhs_cdata_cache = LRUCache(XHS_LRU_SIZE, ttl=XHS_CACHE_TTL)
+
+
+def get_note_cdata_cached(note_url: str, include_raw: bool = False) -> Optional[Dict[str, Any]]:
+    """
+    带两级缓存（进程内 LRU + Redis）获取小红书笔记 CDATA，LangChain 工具和 FunctionExecutor 共用
+    链接无法提取笔记ID或获取失败时返回 None（失败结果不缓存）
+    """
+    cache_key = xiaohongshu_cache_key(note_url)
+    if not cache_key:
+        return None
+    # 带 raw_content 的完整结果单独缓存，默认缓存的是不含原文的精简结果
+    if include_raw:
+        cache_key += ":raw"
+    result = _xhs_cdata_cache.get(cache_key) or cache_get(cache_key)
+    if result:
+        _xhs_cdata_cache.set(cache_key, result)
+        return result
+    result = get_xiaohongshu_client().get_note_cdata(note_url, include_raw=include_raw)
+    if not result:
+        return None
+    _xhs_cdata_cache.set(cache_key, result)
+    cache_set(cache_key, result, XHS_CACHE_TTL)
+    return result
+
+
 # ==================== 地点判断工具 ====================
 
 def is_domestic_location(location: str) -> bool:
@@ -539,9 +746,80 @@ class LocationAPIClient:
         self.amap_client = AmapClient()
         self.mapbox_client = MapboxGeocodingClient()
         self.google_client = GooglePlacesClient()  # 保留作为备选
+        # 地理编码结果进程内缓存（只缓存成功结果），同一地址重复查询不再请求外部API
+        self._geocode_cache = LRUCache(GEOCODE_LRU_SIZE)
+        # 景点/餐厅搜索结果两级缓存：进程内短期 LRU，其后是 Redis（目的地集中在少数热门城市）
+        self._search_cache = LRUCache(PLACE_SEARCH_LRU_SIZE, ttl=PLACE_SEARCH_LRU_TTL)
+    
+    @staticmethod
+    def _geocode_key(address: str, location: Optional[str]):
+        """归一化地理编码缓存键（忽略大小写、空白和标点）"""
+        return (normalize_address(address), normalize_address(location))
     
     def geocode(self, address: str, location: Optional[str] = None) -> Optional[Dict[str, Any]]:
         """地理编码：优先使用高德（国内）或Mapbox（国外）"""
+        key = self._geocode_key(address, location)
+        result = self._geocode_cache.get(key)
+        if result is None:
+            result = self._geocode(address, location)
+            if result:
+                self._geocode_cache.set(key, result)
+        return result
+    
+    async def geocode_async(self, address: str, location: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """地理编码（异步版本）：选择逻辑与 geocode 相同，共用同一份缓存"""
+        key = self._geocode_key(address, location)
+        result = self._geocode_cache.get(key)
+        if result is None:
+            result = await self._geocode_async(address, location)
+            if result:
+                self._geocode_cache.set(key, result)
+        return result
+    
+    def batch_geocode(self, addresses: List[str], location: Optional[str] = None) -> List[Optional[Dict[str, Any]]]:
+        """
+        批量地理编码：结果与输入顺序一致，失败项为 None。
+        先查进程内缓存，未命中的地址去重后处理：国内走高德批量接口（每 10 个一次请求），
+        高德未解析出的地址和国外地址再并发逐个请求（含 Mapbox/Google 备选）
+        """
+        keys = [self._geocode_key(address, location) for address in addresses]
+        resolved = {}
+        pending = {}
+        for key, address in zip(keys, addresses):
+            if key in resolved or key in pending:
+                continue
+            cached = self._geocode_cache.get(key)
+            if cached is not None:
+                resolved[key] = cached
+            else:
+                pending[key] = address
+        
+        # 与 _geocode 一致按地址判断国内外（指定了 location 时按 location），只有国内地址走高德批量接口
+        domestic = [key for key, address in pending.items() if is_domestic_location(location or address)]
+        if domestic:
+            batch_results = self.amap_client.batch_geocode([pending[key] for key in domestic])
+            for key, result in zip(domestic, batch_results):
+                if result:
+                    resolved[key] = result
+                    self._geocode_cache.set(key, result)
+                    del pending[key]
+        
+        def geocode_one(address: str):
+            try:
+                return self.geocode(address, location=location)
+            except Exception:
+                return None
+        
+        if pending:
+            with ThreadPoolExecutor(max_workers=min(GEOCODE_BATCH_MAX_WORKERS, len(pending))) as executor:
+                single_results = executor.map(geocode_one, pending.values())
+                for key, result in zip(list(pending), single_results):
+                    resolved[key] = result
+        
+        return [resolved.get(key) for key in keys]
+    
+    def _geocode(self, address: str, location: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """地理编码（不经过缓存）"""
         is_domestic = is_domestic_location(address) if not location else is_domestic_location(location)
         
         print(f"🌍 地理编码请求：address={address}, location={location}, is_domestic={is_domestic}")
@@ -562,8 +840,48 @@ class LocationAPIClient:
             # Mapbox 不可用时，尝试 Google（如果配置了）
             return self.google_client.geocode(address)
     
+    async def _geocode_async(self, address: str, location: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """地理编码（异步版本，不经过缓存）"""
+        is_domestic = is_domestic_location(address) if not location else is_domestic_location(location)
+        
+        print(f"🌍 地理编码请求：address={address}, location={location}, is_domestic={is_domestic}")
+        
+        if is_domestic:
+            result = await self.amap_client.geocode_async(address)
+            if not result:
+                print(f"⚠️ 高德地理编码失败，尝试使用 Mapbox 作为备选")
+                result = await self.mapbox_client.geocode_async(address)
+            return result
+        else:
+            result = await self.mapbox_client.geocode_async(address)
+            if result:
+                return result
+            return await self.google_client.geocode_async(address)
+    
+    def _cached_search(self, kind: str, city: str, keyword: Optional[str], fetch) -> List[Dict[str, Any]]:
+        """按归一化的 (城市, 关键词) 缓存搜索结果；空结果（多为请求失败）不缓存。返回副本，调用方可就地补充字段"""
+        key = make_cache_key(f"search:{kind}", normalize_address(city), normalize_address(keyword))
+        results = self._search_cache.get(key)
+        if results is None:
+            results = cache_get(key)
+            if results is None:
+                results = fetch(city, keyword)
+                if not results:
+                    return []
+                cache_set(key, results, PLACE_SEARCH_CACHE_TTL)
+            self._search_cache.set(key, results)
+        return [dict(item) if isinstance(item, dict) else item for item in results]
+    
     def search_attractions(self, city: str, keyword: Optional[str] = None) -> List[Dict[str, Any]]:
-        """搜索景点"""
+        """搜索景点（带缓存）"""
+        return self._cached_search("attractions", city, keyword, self._search_attractions)
+    
+    def search_restaurants(self, city: str, cuisine_type: Optional[str] = None) -> List[Dict[str, Any]]:
+        """搜索餐厅（带缓存）"""
+        return self._cached_search("restaurants", city, cuisine_type, self._search_restaurants)
+    
+    def _search_attractions(self, city: str, keyword: Optional[str] = None) -> List[Dict[str, Any]]:
+        """搜索景点（不经过缓存）"""
         is_domestic = is_domestic_location(city)
         
         if is_domestic:
@@ -572,8 +890,8 @@ class LocationAPIClient:
             # 国外暂时使用 Google（Mapbox 主要提供地理编码，搜索功能需要 Places API）
             return self.google_client.search_attractions(city, keyword)
     
-    def search_restaurants(self, city: str, cuisine_type: Optional[str] = None) -> List[Dict[str, Any]]:
-        """搜索餐厅"""
+    def _search_restaurants(self, city: str, cuisine_type: Optional[str] = None) -> List[Dict[str, Any]]:
+        """搜索餐厅（不经过缓存）"""
         is_domestic = is_domestic_location(city)
         
         if is_domestic:
@@ -581,3 +899,25 @@ class LocationAPIClient:
         else:
             # 国外暂时使用 Google（Mapbox 主要提供地理编码，搜索功能需要 Places API）
             return self.google_client.search_restaurants(city, cuisine_type)
+
+
+# ==================== 全局客户端实例 ====================
+
+_location_client = None
+
+def get_location_client() -> LocationAPIClient:
+    """获取全局地点API客户端实例（单例模式，复用底层连接）"""
+    global _location_client
+    if _location_client is None:
+        _location_client = LocationAPIClient()
+    return _location_client
+
+
+_xiaohongshu_client = None
+
+def get_xiaohongshu_client() -> XiaohongshuClient:
+    """获取全局小红书客户端实例（单例模式）"""
+    global _xiaohongshu_client
+    if _xiaohongshu_client is None:
+        _xiaohongshu_client = XiaohongshuClient()
+    return _xiaohongshu_client
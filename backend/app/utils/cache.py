@@ -0,0 +1,169 @@
+"""
+Redis 缓存工具
+缓存只用于加速：Redis 不可用时读写都会静默降级为“未命中”，不影响主流程
+"""
+
+import hashlib
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+import orjson
+import redis
+import redis.asyncio as aioredis
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+# ==================== 缓存有效期（秒）====================
+
+GEOCODE_CACHE_TTL = 86400 * 30  # 地址 -> 经纬度基本不变，缓存30天
+PLAN_CACHE_TTL = 60  # 旅行规划详情
+SEARCH_CACHE_TTL = 60  # 景点搜索结果
+XHS_CACHE_TTL = 86400  # 小红书笔记内容，按笔记ID缓存1天
+ITINERARY_CACHE_TTL = 14400  # LLM 生成的路线文本，相同提示词4小时内直接复用
+PLACE_SEARCH_CACHE_TTL = 86400  # 地图API的景点/餐厅搜索结果（按城市+关键词），缓存1天
+PLACE_SEARCH_LRU_TTL = 600  # 进程内只保留10分钟，热门城市连 Redis 往返也省去
+
+# 进程内缓存容量
+GEOCODE_LRU_SIZE = 4096
+USER_ID_LRU_SIZE = 1024
+SEARCH_LRU_SIZE = 2048
+XHS_LRU_SIZE = 512
+PLACE_SEARCH_LRU_SIZE = 256
+
+
+# ==================== Redis 客户端 ====================
+
+_redis = None
+_async_redis = None
+
+def _redis_kwargs() -> dict:
+    """同步/异步客户端共用的连接参数"""
+    return dict(
+        host=settings.REDIS_HOST,
+        port=settings.REDIS_PORT,
+        db=settings.REDIS_DB,
+        password=settings.REDIS_PASSWORD,
+        socket_connect_timeout=1,
+        socket_timeout=1,
+    )
+
+
+def get_redis() -> redis.Redis:
+    """获取全局同步 Redis 客户端（单例模式，供 Agent 工具等同步代码使用）"""
+    global _redis
+    if _redis is None:
+        _redis = redis.Redis(**_redis_kwargs())
+    return _redis
+
+
+def get_async_redis() -> aioredis.Redis:
+    """获取全局异步 Redis 客户端（单例模式，复用连接池）"""
+    global _async_redis
+    if _async_redis is None:
+        _async_redis = aioredis.Redis(**_redis_kwargs())
+    return _async_redis
+
+
+def make_cache_key(prefix: str, *parts: Any) -> str:
+    """根据参数生成定长缓存键：prefix:<blake2s(参数)>"""
+    raw = "|".join("" if part is None else str(part) for part in parts)
+    return f"{prefix}:{hashlib.blake2s(raw.encode('utf-8')).hexdigest()}"
+
+
+_ADDRESS_NOISE = re.compile(r"[\s,，。、;；:：!！?？'\"“”‘’()（）\[\]【】]+")
+
+def normalize_address(text: Optional[str]) -> str:
+    """归一化地址用作缓存键：忽略大小写、空白和标点，使写法略有差异的同一地址命中同一条缓存"""
+    return _ADDRESS_NOISE.sub("", text or "").lower()
+
+
+def geocode_cache_key(address: Optional[str], location: Optional[str] = None) -> str:
+    """地理编码缓存键（接口与 Agent 工具共用，同一地址只需解析一次）"""
+    return make_cache_key("geo", normalize_address(address), normalize_address(location))
+
+
+# ==================== 读写 ====================
+
+def cache_get(key: str) -> Optional[Any]:
+    """读取缓存（JSON，同步版本），未命中或 Redis 不可用时返回 None"""
+    try:
+        value = get_redis().get(key)
+    except Exception as e:
+        logger.warning("⚠️ 读取缓存失败：%s", e)
+        return None
+    return orjson.loads(value) if value else None
+
+
+def cache_set(key: str, value: Any, ttl: int) -> None:
+    """写入缓存（JSON，同步版本），Redis 不可用时忽略"""
+    try:
+        get_redis().set(key, orjson.dumps(value), ex=ttl)
+    except Exception as e:
+        logger.warning("⚠️ 写入缓存失败：%s", e)
+
+
+async def async_cache_get_raw(key: str) -> Optional[bytes]:
+    """读取缓存原始 JSON 字节（不解析，可直接作为响应体），未命中或 Redis 不可用时返回 None"""
+    try:
+        return await get_async_redis().get(key) or None
+    except Exception as e:
+        logger.warning("⚠️ 读取缓存失败：%s", e)
+        return None
+
+
+async def async_cache_get(key: str) -> Optional[Any]:
+    """读取缓存（JSON），未命中或 Redis 不可用时返回 None"""
+    value = await async_cache_get_raw(key)
+    return orjson.loads(value) if value else None
+
+
+async def async_cache_set(key: str, value: Any, ttl: int) -> None:
+    """写入缓存（JSON；传入 bytes 时视为已序列化的 JSON 原样写入），Redis 不可用时忽略"""
+    try:
+        await get_async_redis().set(key, value if isinstance(value, bytes) else orjson.dumps(value), ex=ttl)
+    except Exception as e:
+        logger.warning("⚠️ 写入缓存失败：%s", e)
+
+
+# ==================== 进程内 LRU 缓存 ====================
+
+class LRUCache:
+    """线程安全的进程内 LRU 缓存（容量满时淘汰最久未使用的条目；指定 ttl 时条目到期后视为未命中）"""
+    
+    def __init__(self, maxsize: int, ttl: Optional[float] = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key: Hashable) -> Optional[Any]:
+        """读取缓存，未命中或已过期返回 None"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at is not None and expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+    
+    def set(self, key: Hashable, value: Any) -> None:
+        """写入缓存"""
+        expires_at = time.monotonic() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            if len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+    
+    def clear(self) -> None:
+        """清空缓存（数据变更后使旧结果失效）"""
+        with self._lock:
+            self._data.clear()
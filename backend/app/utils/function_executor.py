@@ -3,11 +3,8 @@ Function Calling 执行器
 提供统一的函数调用接口，包括参数验证、错误处理、重试机制和缓存
 """
 
-import json
-import time
-import hashlib
-from typing import Dict, Any, Optional, Callable
-from functools import wraps, lru_cache
+from typing import Dict, Any, List, Optional, Callable
+from functools import wraps
 from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
 import requests
 from app.utils.function_schemas import (
@@ -15,7 +12,8 @@ from app.utils.function_schemas import (
     get_function_schema,
     FUNCTION_SCHEMA_MAP
 )
-from app.utils.api_clients import LocationAPIClient, XiaohongshuClient
+from app.utils.api_clients import get_location_client, get_note_cdata_cached, get_xiaohongshu_client
+from app.utils.cache import LRUCache, geocode_cache_key, make_cache_key
 
 
 class FunctionExecutionError(Exception):
@@ -30,40 +28,38 @@ class FunctionValidationError(Exception):
 
 # ==================== 缓存装饰器 ====================
 
-def cached_function_call(ttl: int = 3600):
+def cached_function_call(ttl: int = 3600, maxsize: int = 1024, key: Optional[Callable[..., Any]] = None):
     """
-    缓存函数调用结果（基于参数哈希）
+    缓存函数调用结果（进程内 LRU，只缓存成功结果）
     
     Args:
         ttl: 缓存有效期（秒），默认1小时
+        maxsize: 最多缓存的条目数
+        key: 可选，根据调用参数生成缓存键（用于归一化参数）；默认按参数值生成
     """
-    cache = {}
+    cache = LRUCache(maxsize, ttl=ttl)
     
     def decorator(func: Callable):
         @wraps(func)
-        def wrapper(*args, **kwargs):
-            # 生成缓存键
-            cache_key = hashlib.md5(
-                json.dumps({
-                    "func": func.__name__,
-                    "args": args,
-                    "kwargs": kwargs
-                }, sort_keys=True).encode()
-            ).hexdigest()
+        def wrapper(self, *args, **kwargs):
+            # 生成缓存键（不含 self，实例不参与键计算）
+            cache_key = key(*args, **kwargs) if key else None
+            if cache_key is None:
+                cache_key = make_cache_key(
+                    func.__name__, *args, *(f"{name}={value}" for name, value in sorted(kwargs.items()))
+                )
             
             # 检查缓存
-            if cache_key in cache:
-                cached_result, cached_time = cache[cache_key]
-                if time.time() - cached_time < ttl:
-                    return cached_result
-                else:
-                    del cache[cache_key]
+            cached_result = cache.get(cache_key)
+            if cached_result is not None:
+                return cached_result
             
             # 执行函数
-            result = func(*args, **kwargs)
+            result = func(self, *args, **kwargs)
             
-            # 存储到缓存
-            cache[cache_key] = (result, time.time())
+            # 存储到缓存（失败时函数抛出异常，不会进入缓存，下次调用会重新请求）
+            if result is not None:
+                cache.set(cache_key, result)
             
             return result
         
@@ -94,8 +90,9 @@ class FunctionExecutor:
     """函数执行器，统一管理所有可调用函数"""
     
     def __init__(self):
-        self.location_client = LocationAPIClient()
-        self.xiaohongshu_client = XiaohongshuClient()
+        # 复用全局客户端，与 Agent 工具、API 路由共享连接池和地理编码缓存
+        self.location_client = get_location_client()
+        self.xiaohongshu_client = get_xiaohongshu_client()
         self._function_map = {
             "geocode": self._execute_geocode,
             "search_attractions": self._execute_search_attractions,
@@ -104,7 +101,7 @@ class FunctionExecutor:
             "get_xiaohongshu_cdata": self._execute_get_xiaohongshu_cdata,
         }
     
-    def execute(self, function_name: str, arguments: Dict[str, Any]) -> Dict[str, Any]:
+    def execute(self, function_name: str, arguments: Dict[str, Any]) -> Any:
         """
         执行函数调用
         
@@ -113,14 +110,15 @@ class FunctionExecutor:
             arguments: 函数参数（字典格式）
         
         Returns:
-            函数执行结果
+            函数执行结果数据（成功时直接返回数据本身，失败一律抛出异常）
         
         Raises:
             FunctionValidationError: 参数验证失败
-            FunctionExecutionError: 函数执行失败
+            FunctionExecutionError: 函数执行失败或无结果
         """
         # 1. 验证函数是否存在
-        if function_name not in self._function_map:
+        func = self._function_map.get(function_name)
+        if func is None:
             raise FunctionValidationError(f"未知的函数：{function_name}")
         
         # 2. 验证参数
@@ -130,44 +128,15 @@ class FunctionExecutor:
         
         # 3. 执行函数
         try:
-            func = self._function_map[function_name]
-            result = func(**arguments)
-            
-            # 4. 标准化返回格式
-            return self._format_result(result, function_name)
-        
+            return func(**arguments)
+        except FunctionExecutionError:
+            raise
         except Exception as e:
             raise FunctionExecutionError(f"执行函数 {function_name} 失败：{str(e)}")
     
-    def _format_result(self, result: Any, function_name: str) -> Dict[str, Any]:
-        """标准化返回格式"""
-        if result is None:
-            return {
-                "success": False,
-                "data": None,
-                "error": "函数返回空结果"
-            }
-        
-        if isinstance(result, dict):
-            # 如果已经是字典，添加 success 字段
-            if "success" not in result:
-                result["success"] = True
-            return result
-        elif isinstance(result, list):
-            return {
-                "success": True,
-                "data": result,
-                "count": len(result)
-            }
-        else:
-            return {
-                "success": True,
-                "data": result
-            }
-    
     # ==================== 具体函数实现 ====================
     
-    @cached_function_call(ttl=3600)  # 缓存1小时
+    @cached_function_call(ttl=3600, key=geocode_cache_key)  # 缓存1小时，地址归一化后作为键
     @retry_on_network_error(max_attempts=3)
     def _execute_geocode(self, address: str, location: Optional[str] = None) -> Dict[str, Any]:
         """执行地理编码"""
@@ -176,48 +145,30 @@ class FunctionExecutor:
         
         result = self.location_client.geocode(address, location=location)
         if not result:
-            return {
-                "success": False,
-                "data": None,
-                "error": f"无法解析地址：{address}"
-            }
-        
-        return {
-            "success": True,
-            "data": result
-        }
+            raise FunctionExecutionError(f"无法解析地址：{address}")
+        return result
     
     @cached_function_call(ttl=1800)  # 缓存30分钟
     @retry_on_network_error(max_attempts=3)
-    def _execute_search_attractions(self, city: str, keyword: Optional[str] = None) -> Dict[str, Any]:
+    def _execute_search_attractions(self, city: str, keyword: Optional[str] = None) -> List[Dict[str, Any]]:
         """执行景点搜索"""
         if not city or not city.strip():
             raise ValueError("城市名称不能为空")
         
-        results = self.location_client.search_attractions(city, keyword)
-        return {
-            "success": True,
-            "data": results,
-            "count": len(results) if results else 0
-        }
+        return self.location_client.search_attractions(city, keyword) or []
     
     @cached_function_call(ttl=1800)  # 缓存30分钟
     @retry_on_network_error(max_attempts=3)
-    def _execute_search_restaurants(self, city: str, cuisine_type: Optional[str] = None) -> Dict[str, Any]:
+    def _execute_search_restaurants(self, city: str, cuisine_type: Optional[str] = None) -> List[Dict[str, Any]]:
         """执行餐厅搜索"""
         if not city or not city.strip():
             raise ValueError("城市名称不能为空")
         
-        results = self.location_client.search_restaurants(city, cuisine_type)
-        return {
-            "success": True,
-            "data": results,
-            "count": len(results) if results else 0
-        }
+        return self.location_client.search_restaurants(city, cuisine_type) or []
     
     @cached_function_call(ttl=1800)  # 缓存30分钟
     @retry_on_network_error(max_attempts=3)
-    def _execute_search_places(self, keywords: str, city: Optional[str] = None, types: Optional[str] = None) -> Dict[str, Any]:
+    def _execute_search_places(self, keywords: str, city: Optional[str] = None, types: Optional[str] = None) -> List[Dict[str, Any]]:
         """执行通用地点搜索"""
         if not keywords or not keywords.strip():
             raise ValueError("搜索关键词不能为空")
@@ -225,37 +176,22 @@ class FunctionExecutor:
         # 使用高德地图的 search_places 方法
         # LocationAPIClient 内部有 amap_client，可以直接调用
         amap_client = self.location_client.amap_client
-        results = amap_client.search_places(
+        return amap_client.search_places(
             keywords=keywords,
             city=city,
             types=types
-        )
-        
-        return {
-            "success": True,
-            "data": results,
-            "count": len(results) if results else 0
-        }
+        ) or []
     
-    @cached_function_call(ttl=7200)  # 缓存2小时（小红书内容变化较少）
     @retry_on_network_error(max_attempts=3)
     def _execute_get_xiaohongshu_cdata(self, note_url: str) -> Dict[str, Any]:
-        """执行获取小红书CDATA"""
+        """执行获取小红书CDATA（与 get_xiaohongshu_cdata 工具共用进程内 LRU + Redis 缓存，按笔记ID作为键）"""
         if not note_url or not note_url.strip():
             raise ValueError("笔记URL不能为空")
         
-        result = self.xiaohongshu_client.get_note_cdata(note_url)
+        result = get_note_cdata_cached(note_url)
         if not result:
-            return {
-                "success": False,
-                "data": None,
-                "error": f"无法获取小红书笔记：{note_url}"
-            }
-        
-        return {
-            "success": True,
-            "data": result
-        }
+            raise FunctionExecutionError(f"无法获取小红书笔记：{note_url}")
+        return result
 
 
 # ==================== 全局执行器实例 ====================
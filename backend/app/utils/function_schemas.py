@@ -156,6 +156,8 @@ def validate_function_args(function_name: str, args: Dict[str, Any]) -> tuple[bo
     for param_name, param_value in args.items():
         if param_name not in properties:
             continue  # 允许额外参数
+        if param_value is None:
+            continue  # 可选参数未传值（必需参数已在上面检查）
         
         param_schema = properties[param_name]
         param_type = param_schema.get("type")
@@ -28,6 +28,8 @@ def get_db_connection():
             port=DB_PORT,
             charset=DB_CHARSET,
             cursorclass=pymysql.cursors.DictCursor,
+            # 允许一次 execute 发送多条语句（建表脚本用它合并 DDL 往返）
+            client_flag=pymysql.constants.CLIENT.MULTI_STATEMENTS,
             # 尝试使用 TCP 连接而不是 socket
             unix_socket=None
         )
@@ -50,9 +52,11 @@ def create_all_tables():
     
     try:
         cursor = connection.cursor()
+        # 所有 DDL 收集后拼成一条多语句，一次网络往返发送（连接需开启 MULTI_STATEMENTS）
+        statements = []
         
         # 1. 用户表
-        cursor.execute("""
+        statements.append("""
             CREATE TABLE IF NOT EXISTS users (
                 id INT AUTO_INCREMENT PRIMARY KEY,
                 username VARCHAR(50) UNIQUE NOT NULL,
@@ -61,11 +65,10 @@ def create_all_tables():
                 updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
             ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='用户表'
         """)
-        print("✅ 用户表创建/检查完成")
         
         # 2. 旅行规划表
-        cursor.execute("DROP TABLE IF EXISTS travel_plans")
-        cursor.execute("""
+        statements.append("DROP TABLE IF EXISTS travel_plans")
+        statements.append("""
             CREATE TABLE travel_plans (
                 id INT AUTO_INCREMENT PRIMARY KEY,
                 user_id INT NOT NULL COMMENT '用户ID',
@@ -77,18 +80,20 @@ def create_all_tables():
                 travelers VARCHAR(50) COMMENT '出行人数及类型',
                 xiaohongshu_notes JSON COMMENT '小红书笔记链接，存储为JSON数组',
                 addresses JSON COMMENT '居住地址信息，存储为JSON数组',
+                flights_count INT NOT NULL DEFAULT 0 COMMENT '航班数量',
+                accommodations_count INT NOT NULL DEFAULT 0 COMMENT '住宿数量',
+                itineraries_count INT NOT NULL DEFAULT 0 COMMENT '路线详情天数',
                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP COMMENT '创建时间',
                 updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP COMMENT '更新时间',
                 FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
-                INDEX idx_user_id (user_id),
+                INDEX idx_user_created (user_id, created_at),
                 INDEX idx_destination (destination)
             ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='旅行规划表'
         """)
-        print("✅ 旅行规划表创建完成")
         
         # 3. 对话记录表
-        cursor.execute("DROP TABLE IF EXISTS conversation_logs")
-        cursor.execute("""
+        statements.append("DROP TABLE IF EXISTS conversation_logs")
+        statements.append("""
             CREATE TABLE conversation_logs (
                 id INT AUTO_INCREMENT PRIMARY KEY,
                 user_id INT NOT NULL COMMENT '用户ID',
@@ -99,15 +104,14 @@ def create_all_tables():
                 FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
                 FOREIGN KEY (travel_plan_id) REFERENCES travel_plans(id) ON DELETE CASCADE,
                 INDEX idx_user_id (user_id),
-                INDEX idx_travel_plan_id (travel_plan_id),
+                INDEX idx_plan_ts (travel_plan_id, timestamp),
                 INDEX idx_timestamp (timestamp)
             ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='对话记录表'
         """)
-        print("✅ 对话记录表创建完成")
         
         # 4. 路线详情表
-        cursor.execute("DROP TABLE IF EXISTS itinerary_details")
-        cursor.execute("""
+        statements.append("DROP TABLE IF EXISTS itinerary_details")
+        statements.append("""
             CREATE TABLE itinerary_details (
                 id INT AUTO_INCREMENT PRIMARY KEY,
                 travel_plan_id INT NOT NULL COMMENT '旅行规划ID',
@@ -119,14 +123,14 @@ def create_all_tables():
                 updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP COMMENT '更新时间',
                 FOREIGN KEY (travel_plan_id) REFERENCES travel_plans(id) ON DELETE CASCADE,
                 INDEX idx_travel_plan_id (travel_plan_id),
-                INDEX idx_day_number (day_number)
+                INDEX idx_day_number (day_number),
+                UNIQUE KEY uk_plan_day (travel_plan_id, day_number)
             ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='路线详情表'
         """)
-        print("✅ 路线详情表创建完成")
         
         # 5. 航班表
-        cursor.execute("DROP TABLE IF EXISTS flights")
-        cursor.execute("""
+        statements.append("DROP TABLE IF EXISTS flights")
+        statements.append("""
             CREATE TABLE flights (
                 id INT AUTO_INCREMENT PRIMARY KEY,
                 user_id INT NOT NULL COMMENT '用户ID',
@@ -145,11 +149,10 @@ def create_all_tables():
                 INDEX idx_travel_plan_id (travel_plan_id)
             ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='航班表'
         """)
-        print("✅ 航班表创建完成")
         
         # 6. 居住表
-        cursor.execute("DROP TABLE IF EXISTS accommodations")
-        cursor.execute("""
+        statements.append("DROP TABLE IF EXISTS accommodations")
+        statements.append("""
             CREATE TABLE accommodations (
                 id INT AUTO_INCREMENT PRIMARY KEY,
                 user_id INT NOT NULL COMMENT '用户ID',
@@ -170,11 +173,15 @@ def create_all_tables():
                 INDEX idx_check_in_date (check_in_date)
             ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='居住表'
         """)
-        print("✅ 居住表创建完成")
         
         # 创建默认用户
-        cursor.execute("INSERT IGNORE INTO users (id, username, email) VALUES (1, 'default_user', 'default@example.com')")
-        print("✅ 默认用户创建完成")
+        statements.append("INSERT IGNORE INTO users (id, username, email) VALUES (1, 'default_user', 'default@example.com')")
+        
+        cursor.execute(";\n".join(statement.strip() for statement in statements))
+        # 逐个读取每条语句的结果，任何一条失败都会在这里抛出
+        while cursor.nextset():
+            pass
+        print(f"✅ 已在一次往返中执行 {len(statements)} 条建表语句，默认用户创建完成")
         
         connection.commit()
         print("\n✅ 所有数据库表创建成功！")
@@ -0,0 +1,44 @@
+"""
+Alembic 迁移环境：数据库 URL 由 get_database_url() 按 app.config.settings 构造，与应用连接池使用同一份配置（含 DB_SOCKET）
+"""
+from logging.config import fileConfig
+
+from alembic import context
+from sqlalchemy import create_engine, pool
+
+from app.models.travel_models import get_database_url
+
+config = context.config
+
+# 通过 create_all_tables() 在进程内调用时不覆盖应用已有的日志配置
+if config.config_file_name is not None and config.attributes.get("configure_logger", True):
+    fileConfig(config.config_file_name)
+
+# 迁移脚本直接执行 SQL，不使用 ORM 元数据自动生成
+target_metadata = None
+
+
+def run_migrations_offline() -> None:
+    """离线模式：只输出 SQL，不连接数据库"""
+    context.configure(
+        url=get_database_url(),
+        target_metadata=target_metadata,
+        literal_binds=True,
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online() -> None:
+    """在线模式：连接数据库执行迁移"""
+    engine = create_engine(get_database_url(), poolclass=pool.NullPool)
+    with engine.connect() as connection:
+        context.configure(connection=connection, target_metadata=target_metadata)
+        with context.begin_transaction():
+            context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
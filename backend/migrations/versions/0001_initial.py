@@ -0,0 +1,179 @@
+"""初始表结构
+
+与引入 Alembic 之前 create_all_tables 建出的表结构一致，之后的字段和索引变更见 0002 及以后的迁移。
+建表语句全部使用 CREATE TABLE IF NOT EXISTS：对已有数据的库执行时不会删除或重建任何表，
+旧库直接升级时由后续迁移补齐缺失的字段和索引
+
+Revision ID: 0001_initial
+Revises:
+Create Date: 2026-10-14
+"""
+from alembic import op
+
+
+revision = "0001_initial"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+# 按外键依赖顺序排列：被引用的表在前
+CREATE_TABLE_STATEMENTS = (
+    # 1. 用户表（简化版，实际项目中应该有完整的用户认证）
+    """
+        CREATE TABLE IF NOT EXISTS users (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            username VARCHAR(50) UNIQUE NOT NULL,
+            email VARCHAR(100) UNIQUE,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='用户表'
+    """,
+    # 2. 旅行规划表
+    """
+        CREATE TABLE IF NOT EXISTS travel_plans (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            user_id INT NOT NULL COMMENT '用户ID',
+            destination VARCHAR(100) NOT NULL COMMENT '目的地',
+            budget_min DECIMAL(10,2) DEFAULT 0 COMMENT '预算下限',
+            budget_max DECIMAL(10,2) DEFAULT 0 COMMENT '预算上限',
+            interests JSON COMMENT '旅行偏好，存储为JSON数组',
+            food_preferences JSON COMMENT '饮食偏好，存储为JSON数组',
+            travelers VARCHAR(50) COMMENT '出行人数及类型',
+            xiaohongshu_notes JSON COMMENT '小红书笔记链接，存储为JSON数组',
+            addresses JSON COMMENT '居住地址信息，存储为JSON数组',
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP COMMENT '创建时间',
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP COMMENT '更新时间',
+            FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
+            INDEX idx_user_id (user_id),
+            INDEX idx_destination (destination)
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='旅行规划表'
+    """,
+    # 3. 对话记录表
+    """
+        CREATE TABLE IF NOT EXISTS conversation_logs (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            user_id INT NOT NULL COMMENT '用户ID',
+            travel_plan_id INT COMMENT '旅行规划ID',
+            message TEXT NOT NULL COMMENT '对话内容',
+            sender ENUM('user', 'system') NOT NULL COMMENT '发送者类型',
+            timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP COMMENT '对话时间戳',
+            FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
+            FOREIGN KEY (travel_plan_id) REFERENCES travel_plans(id) ON DELETE CASCADE,
+            INDEX idx_user_id (user_id),
+            INDEX idx_travel_plan_id (travel_plan_id),
+            INDEX idx_timestamp (timestamp)
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='对话记录表'
+    """,
+    # 4. 路线规划详情表
+    """
+        CREATE TABLE IF NOT EXISTS itinerary_details (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            travel_plan_id INT NOT NULL COMMENT '旅行规划ID',
+            day_number INT NOT NULL COMMENT '第几天',
+            itinerary JSON COMMENT '每天的行程安排，存储为JSON',
+            recommended_spots JSON COMMENT '推荐景点，存储为JSON数组',
+            recommended_restaurants JSON COMMENT '推荐餐厅，存储为JSON数组',
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP COMMENT '创建时间',
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP COMMENT '更新时间',
+            FOREIGN KEY (travel_plan_id) REFERENCES travel_plans(id) ON DELETE CASCADE,
+            INDEX idx_travel_plan_id (travel_plan_id),
+            INDEX idx_day_number (day_number),
+            UNIQUE KEY uk_plan_day (travel_plan_id, day_number)
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='路线规划详情表'
+    """,
+    # 5. 景点表
+    """
+        CREATE TABLE IF NOT EXISTS attractions (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            name VARCHAR(200) NOT NULL COMMENT '景点名称',
+            address VARCHAR(500) COMMENT '景点地址',
+            description TEXT COMMENT '景点简介',
+            image_url VARCHAR(500) COMMENT '图片链接',
+            latitude DECIMAL(10,8) COMMENT '纬度',
+            longitude DECIMAL(11,8) COMMENT '经度',
+            city VARCHAR(100) COMMENT '所在城市',
+            country VARCHAR(100) COMMENT '所在国家',
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP COMMENT '创建时间',
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP COMMENT '更新时间',
+            INDEX idx_city (city),
+            INDEX idx_location (latitude, longitude)
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='景点表'
+    """,
+    # 6. 餐厅表
+    """
+        CREATE TABLE IF NOT EXISTS restaurants (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            name VARCHAR(200) NOT NULL COMMENT '餐厅名称',
+            address VARCHAR(500) COMMENT '餐厅地址',
+            description TEXT COMMENT '餐厅简介',
+            image_url VARCHAR(500) COMMENT '图片链接',
+            latitude DECIMAL(10,8) COMMENT '纬度',
+            longitude DECIMAL(11,8) COMMENT '经度',
+            city VARCHAR(100) COMMENT '所在城市',
+            country VARCHAR(100) COMMENT '所在国家',
+            cuisine_type VARCHAR(100) COMMENT '菜系类型',
+            price_level VARCHAR(20) COMMENT '价格等级',
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP COMMENT '创建时间',
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP COMMENT '更新时间',
+            INDEX idx_city (city),
+            INDEX idx_location (latitude, longitude),
+            INDEX idx_cuisine (cuisine_type)
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='餐厅表'
+    """,
+    # 7. 航班表
+    """
+        CREATE TABLE IF NOT EXISTS flights (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            user_id INT NOT NULL COMMENT '用户ID',
+            travel_plan_id INT COMMENT '旅行规划ID',
+            departure_airport VARCHAR(200) NOT NULL COMMENT '出发机场',
+            arrival_airport VARCHAR(200) NOT NULL COMMENT '到达机场',
+            departure_time DATETIME NOT NULL COMMENT '出发时间',
+            return_time DATETIME COMMENT '返回时间',
+            latitude DECIMAL(10,8) COMMENT '机场纬度',
+            longitude DECIMAL(11,8) COMMENT '机场经度',
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP COMMENT '创建时间',
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP COMMENT '更新时间',
+            FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
+            FOREIGN KEY (travel_plan_id) REFERENCES travel_plans(id) ON DELETE SET NULL,
+            INDEX idx_user_id (user_id),
+            INDEX idx_travel_plan_id (travel_plan_id)
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='航班表'
+    """,
+    # 8. 居住表
+    """
+        CREATE TABLE IF NOT EXISTS accommodations (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            user_id INT NOT NULL COMMENT '用户ID',
+            travel_plan_id INT COMMENT '旅行规划ID',
+            city VARCHAR(100) NOT NULL COMMENT '城市',
+            address VARCHAR(500) NOT NULL COMMENT '居住地址',
+            check_in_date DATE COMMENT '入住日期',
+            check_out_date DATE COMMENT '退房日期',
+            latitude DECIMAL(10,8) COMMENT '纬度',
+            longitude DECIMAL(11,8) COMMENT '经度',
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP COMMENT '创建时间',
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP COMMENT '更新时间',
+            FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
+            FOREIGN KEY (travel_plan_id) REFERENCES travel_plans(id) ON DELETE SET NULL,
+            INDEX idx_user_id (user_id),
+            INDEX idx_travel_plan_id (travel_plan_id),
+            INDEX idx_city (city),
+            INDEX idx_check_in_date (check_in_date)
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='居住表'
+    """,
+)
+
+# 建表顺序中的表名（降级时逆序删除，先删引用方）
+TABLES = ("users", "travel_plans", "conversation_logs", "itinerary_details", "attractions", "restaurants", "flights", "accommodations")
+
+
+def upgrade() -> None:
+    for statement in CREATE_TABLE_STATEMENTS:
+        op.execute(statement)
+
+
+def downgrade() -> None:
+    for table in reversed(TABLES):
+        op.execute(f"DROP TABLE IF EXISTS {table}")
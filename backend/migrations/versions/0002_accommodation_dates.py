@@ -0,0 +1,55 @@
+"""为 accommodations 表添加 check_in_date、check_out_date 字段和入住日期索引
+
+早于这两个字段的旧库由此补齐；0001 新建的库已包含它们，对应子句会被跳过
+
+Revision ID: 0002_accommodation_dates
+Revises: 0001_initial
+Create Date: 2026-10-14
+"""
+import sqlalchemy as sa
+from alembic import op
+
+
+revision = "0002_accommodation_dates"
+down_revision = "0001_initial"
+branch_labels = None
+depends_on = None
+
+
+def _existing_names() -> set:
+    """一次查询同时取出已存在的日期字段和索引名"""
+    rows = op.get_bind().execute(sa.text("""
+        SELECT COLUMN_NAME AS name
+        FROM INFORMATION_SCHEMA.COLUMNS
+        WHERE TABLE_SCHEMA = DATABASE()
+        AND TABLE_NAME = 'accommodations'
+        AND COLUMN_NAME IN ('check_in_date', 'check_out_date')
+        UNION ALL
+        SELECT INDEX_NAME AS name
+        FROM INFORMATION_SCHEMA.STATISTICS
+        WHERE TABLE_SCHEMA = DATABASE()
+        AND TABLE_NAME = 'accommodations'
+        AND INDEX_NAME = 'idx_check_in_date'
+    """))
+    return {row.name for row in rows}
+
+
+def upgrade() -> None:
+    existing = _existing_names()
+
+    # 只为缺失的对象生成子句，合并为一条 ALTER TABLE，表只重建一次
+    clauses = []
+    if "check_in_date" not in existing:
+        clauses.append("ADD COLUMN check_in_date DATE COMMENT '入住日期' AFTER address")
+    if "check_out_date" not in existing:
+        clauses.append("ADD COLUMN check_out_date DATE COMMENT '退房日期' AFTER check_in_date")
+    if "idx_check_in_date" not in existing:
+        clauses.append("ADD INDEX idx_check_in_date (check_in_date)")
+
+    if clauses:
+        op.execute("ALTER TABLE accommodations " + ", ".join(clauses) + ", ALGORITHM=INPLACE, LOCK=NONE")
+
+
+def downgrade() -> None:
+    # 0001 建表时已包含这两个字段，降级不删除，保持与 0001 的表结构一致
+    pass
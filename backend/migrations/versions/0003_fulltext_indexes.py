@@ -0,0 +1,54 @@
+"""为 attractions / restaurants 表添加 name、description 的 FULLTEXT(ngram) 索引
+
+Revision ID: 0003_fulltext_indexes
+Revises: 0002_accommodation_dates
+Create Date: 2026-10-14
+"""
+import sqlalchemy as sa
+from alembic import op
+
+
+revision = "0003_fulltext_indexes"
+down_revision = "0002_accommodation_dates"
+branch_labels = None
+depends_on = None
+
+
+FULLTEXT_INDEX_NAME = "ft_name_desc"
+FULLTEXT_TABLES = ("attractions", "restaurants")
+
+
+def _tables_with_index() -> set:
+    """一次查询取出已有全文索引的表"""
+    rows = op.get_bind().execute(
+        sa.text("""
+            SELECT DISTINCT TABLE_NAME AS name
+            FROM INFORMATION_SCHEMA.STATISTICS
+            WHERE TABLE_SCHEMA = DATABASE()
+            AND TABLE_NAME IN :tables
+            AND INDEX_NAME = :index_name
+        """).bindparams(sa.bindparam("tables", expanding=True)),
+        {"tables": list(FULLTEXT_TABLES), "index_name": FULLTEXT_INDEX_NAME},
+    )
+    return {row.name for row in rows}
+
+
+def upgrade() -> None:
+    existing = _tables_with_index()
+    migrated_tables = [table for table in FULLTEXT_TABLES if table not in existing]
+    for table in migrated_tables:
+        # ngram 解析器用于中文分词；添加全文索引不支持 LOCK=NONE，由 MySQL 自行选择算法
+        op.execute(
+            f"ALTER TABLE {table} ADD FULLTEXT INDEX {FULLTEXT_INDEX_NAME} (name, description) WITH PARSER ngram"
+        )
+
+    # 刷新索引统计信息：城市与关键词同时过滤时，优化器据此在 idx_city 和全文索引之间选择
+    if migrated_tables:
+        op.get_bind().execute(sa.text("ANALYZE TABLE " + ", ".join(migrated_tables))).fetchall()
+
+
+def downgrade() -> None:
+    existing = _tables_with_index()
+    for table in FULLTEXT_TABLES:
+        if table in existing:
+            op.execute(f"ALTER TABLE {table} DROP INDEX {FULLTEXT_INDEX_NAME}")
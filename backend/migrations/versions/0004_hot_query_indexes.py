@@ -0,0 +1,72 @@
+"""为热点查询添加联合索引，替换原单列索引
+
+- travel_plans: (user_id, created_at)，替换 idx_user_id
+- conversation_logs: (travel_plan_id, timestamp)，替换 idx_travel_plan_id
+
+Revision ID: 0004_hot_query_indexes
+Revises: 0003_fulltext_indexes
+Create Date: 2026-10-14
+"""
+import sqlalchemy as sa
+from alembic import op
+
+
+revision = "0004_hot_query_indexes"
+down_revision = "0003_fulltext_indexes"
+branch_labels = None
+depends_on = None
+
+
+# (表名, 新索引名, 索引列, 被替换的单列索引名, 单列索引列)
+# 联合索引以原单列开头，可同时满足外键约束，单列索引不再需要
+INDEX_MIGRATIONS = (
+    ("travel_plans", "idx_user_created", "user_id, created_at", "idx_user_id", "user_id"),
+    ("conversation_logs", "idx_plan_ts", "travel_plan_id, timestamp", "idx_travel_plan_id", "travel_plan_id"),
+)
+
+
+def _existing_indexes() -> set:
+    """一次查询取出两张表上已有的 (表名, 索引名)"""
+    rows = op.get_bind().execute(sa.text("""
+        SELECT DISTINCT TABLE_NAME AS table_name, INDEX_NAME AS name
+        FROM INFORMATION_SCHEMA.STATISTICS
+        WHERE TABLE_SCHEMA = DATABASE()
+        AND TABLE_NAME IN ('travel_plans', 'conversation_logs')
+    """))
+    return {(row.table_name, row.name) for row in rows}
+
+
+def _alter(table: str, clauses: list) -> None:
+    op.execute(f"ALTER TABLE {table} " + ", ".join(clauses) + ", ALGORITHM=INPLACE, LOCK=NONE")
+
+
+def upgrade() -> None:
+    existing = _existing_indexes()
+
+    migrated_tables = []
+    for table, index_name, columns, old_index, _ in INDEX_MIGRATIONS:
+        clauses = []
+        if (table, index_name) not in existing:
+            clauses.append(f"ADD INDEX {index_name} ({columns})")
+        if (table, old_index) in existing:
+            clauses.append(f"DROP INDEX {old_index}")
+        if clauses:
+            _alter(table, clauses)
+            migrated_tables.append(table)
+
+    # 刷新索引统计信息，让优化器尽快选用新索引
+    if migrated_tables:
+        op.get_bind().execute(sa.text("ANALYZE TABLE " + ", ".join(migrated_tables))).fetchall()
+
+
+def downgrade() -> None:
+    existing = _existing_indexes()
+
+    for table, index_name, _, old_index, old_columns in INDEX_MIGRATIONS:
+        clauses = []
+        if (table, old_index) not in existing:
+            clauses.append(f"ADD INDEX {old_index} ({old_columns})")
+        if (table, index_name) in existing:
+            clauses.append(f"DROP INDEX {index_name}")
+        if clauses:
+            _alter(table, clauses)
@@ -0,0 +1,70 @@
+"""为 travel_plans 表添加 flights_count、accommodations_count、itineraries_count 字段，
+并按现有子表数据回填
+
+Revision ID: 0005_plan_child_counts
+Revises: 0004_hot_query_indexes
+Create Date: 2026-10-14
+"""
+import sqlalchemy as sa
+from alembic import op
+
+
+revision = "0005_plan_child_counts"
+down_revision = "0004_hot_query_indexes"
+branch_labels = None
+depends_on = None
+
+
+# (字段名, 字段注释, 子表名)
+COUNT_COLUMNS = (
+    ("flights_count", "航班数量", "flights"),
+    ("accommodations_count", "住宿数量", "accommodations"),
+    ("itineraries_count", "路线详情天数", "itinerary_details"),
+)
+
+
+def _existing_columns() -> set:
+    """一次查询检查所有计数字段是否已存在"""
+    rows = op.get_bind().execute(sa.text("""
+        SELECT COLUMN_NAME AS name
+        FROM INFORMATION_SCHEMA.COLUMNS
+        WHERE TABLE_SCHEMA = DATABASE()
+        AND TABLE_NAME = 'travel_plans'
+        AND COLUMN_NAME IN ('flights_count', 'accommodations_count', 'itineraries_count')
+    """))
+    return {row.name for row in rows}
+
+
+def upgrade() -> None:
+    existing = _existing_columns()
+
+    # 只为缺失的字段生成子句，合并为一条 ALTER TABLE
+    clauses = []
+    previous = "addresses"
+    for column, comment, _ in COUNT_COLUMNS:
+        if column not in existing:
+            clauses.append(f"ADD COLUMN {column} INT NOT NULL DEFAULT 0 COMMENT '{comment}' AFTER {previous}")
+        previous = column
+
+    if not clauses:
+        return
+
+    op.execute("ALTER TABLE travel_plans " + ", ".join(clauses) + ", ALGORITHM=INPLACE, LOCK=NONE")
+
+    # 按子表现有数据回填行数（每张子表一次聚合）
+    for column, _, table in COUNT_COLUMNS:
+        if column in existing:
+            continue
+        op.execute(f"""
+            UPDATE travel_plans p
+            JOIN (SELECT travel_plan_id, COUNT(*) AS cnt FROM {table} GROUP BY travel_plan_id) c
+            ON c.travel_plan_id = p.id
+            SET p.{column} = c.cnt
+        """)
+
+
+def downgrade() -> None:
+    existing = _existing_columns()
+    clauses = [f"DROP COLUMN {column}" for column, _, _ in COUNT_COLUMNS if column in existing]
+    if clauses:
+        op.execute("ALTER TABLE travel_plans " + ", ".join(clauses))
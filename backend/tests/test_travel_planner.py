@@ -42,3 +42,599 @@ def test_get_travel_plans():
     """测试获取旅行规划列表"""
     response = client.get("/api/v1/travel/plans")
     assert response.status_code in [200, 500]  # 可能因为数据库未连接而失败
+
+
+def test_get_recommendations(monkeypatch):
+    """测试获取推荐景点和餐厅（替换外部地点API）"""
+    from app.services.travel_service import get_travel_service
+    location_client = get_travel_service().location_client
+    monkeypatch.setattr(location_client, "search_attractions", lambda city, keyword=None: [{"name": "故宫", "description": "人文历史"}])
+    monkeypatch.setattr(location_client, "search_restaurants", lambda city, cuisine_type=None: [{"name": "全聚德", "cuisine_type": "烤鸭"}])
+
+    response = client.get("/api/v1/travel/recommendations", params={"destination": "北京"})
+    assert response.status_code == 200
+    data = response.json()
+    assert data["attractions"][0]["name"] == "故宫"
+    assert data["restaurants"][0]["name"] == "全聚德"
+
+
+class _FakeAsyncRedis:
+    """内存版 Redis，仅实现测试用到的 get/set"""
+
+    def __init__(self):
+        self.store = {}
+
+    async def get(self, key):
+        return self.store.get(key)
+
+    async def set(self, key, value, ex=None):
+        self.store[key] = value
+
+
+def test_geocode_uses_cache(monkeypatch):
+    """测试地理编码接口命中缓存后不再调用外部API"""
+    from app.utils import cache
+    from app.utils.api_clients import get_location_client
+    monkeypatch.setattr(cache, "_async_redis", _FakeAsyncRedis())
+    calls = []
+
+    async def fake_geocode(address, location=None):
+        calls.append(address)
+        return {"latitude": 39.9, "longitude": 116.4, "formatted_address": address}
+
+    monkeypatch.setattr(get_location_client(), "geocode_async", fake_geocode)
+
+    for _ in range(2):
+        response = client.get("/api/v1/travel/geocode", params={"address": "北京天安门"})
+        assert response.status_code == 200
+        assert response.json()["latitude"] == 39.9
+    assert calls == ["北京天安门"]
+
+
+def test_keyword_condition():
+    """测试关键词检索条件：足够长的词走全文索引，过短时回退到 LIKE"""
+    from app.crud.travel_crud import _keyword_condition
+    sql, params = _keyword_condition("火锅 川菜")
+    assert "MATCH(name, description)" in sql
+    assert params == ['+"火锅" +"川菜"']
+    sql, params = _keyword_condition("锅")
+    assert "LIKE" in sql
+    assert params == ["%锅%", "%锅%"]
+
+
+def test_parse_json_fields():
+    """测试 JSON 字段解析：空值和损坏数据回退为默认值"""
+    from app.crud.travel_crud import _parse_json_fields, _ITINERARY_JSON_FIELDS
+    row = {"itinerary": None, "recommended_spots": '[{"name": "宽窄巷子"}]', "recommended_restaurants": "{bad"}
+    _parse_json_fields(row, _ITINERARY_JSON_FIELDS)
+    assert row == {"itinerary": {}, "recommended_spots": [{"name": "宽窄巷子"}], "recommended_restaurants": []}
+
+
+def test_get_travel_plan_full(monkeypatch):
+    """测试规划聚合接口：一次返回规划、航班、住宿和路线详情"""
+    from datetime import datetime
+    from app.crud import travel_crud
+    now = datetime(2026, 5, 1, 8, 0)
+    bundle = {
+        "plan": {
+            "id": 1, "user_id": 1, "destination": "成都", "budget_min": 0, "budget_max": 5000,
+            "interests": [], "food_preferences": [], "travelers": "solo", "xiaohongshu_notes": [],
+            "addresses": [], "created_at": now, "updated_at": now,
+        },
+        "flights": [{
+            "id": 1, "user_id": 1, "travel_plan_id": 1, "departure_airport": "PEK", "arrival_airport": "TFU",
+            "departure_time": "2026-05-01T08:00:00", "return_time": None, "latitude": None, "longitude": None,
+        }],
+        "accommodations": [],
+        "itinerary_details": [],
+    }
+    monkeypatch.setattr(travel_crud, "get_travel_plan_bundle", lambda plan_id: bundle)
+
+    response = client.get("/api/v1/travel/plans/1/full")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["plan"]["destination"] == "成都"
+    assert data["flights"][0]["arrival_airport"] == "TFU"
+
+
+def test_get_travel_plans_raw_json(monkeypatch):
+    """测试规划列表：JSON 字段以数据库原文拼接进响应，DECIMAL 预算按数字输出"""
+    from datetime import datetime
+    from decimal import Decimal
+    from app.crud import travel_crud
+    from app.crud.travel_crud import _build_plan_row
+    now = datetime(2026, 5, 1, 8, 0)
+    # 与 _PLAN_LIST_COLUMNS 列顺序一致的元组行
+    values = (
+        1, 1, "西安", Decimal("0.00"), Decimal("3000.50"), '["人文历史"]', None, "couple", "[]",
+        '[{"city": "西安", "address": "钟楼"}]', now, now,
+    )
+    monkeypatch.setattr(travel_crud, "get_user_travel_plans", lambda user_id, raw_json=False: [_build_plan_row(values, raw_json)])
+
+    response = client.get("/api/v1/travel/plans")
+    assert response.status_code == 200
+    plan = response.json()[0]
+    assert plan["interests"] == ["人文历史"]
+    assert plan["food_preferences"] == []
+    assert plan["addresses"][0]["address"] == "钟楼"
+    assert plan["budget_max"] == 3000.5
+
+
+def test_lru_cache_ttl(monkeypatch):
+    """测试进程内缓存：超出 ttl 的条目视为未命中，clear 后全部失效"""
+    from app.utils import cache
+    now = [100.0]
+    monkeypatch.setattr(cache.time, "monotonic", lambda: now[0])
+    lru = cache.LRUCache(2, ttl=60)
+    lru.set("成都", ["宽窄巷子"])
+    lru.set("西安", ["钟楼"])
+    assert lru.get("成都") == ["宽窄巷子"]
+    now[0] += 61
+    assert lru.get("成都") is None
+    lru.set("重庆", ["洪崖洞"])
+    lru.clear()
+    assert lru.get("重庆") is None
+
+
+def test_get_plan_conversations_returns_json(monkeypatch):
+    """测试对话记录接口：数据库行直接编码为 JSON 数组"""
+    from datetime import datetime
+    from app.crud import travel_crud
+    rows = [
+        {"id": i, "user_id": 1, "travel_plan_id": 1, "message": f"消息{i}", "sender": "user", "timestamp": datetime(2026, 5, 1, 8, i)}
+        for i in range(3)
+    ]
+    monkeypatch.setattr(travel_crud, "get_conversations_by_plan", lambda plan_id: rows)
+
+    response = client.get("/api/v1/travel/plans/1/conversations")
+    assert response.status_code == 200
+    data = response.json()
+    assert [item["message"] for item in data] == ["消息0", "消息1", "消息2"]
+    assert data[0]["timestamp"] == "2026-05-01T08:00:00"
+
+
+class _FakeCursor:
+    """记录执行过的 SQL（execute 和 executemany 均记为 (sql, 参数)），按预置数据返回查询结果"""
+
+    def __init__(self):
+        self.plan = None
+        self.rows = [{"id": 1}]
+        self.lastrowid = None
+        self.executed = []
+
+    def execute(self, sql, params=None):
+        self.executed.append((sql, params))
+        return 1
+
+    def executemany(self, sql, rows):
+        self.executed.append((sql, rows))
+
+    def params_for(self, sql):
+        """某条 SQL 最近一次执行的参数"""
+        return [params for executed_sql, params in self.executed if executed_sql == sql][-1]
+
+    def fetchone(self):
+        return dict(self.plan)
+
+    def fetchall(self):
+        return self.rows
+
+    def close(self):
+        pass
+
+
+class _FakeConnection:
+    """内存版数据库连接：所有 cursor() 共用一个 _FakeCursor，事务操作按顺序记入 log"""
+
+    def __init__(self, log):
+        self.fake_cursor = _FakeCursor()
+        self.log = log
+
+    def cursor(self, cursor_class=None):
+        return self.fake_cursor
+
+    def begin(self):
+        self.log.append("begin")
+
+    def commit(self):
+        self.log.append("commit")
+
+    def rollback(self):
+        self.log.append("rollback")
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def fake_db(monkeypatch):
+    """把 travel_crud 的数据库连接替换为 _FakeConnection"""
+    from app.crud import travel_crud
+    connection = _FakeConnection([])
+    monkeypatch.setattr(travel_crud, "get_db_connection", lambda: connection)
+    return connection
+
+
+def test_bundle_skips_empty_children(fake_db):
+    """测试聚合查询：子表行数为 0 时不再发出对应的 SELECT"""
+    from app.crud import travel_crud
+    cursor = fake_db.fake_cursor
+    cursor.plan = {"id": 1, "flights_count": 2, "accommodations_count": 0, "itineraries_count": 0}
+    bundle = travel_crud.get_travel_plan_bundle(1)
+    assert bundle["flights"] == [{"id": 1}]
+    assert bundle["accommodations"] == [] and bundle["itinerary_details"] == []
+    assert len(cursor.executed) == 2
+
+
+def test_child_reads_skip_when_count_is_zero(fake_db):
+    """测试单独读取航班/路线详情：只按主键读行数字段，行数为 0 时不再查子表"""
+    from app.crud import travel_crud
+    cursor = fake_db.fake_cursor
+    cursor.plan = {"flights_count": 0, "accommodations_count": 1, "itineraries_count": 0}
+    assert travel_crud.get_flights_by_plan(1) == []
+    assert travel_crud.get_itinerary_details(1) == []
+    assert [sql for sql, _ in cursor.executed] == [travel_crud._FETCH_CHILD_COUNTS_SQL] * 2
+
+
+def test_geocode_batch_tool_dedupes_and_keeps_order(monkeypatch):
+    """测试批量地理编码：相同地址只请求一次，结果按输入顺序返回，失败项为空坐标"""
+    import asyncio
+    from app.services.tools import geocode_batch_tool
+    from app.utils.api_clients import get_location_client
+    calls = []
+
+    async def fake_geocode(address, location=None):
+        calls.append(address)
+        return {"latitude": 1.0, "longitude": 2.0, "formatted_address": address} if address != "未知" else None
+
+    monkeypatch.setattr(get_location_client(), "geocode_async", fake_geocode)
+    results = asyncio.run(geocode_batch_tool.ainvoke({"addresses": ["故宫", "未知", "故宫"], "location": "北京"}))
+    assert sorted(calls) == ["故宫", "未知"]
+    assert [item["formatted_address"] for item in results] == ["故宫", None, "故宫"]
+
+
+class _FakeRedis:
+    """内存版同步 Redis，仅实现测试用到的 get/set"""
+
+    def __init__(self):
+        self.store = {}
+
+    def get(self, key):
+        return self.store.get(key)
+
+    def set(self, key, value, ex=None):
+        self.store[key] = value
+
+
+def test_xiaohongshu_cdata_cached_by_note_id(monkeypatch):
+    """测试小红书工具缓存：同一笔记的不同链接、不同调用入口只获取一次内容"""
+    from app.services import tools
+    from app.utils import cache
+    from app.utils import api_clients
+    from app.utils.api_clients import XiaohongshuClient
+    from app.utils.function_executor import FunctionExecutor
+    monkeypatch.setattr(cache, "_redis", _FakeRedis())
+    monkeypatch.setattr(api_clients, "_xhs_cdata_cache", cache.LRUCache(8))
+    calls = []
+
+    def fake_cdata(self, note_url, include_raw=False):
+        calls.append(note_url)
+        return {"note_id": self.extract_note_id(note_url), "title": "成都三日游"}
+
+    monkeypatch.setattr(XiaohongshuClient, "get_note_cdata", fake_cdata)
+    first = tools.get_xiaohongshu_cdata.invoke({"note_url": "https://www.xiaohongshu.com/explore/abc123"})
+    second = tools.get_xiaohongshu_cdata.invoke({"note_url": "http://xiaohongshu.com/explore/abc123"})
+    # FunctionExecutor 与工具共用同一份缓存
+    third = FunctionExecutor().execute("get_xiaohongshu_cdata", {"note_url": "https://www.xiaohongshu.com/explore/abc123"})
+    assert first == second == third == {"note_id": "abc123", "title": "成都三日游"}
+    assert len(calls) == 1
+
+
+def test_itinerary_details_typed_day_schema(monkeypatch):
+    """测试路线详情接口：按每日结构校验，LLM 写法不一的字段和附加字段原样保留"""
+    from datetime import datetime
+    from app.crud import travel_crud
+    now = datetime(2026, 5, 1, 8, 0)
+    day = {
+        "theme": "老城漫步",
+        "schedule": {"morning": [{"type": "spot", "name": "钟楼", "play_time_minutes": "约60分钟", "notes": "早去人少", "lat": 34.26}]},
+        "tips": ["带伞"],
+    }
+    details = [{
+        "id": 1, "travel_plan_id": 1, "day_number": 1, "itinerary": day,
+        "recommended_spots": [{"name": "钟楼"}], "recommended_restaurants": [], "created_at": now, "updated_at": now,
+    }]
+    monkeypatch.setattr(travel_crud, "get_itinerary_details", lambda plan_id, raw_json=False: details)
+
+    response = client.get("/api/v1/travel/plans/1/itinerary")
+    assert response.status_code == 200
+    item = response.json()[0]["itinerary"]["schedule"]["morning"][0]
+    assert item["play_time_minutes"] == "约60分钟"
+    assert item["notes"] == "早去人少"
+    assert item["lat"] == 34.26
+
+
+def test_itinerary_item_tagged_by_type():
+    """测试行程活动按 type 选择分支；缺少 type 时按菜系/价格推断为餐厅"""
+    from app.schemas.travel_schemas import DayScheduleSchema, RestaurantItemSchema, SpotItemSchema
+    schedule = DayScheduleSchema.model_validate({"morning": [
+        {"type": "spot", "name": "大雁塔"},
+        {"type": "restaurant", "name": "老孙家", "cuisine": "泡馍"},
+        {"name": "回民街小吃", "price_range": "人均50"},
+    ]})
+    assert [type(item) for item in schedule.morning] == [SpotItemSchema, RestaurantItemSchema, RestaurantItemSchema]
+    # 序列化时按实例所属分支输出，缺少 type 的餐厅不会被当作景点
+    assert schedule.model_dump(warnings="error")["morning"][2] == {"name": "回民街小吃", "price_range": "人均50"}
+
+
+def test_flight_schema_accepts_epoch_seconds():
+    """测试航班时间：Unix 时间戳（秒）与 ISO 字符串解析为同一 UTC 时刻"""
+    from app.schemas.travel_schemas import FlightSchema
+    by_epoch = FlightSchema(departureAirport="PEK", arrivalAirport="CTU", departureTime=1777622400)
+    by_iso = FlightSchema(departureAirport="PEK", arrivalAirport="CTU", departureTime="2026-05-01T08:00:00Z")
+    assert by_epoch.departure_time == by_iso.departure_time
+
+
+def test_travel_plan_create_rejects_non_string_items():
+    """测试字符串列表严格校验：非字符串元素不再被隐式转换"""
+    from pydantic import ValidationError
+    from app.schemas.travel_schemas import TravelPlanCreate
+    payload = {"destination": ["成都"], "budget": {"min": 0, "max": 5000}, "travelers": "solo"}
+    assert TravelPlanCreate.model_validate(payload).destination == ["成都"]
+    with pytest.raises(ValidationError):
+        TravelPlanCreate.model_validate({**payload, "interests": [1]})
+
+
+def test_create_travel_plan_geocodes_each_address_once(monkeypatch, fake_db):
+    """测试住宿地址去重：写法不同的同一地址只解析一次，坐标按原顺序写回每一行；地理编码在事务开始前完成"""
+    from app.crud import travel_crud
+    from app.schemas.travel_schemas import TravelPlanCreate
+
+    class FakeLocationClient:
+        def geocode(self, address, location=None):
+            fake_db.log.append("geocode")
+            return {"latitude": 35.68, "longitude": 139.76}
+
+    monkeypatch.setattr(travel_crud, "get_location_client", lambda: FakeLocationClient())
+    fake_db.fake_cursor.lastrowid = 7
+    plan = TravelPlanCreate.model_validate({
+        "destination": ["东京"],
+        "budget": {"min": 0, "max": 10000},
+        "travelers": "friends",
+        "addresses": [
+            {"city": "东京", "address": "Tokyo Station"},
+            {"city": "东京", "address": "tokyo station "},
+            {"city": "东京", "address": "新宿"},
+        ],
+    })
+    assert travel_crud.create_travel_plan(1, plan) == 7
+    assert fake_db.log == ["geocode", "geocode", "begin", "commit"]
+    rows = fake_db.fake_cursor.params_for(travel_crud._INSERT_ACCOMMODATION_SQL)
+    assert [row[3] for row in rows] == ["Tokyo Station", "tokyo station ", "新宿"]
+    assert all(row[6:] == (35.68, 139.76) for row in rows)
+
+
+@pytest.fixture
+def itinerary_service(monkeypatch):
+    """流式生成路线用的 TravelService：路线缓存未命中，地图搜索、航班住宿查询和路线详情写入替换为空操作"""
+    from app.services import travel_service as ts
+    service = ts.TravelService()
+    monkeypatch.setattr(ts, "cache_get", lambda key: None)
+    monkeypatch.setattr(ts, "cache_set", lambda key, value, ttl: None)
+    monkeypatch.setattr(service.location_client, "search_attractions", lambda city: [])
+    monkeypatch.setattr(service.location_client, "search_restaurants", lambda city: [])
+    monkeypatch.setattr(ts.travel_crud, "get_travel_plan_bundle", lambda *a, **k: {"flights": [], "accommodations": []})
+    monkeypatch.setattr(ts.travel_crud, "create_itinerary_details_bulk", lambda plan_id, rows: True)
+    return service
+
+
+def _run_itinerary_stream(service, stop_stage=None):
+    """驱动成都一日游的流式生成，返回 [(事件名, 数据)]；指定 stop_stage 时收到该 progress 阶段即停止"""
+    import json
+    from datetime import date
+    events = service.generate_itinerary_stream(1, date(2026, 5, 1), date(2026, 5, 1), "成都", [], [], "solo", 0, 5000)
+    frames = []
+    for frame in events:
+        if not frame.startswith(b"event: "):
+            continue
+        name, data = frame[len(b"event: "):].split(b"\ndata: ", 1)
+        payload = json.loads(data)
+        frames.append((name.decode(), payload))
+        if stop_stage and isinstance(payload, dict) and payload.get("stage") == stop_stage:
+            break
+    events.close()
+    return frames
+
+
+def _token_deltas(frames):
+    return [payload["delta"] for name, payload in frames if name == "token"]
+
+
+def test_itinerary_stream_replays_cached_text(monkeypatch, itinerary_service):
+    """测试路线缓存命中：不调用 LLM，缓存文本按切片回放为 token 事件"""
+    from app.services import travel_service as ts
+    cached = '{"day_1": {"schedule": {"morning": [{"name": "宽窄巷子"}]}}}' * 2
+    keys = []
+    monkeypatch.setattr(ts, "cache_get", lambda key: keys.append(key) or cached)
+    monkeypatch.setattr(type(itinerary_service.llm), "stream", lambda *a, **k: pytest.fail("命中缓存时不应调用 LLM"))
+    deltas = _token_deltas(_run_itinerary_stream(itinerary_service, stop_stage="llm_stream_end"))
+    assert keys[0].startswith("itinerary:")
+    assert "".join(deltas) == cached
+    assert len(deltas) == -(-len(cached) // ts.ITINERARY_REPLAY_CHUNK)
+
+
+def test_location_batch_geocode_uses_amap_batch(monkeypatch):
+    """测试批量地理编码：国内地址合并为一次高德批量请求，未解析出的地址单独回退"""
+    from app.utils import api_clients
+    requests_sent = []
+
+    class FakeResponse:
+        def __init__(self, data):
+            self.data = data
+        def raise_for_status(self):
+            pass
+        def json(self):
+            return self.data
+
+    class FakeSession:
+        def get(self, url, params=None, timeout=None):
+            requests_sent.append(params)
+            return FakeResponse({"status": "1", "geocodes": [
+                {"location": "116.39,39.91", "formatted_address": "故宫"},
+                {"location": [], "formatted_address": []},
+            ]})
+
+    monkeypatch.setattr(api_clients, "get_http_session", lambda: FakeSession())
+    client = api_clients.LocationAPIClient()
+    fallback = []
+    monkeypatch.setattr(client, "geocode", lambda address, location=None: fallback.append(address) or None)
+    results = client.batch_geocode(["北京 故宫", "北京 不存在的地方", "北京  故宫"], location="北京")
+    assert len(requests_sent) == 1 and requests_sent[0]["batch"] == "true"
+    assert requests_sent[0]["address"] == "北京 故宫|北京 不存在的地方"
+    assert fallback == ["北京 不存在的地方"]
+    assert [r and r["latitude"] for r in results] == [39.91, None, 39.91]
+
+
+def test_location_batch_geocode_routes_each_address(monkeypatch):
+    """测试批量地理编码（未指定城市）：国内外地址混合时逐个判断，国外地址不发给高德"""
+    from app.utils.api_clients import LocationAPIClient
+    client = LocationAPIClient()
+    amap_batches = []
+    monkeypatch.setattr(client.amap_client, "batch_geocode", lambda addresses: amap_batches.append(addresses) or [
+        {"latitude": 39.91, "longitude": 116.39} for _ in addresses
+    ])
+    monkeypatch.setattr(client.mapbox_client, "geocode", lambda address: {"latitude": 48.86, "longitude": 2.29})
+    results = client.batch_geocode(["Eiffel Tower Paris", "北京故宫"])
+    assert amap_batches == [["北京故宫"]]
+    assert [r["latitude"] for r in results] == [48.86, 39.91]
+
+
+def test_parse_itinerary_response_skips_invalid_brace_regions():
+    """测试路线解析：跳过前面不合法的括号片段，字符串内的括号不影响定位，代码块包裹可去除"""
+    from app.services.travel_service import TravelService
+    text = '说明 {不是JSON} 路线如下 {"day_1": {"theme": "宽窄巷子 {夜游}"}} 祝旅途愉快'
+    assert TravelService._parse_itinerary_response(None, text, 1) == {"day_1": {"theme": "宽窄巷子 {夜游}"}}
+    fenced = '```JSON\n{"day_1": {"theme": "a"}}\n```'
+    assert TravelService._parse_itinerary_response(None, fenced, 1) == {"day_1": {"theme": "a"}}
+
+
+def test_itinerary_stream_coalesces_tokens(monkeypatch, itinerary_service):
+    """测试 LLM token 合并输出：多个小 token 合并为少量帧，拼接后内容不变"""
+    from types import SimpleNamespace
+    from app.services import travel_service as ts
+    tokens = ["{", '"day_1"', ": ", "{}", "}"] * 30
+    monkeypatch.setattr(ts.time, "monotonic", lambda: 0.0)
+    monkeypatch.setattr(type(itinerary_service.llm), "stream", lambda self, messages: (SimpleNamespace(content=t) for t in tokens))
+    deltas = _token_deltas(_run_itinerary_stream(itinerary_service, stop_stage="llm_stream_end"))
+    assert "".join(deltas) == "".join(tokens)
+    assert len(deltas) < len(tokens) // 10
+
+
+def test_create_itinerary_details_bulk_single_transaction(fake_db):
+    """测试路线详情批量写入：一次多行 upsert，只有新增的天计入路线天数"""
+    from app.crud import travel_crud
+    cursor = fake_db.fake_cursor
+    cursor.rows = [{"day_number": 1}]
+    details = [{"day_number": day, "itinerary": {"theme": f"第{day}天"}} for day in (1, 2, 3)]
+    assert travel_crud.create_itinerary_details_bulk(9, details)
+    assert fake_db.log == ["begin", "commit"]
+    assert len(cursor.params_for(travel_crud._UPSERT_ITINERARY_DETAIL_SQL)) == 3
+    assert cursor.params_for(travel_crud._ADD_ITINERARIES_COUNT_SQL) == (2, 9)
+
+
+def test_itinerary_persist_failure_reported_by_both_paths(monkeypatch, itinerary_service):
+    """测试路线详情写入失败：流式接口推送 error 且不推送 result，非流式接口返回 success=False"""
+    from datetime import date
+    from app.services import travel_service as ts
+    cached = '{"day_1": {"theme": "成都初见", "schedule": {"morning": [{"name": "宽窄巷子", "latitude": 30.66, "longitude": 104.05}]}}}'
+    monkeypatch.setattr(ts, "cache_get", lambda key: cached)
+    monkeypatch.setattr(ts.travel_crud, "create_itinerary_details_bulk", lambda plan_id, rows: False)
+    frames = _run_itinerary_stream(itinerary_service)
+    assert frames[-1] == ("error", {"message": ts.ITINERARY_PERSIST_ERROR})
+    assert "result" not in [name for name, _ in frames]
+    result = itinerary_service.generate_itinerary(1, date(2026, 5, 1), date(2026, 5, 1), "成都", [], [], "solo", 0, 5000)
+    assert result == {"success": False, "error": ts.ITINERARY_PERSIST_ERROR}
+
+
+def test_place_search_cached_per_destination(monkeypatch):
+    """测试景点搜索缓存：同一城市（写法略有差异）只请求一次地图API，返回副本互不影响；进程内缓存失效后从 Redis 读取"""
+    from app.utils import cache
+    from app.utils.api_clients import LocationAPIClient
+    redis_store = _FakeRedis()
+    monkeypatch.setattr(cache, "_redis", redis_store)
+    client = LocationAPIClient()
+    calls = []
+
+    def fake_search(city, keyword=None):
+        calls.append(city)
+        return [{"name": "宽窄巷子"}]
+
+    monkeypatch.setattr(client, "_search_attractions", fake_search)
+    first = client.search_attractions("成都")
+    first[0]["latitude"] = 30.6
+    assert client.search_attractions(" 成都 ") == [{"name": "宽窄巷子"}]
+    client._search_cache.clear()
+    assert client.search_attractions("成都") == [{"name": "宽窄巷子"}]
+    assert calls == ["成都"] and len(redis_store.store) == 1
+
+
+def test_itinerary_endpoints_accept_irregular_llm_shapes(monkeypatch):
+    """测试路线详情接口：travel_service 能处理的不规则 LLM 写法不报错，不补原数据中没有的字段"""
+    from datetime import datetime
+    from app.crud import travel_crud
+    now = datetime(2026, 5, 1, 8, 0)
+    day = {
+        "theme": "老城漫步",
+        "schedule": {
+            "morning": {"items": [
+                {"name": "回民街", "price_range": 50, "latitude": "", "commute_from_prev": "步行10分钟"},
+                "自由活动",
+            ]},
+            "afternoon": [{"type": "spot", "name": "大雁塔", "recommended_time": 14}],
+        },
+        "tips": [{"title": "防晒", "detail": "带帽子"}],
+    }
+    detail = {
+        "id": 1, "travel_plan_id": 1, "day_number": 1, "itinerary": day,
+        "recommended_spots": [{"name": "大雁塔"}], "recommended_restaurants": None, "created_at": now, "updated_at": now,
+    }
+    monkeypatch.setattr(travel_crud, "get_itinerary_details", lambda plan_id, raw_json=False: [detail])
+    monkeypatch.setattr(travel_crud, "get_travel_plan_bundle", lambda plan_id: {
+        "plan": {
+            "id": 1, "user_id": 1, "destination": "西安", "budget_min": 0, "budget_max": 5000,
+            "interests": [], "food_preferences": [], "travelers": "solo", "xiaohongshu_notes": [],
+            "addresses": [], "created_at": now, "updated_at": now,
+        },
+        "flights": [], "accommodations": [], "itinerary_details": [detail],
+    })
+    expected = {
+        "theme": "老城漫步",
+        "schedule": {
+            "morning": [{"name": "回民街", "price_range": 50, "latitude": "", "commute_from_prev": "步行10分钟"}],
+            "afternoon": [{"type": "spot", "name": "大雁塔", "recommended_time": 14}],
+        },
+        "tips": [{"title": "防晒", "detail": "带帽子"}],
+    }
+
+    response = client.get("/api/v1/travel/plans/1/itinerary")
+    assert response.status_code == 200
+    assert response.json()[0]["itinerary"] == expected
+    assert response.json()[0]["recommended_spots"] == [{"name": "大雁塔"}]
+
+    response = client.get("/api/v1/travel/plans/1/full")
+    assert response.status_code == 200
+    assert response.json()["itinerary_details"][0]["itinerary"] == expected
+
+
+def test_database_url_uses_unix_socket(monkeypatch):
+    """测试迁移使用的数据库 URL：配置 DB_SOCKET 时走 Unix socket，不带 host/port"""
+    from app.config import settings
+    from app.models.travel_models import get_database_url
+    monkeypatch.setattr(settings, "DB_SOCKET", "/var/run/mysqld/mysqld.sock")
+    url = get_database_url()
+    assert url.query["unix_socket"] == "/var/run/mysqld/mysqld.sock"
+    assert url.host is None and url.port is None
+    monkeypatch.setattr(settings, "DB_SOCKET", None)
+    url = get_database_url()
+    assert "unix_socket" not in url.query
+    assert url.host == settings.DB_HOST